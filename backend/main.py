@@ -1,14 +1,20 @@
 import os
+import json
+import hashlib
 import argparse
 import sys
 import subprocess
 from threading import Thread
 from src.config import Config
+from src.common.log import request_context
 from src.crawler.meditation_crawler import MeditationNewsCrawler
 from src.processor.chunker_factory import ChunkerFactory
 from src.vector_store.manager import VectorDBManager
+from src.vector_store.embedding_cache import get_embedding_cache
+from src.vector_store.numpy_store import NumpyVectorStore, quantization_report
 from src.retriever.hybrid_retriever import HybridRetriever
 from src.qa.engine import QAEngine
+from src.qa.prompts import DISTILL
 from src.eval.runner import EvaluationRunner
 
 from src.agent.orchestrator import JeonWoochiAgent # CLI 테스트용
@@ -50,37 +56,54 @@ def load_markdown_knowledge(file_path: str) -> list[Document]:
         print(f"경고: '{file_path}' 파일이 없소. 빈 손으로 돌아갑니다.")
         return []
 
+def load_distill_cache() -> dict:
+    """원문 해시 -> 변환된 비급 본문 캐시를 읽소. 같은 기사를 밤마다 다시 변환하지 않기 위함이오."""
+    try:
+        with open(Config.DISTILL_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_distill_cache(cache: dict):
+    with open(Config.DISTILL_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
 def distill_knowledge(docs: list[Document]) -> list[Document]:
     """수집된 날것의 정보를 전우치의 말투와 비급서 형태로 변환하오."""
     from src.llm.client import SolarClient
     client = SolarClient(api_key=Config.SOLAR_API_KEY)
+    cache = load_distill_cache()
     
     distilled_docs = []
     print(f"--- [DISTILLATION] {len(docs)}개의 지식을 전우치 비급으로 변환 중 ---")
     
     for i, doc in enumerate(docs):
+        raw_key = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+        new_metadata = doc.metadata.copy()
+        new_metadata["distilled"] = True
+
+        # 이미 변환한 원문이면 같은 결과를 재사용하여 청크 ID가 바뀌지 않게 하오
+        if raw_key in cache:
+            distilled_docs.append(Document(page_content=cache[raw_key], metadata=new_metadata))
+            print(f"   [{i+1}/{len(docs)}] 변환 캐시 사용: {new_metadata.get('title', 'Unknown')}")
+            continue
+
         # 너무 긴 문서는 요약 및 변환
-        prompt = [
-            {"role": "system", "content": (
-                "당신은 조선의 도사 '전우치'이오. 아래 제공된 [Raw Data]를 읽고, "
-                "현대인들이 읽기 쉬운 '입문자용 명상/건강 비급' 형태로 재구성하시오. "
-                "말투는 반드시 '~하오', '~구려', '~소'와 같은 고풍스러운 도사 말투를 유지하고, "
-                "내용은 핵심 위주로 정리하여 '전우치의 비급'처럼 만드시오."
-            )},
-            {"role": "user", "content": f"[Raw Data]\n{doc.page_content}"}
-        ]
+        prompt = DISTILL.render(raw=doc.page_content)
         
         try:
             distilled_content = client.generate(prompt)
             # 메타데이터 유지 및 변환 표시
-            new_metadata = doc.metadata.copy()
-            new_metadata["distilled"] = True
             distilled_docs.append(Document(page_content=distilled_content, metadata=new_metadata))
+            # SolarClient는 API 오류를 안내 문구로 돌려주므로, 그런 결과는 캐시하지 않소
+            if not distilled_content.startswith("허허, 기운(API)"):
+                cache[raw_key] = distilled_content
             print(f"   [{i+1}/{len(docs)}] 변환 완료: {new_metadata.get('title', 'Unknown')}")
         except Exception as e:
             print(f"   [{i+1}/{len(docs)}] 변환 실패, 원본 유지: {e}")
             distilled_docs.append(doc)
             
+    save_distill_cache(cache)
     return distilled_docs
 
 def run_ingest(args):
@@ -116,8 +139,110 @@ def run_ingest(args):
     db_manager = VectorDBManager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
     collection_name = f"meditation_{args.strategy}"
     
-    db_manager.add_documents(chunks, collection_name=collection_name)
-    print(f"완료! '{collection_name}' 컬렉션과 BM25 인덱스에 저장되었소.")
+    def report_progress(done: int, total: int):
+        print(f"   [INGEST] 임베딩 진행: {done}/{total}")
+
+    # 바뀐 청크만 임베딩하고, 사라진 청크는 지워 컬렉션 크기를 일정하게 유지하오
+    summary = db_manager.sync_documents(chunks, collection_name=collection_name, progress_callback=report_progress)
+    # 키워드 검색용 BM25 인덱스를 디스크에 기록 (서버는 기동 시 이를 메모리 매핑으로 읽소)
+    db_manager.build_bm25_index(collection_name)
+    if db_manager.vector_backend(collection_name) == "numpy":
+        db_manager.build_numpy_store(collection_name)
+    print(f"완료! '{collection_name}' 컬렉션과 BM25 인덱스에 저장되었소. "
+          f"(추가 {summary['added']}, 갱신 {summary['updated']}, 삭제 {summary['removed']}, 유지 {summary['unchanged']})")
+
+    cache_stats = get_embedding_cache().stats()
+    print(f"   [EmbeddingCache] 적중 {cache_stats['hits']} / 미적중 {cache_stats['misses']} "
+          f"(저장 항목 {cache_stats['entries']}개)")
+
+def run_migrate(args):
+    """기존 Chroma 컬렉션의 임베딩을 NumPy 벡터 인덱스로 옮기오. (재임베딩 없음)"""
+    collection_name = f"meditation_{args.strategy}"
+    print(f"--- [MIGRATE MODE] '{collection_name}' -> NumPy 벡터 인덱스 ({args.dtype}) ---")
+
+    db_manager = VectorDBManager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
+    store = db_manager.build_numpy_store(collection_name, dtype=args.dtype)
+    if store is None:
+        print("옮길 지식이 하나도 없구려. 먼저 'python main.py ingest'를 실행하시오.")
+        return
+    print(f"완료! VECTOR_BACKENDS=\"{collection_name}=numpy\" 로 지정하면 이 인덱스로 검색하오.")
+
+def run_quant_report(args):
+    """저장 형식(float32/float16/int8)별 검색 재현율 손실과 메모리 절감을 비교하오."""
+    collection_name = f"meditation_{args.strategy}"
+    print(f"--- [QUANT REPORT] '{collection_name}' 벡터 압축 비교 ---")
+
+    db_manager = VectorDBManager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
+    collection = db_manager.client.get_collection(name=collection_name)
+    embeddings = collection.get(include=["embeddings"])["embeddings"]
+    if embeddings is None or not len(embeddings):
+        print("비교할 임베딩이 없구려. 먼저 'python main.py ingest'를 실행하시오.")
+        return
+
+    print(f"{'형식':<8} {'재채점':<6} {'recall@5':>9} {'상주 MB':>9} {'절감':>7}")
+    for row in quantization_report(embeddings, k=5, rescore_factor=Config.NUMPY_VECTOR_RESCORE_FACTOR):
+        print(f"{row['dtype']:<8} {'O' if row['rescore'] else 'X':<6} {row['recall_at_k']:>9.3f} "
+              f"{row['resident_mb']:>9.2f} {row['memory_saved']:>6.0%}")
+
+def run_rerank_bench(args):
+    """재순위기별 정밀도와 지연을 같은 후보 집합 위에서 비교하오. (LLM 호출 없음)
+
+    각 청크의 제목(# 줄, 없으면 첫 줄)을 질의로 삼고 그 청크를 정답으로 보는 자가 지도 평가요.
+    두 갈래 검색은 질의마다 한 번만 하고, 재순위기마다 융합 -> 재순위 -> 선택 단계만 잰다오.
+    """
+    import random
+    import time
+    import numpy as np
+    from src.retriever.dedup import content_key
+
+    collection_name = f"meditation_{args.strategy}"
+    print(f"--- [RERANK BENCH] '{collection_name}' 재순위기 비교 (후보 {Config.RERANK_CANDIDATES}개, "
+          f"예산 {Config.RERANK_BUDGET_MS:.0f}ms) ---")
+
+    db_manager = VectorDBManager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
+    texts = db_manager.client.get_collection(name=collection_name).get(include=["documents"])["documents"]
+    cases = []
+    for text in texts or []:
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        headings = [line.lstrip("#").strip() for line in lines if line.startswith("#")]
+        query = (headings or lines or [""])[0][:60]
+        if len(query) >= 4:
+            cases.append((query, content_key(text)))
+    if not cases:
+        print("비교할 청크가 없구려. 먼저 'python main.py ingest'를 실행하시오.")
+        return
+    random.Random(0).shuffle(cases)
+    cases = cases[:args.bench_size]
+    queries = [query for query, _ in cases]
+
+    base = HybridRetriever(db_manager=db_manager, collection_name=collection_name,
+                           candidate_k=Config.RERANK_CANDIDATES, reranker="none")
+    bm25_hits = base._bm25.batch_search_with_scores(queries)
+    vector_hits = base._search_vector_batch(queries)
+
+    print(f"{'재순위기':<14} {'hit@sel':>8} {'MRR':>6} {'문서 수':>7} {'글자 수':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    reported = set()
+    for name in ("none", "lexical", "cross-encoder"):
+        retriever = HybridRetriever(db_manager=db_manager, collection_name=collection_name,
+                                    candidate_k=Config.RERANK_CANDIDATES, reranker=name)
+        label = retriever.reranker.name if retriever.reranker is not None else "none"
+        if label in reported:  # 선택 패키지가 없어 다른 재순위기로 대신한 경우
+            continue
+        reported.add(label)
+        hits, reciprocal_ranks, n_docs, n_chars, latencies = 0, 0.0, [], [], []
+        for (query, answer_key), bm25_docs, vector_docs in zip(cases, bm25_hits, vector_hits):
+            t0 = time.perf_counter()
+            docs = retriever.merge(query, bm25_docs, vector_docs)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            keys = [content_key(doc.page_content) for doc in docs]
+            if answer_key in keys:
+                hits += 1
+                reciprocal_ranks += 1 / (keys.index(answer_key) + 1)
+            n_docs.append(len(docs))
+            n_chars.append(sum(len(doc.page_content) for doc in docs))
+        print(f"{label:<14} {hits / len(cases):>8.3f} {reciprocal_ranks / len(cases):>6.3f} "
+              f"{np.mean(n_docs):>7.2f} {np.mean(n_chars):>8.0f} "
+              f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f}")
 
 def run_eval(args):
     """[팀 C] LangSmith 정량 평가 모드 (Hybrid Retriever 사용)"""
@@ -185,8 +310,9 @@ def run_serve_cli(args):
                 print("전우치: 인연이 닿으면 또 보세.")
                 break
             
-            # 에이전트 답변 생성
-            response = agent.chat(user_input)
+            # 에이전트 답변 생성 (한 턴마다 로그 상관 ID를 새로 붙이오)
+            with request_context():
+                response = agent.chat(user_input)
             print(f"전우치: {response}")
             
     except Exception as e:
@@ -194,11 +320,15 @@ def run_serve_cli(args):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="환생한 전우치 명상 RAG 시스템 제어판")
-    parser.add_argument("mode", choices=["ingest", "eval", "serve"], help="실행 모드 (적재/평가/서비스)")
+    parser.add_argument("mode", choices=["ingest", "eval", "serve", "migrate", "quant-report", "rerank-bench"],
+                        help="실행 모드 (적재/평가/서비스/벡터 인덱스 이전/벡터 압축 비교/재순위기 비교)")
     parser.add_argument("--strategy", default="recursive", 
                         choices=["recursive", "semantic", "heading"], 
                         help="청킹 전략 선택 (실험용)")
     parser.add_argument("--interface", default="web", choices=["web", "cli"], help="[Serve 모드용] 인터페이스 선택")
+    parser.add_argument("--dtype", default=Config.NUMPY_VECTOR_DTYPE, choices=list(NumpyVectorStore.DTYPES),
+                        help="[Migrate 모드용] NumPy 벡터 저장 형식")
+    parser.add_argument("--bench-size", type=int, default=200, help="[Rerank-bench 모드용] 평가할 질의 수")
     
     args = parser.parse_args()
 
@@ -208,4 +338,10 @@ if __name__ == "__main__":
     elif args.mode == "eval":
         run_eval(args)
     elif args.mode == "serve":
-        run_serve(args)
\ No newline at end of file
+        run_serve(args)
+    elif args.mode == "migrate":
+        run_migrate(args)
+    elif args.mode == "quant-report":
+        run_quant_report(args)
+    elif args.mode == "rerank-bench":
+        run_rerank_bench(args)
\ No newline at end of file
@@ -1,4 +1,6 @@
-﻿from src.qa.engine import QAEngine
+﻿from typing import Optional
+
+from src.qa.engine import QAEngine
 
 
 class ConversationBufferMemory:
@@ -33,11 +35,11 @@ class JeonWoochiAgent:
         self.qa_engine = qa_engine # QA Engine을 도구로 보유
         self.memory = ConversationBufferMemory(memory_key="history", human_prefix="User", ai_prefix="전우치")
 
-    def chat(self, user_input: str) -> str:
-        """사용자 입력을 받아 QA Engine으로 답변 생성"""
+    def chat(self, user_input: str, filters: Optional[dict] = None, use_cache: bool = True) -> str:
+        """사용자 입력을 받아 QA Engine으로 답변 생성 (filters: 검색 범위 제한, use_cache: 답변 캐시 사용)"""
         try:
             # QA Engine을 통해 답변 생성
-            result = self.qa_engine.get_answer(user_input)
+            result = self.qa_engine.get_answer(user_input, filters=filters, use_cache=use_cache)
             answer = result.get("answer", "허허, 뭔가 이상한데?")
             
             # 메모리에 저장
@@ -47,12 +49,12 @@ class JeonWoochiAgent:
         except Exception as e:
             return f"오류: {str(e)}"
 
-    def chat_stream(self, user_input: str):
+    def chat_stream(self, user_input: str, filters: Optional[dict] = None, use_cache: bool = True):
         """사용자 입력을 받아 스트리밍으로 답변 생성"""
         try:
             # QA Engine의 스트리밍 답변 사용
             full_response = ""
-            for chunk in self.qa_engine.get_answer_stream(user_input):
+            for chunk in self.qa_engine.get_answer_stream(user_input, filters=filters, use_cache=use_cache):
                 full_response += chunk
                 yield chunk
             
@@ -61,3 +63,24 @@ class JeonWoochiAgent:
             
         except Exception as e:
             yield f"도술 실행 중 오류가 발생했소: {str(e)}"
+
+    async def achat(self, user_input: str, filters: Optional[dict] = None, use_cache: bool = True) -> str:
+        """chat의 비동기판 (FastAPI 이벤트 루프에서 사용)"""
+        try:
+            result = await self.qa_engine.aget_answer(user_input, filters=filters, use_cache=use_cache)
+            answer = result.get("answer", "허허, 뭔가 이상한데?")
+            self.memory.save_context({"input": user_input}, {"output": answer})
+            return answer
+        except Exception as e:
+            return f"오류: {str(e)}"
+
+    async def achat_stream(self, user_input: str, filters: Optional[dict] = None, use_cache: bool = True):
+        """chat_stream의 비동기판 (async 제너레이터)"""
+        try:
+            full_response = ""
+            async for chunk in self.qa_engine.astream_answer(user_input, filters=filters, use_cache=use_cache):
+                full_response += chunk
+                yield chunk
+            self.memory.save_context({"input": user_input}, {"output": full_response})
+        except Exception as e:
+            yield f"도술 실행 중 오류가 발생했소: {str(e)}"
@@ -1,20 +1,29 @@
-﻿from fastapi import FastAPI, HTTPException, Depends
+﻿from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
+import asyncio
 import os
+import threading
 from src.agent.orchestrator import JeonWoochiAgent
 from src.agent.persona_prompt import JeonWoochiPersona
-from src.vector_store.manager import VectorDBManager
+from src.vector_store.manager import get_shared_manager
 from src.retriever.hybrid_retriever import HybridRetriever
 from src.qa.engine import QAEngine
+from src.qa.answer_cache import get_answer_cache
+from src.qa.prompts import prompt_stats
+from src.qa.single_flight import get_single_flight
+from src.llm.transport import awarm_up, transport_stats, warm_up
 from src.config import Config
+from src.common.log import get_logger, request_context
 from src.db.base import engine, get_db, Base, SessionLocal
 from src.db.models import ChatSession, ChatMessage
 from sqlalchemy.orm import Session
 import uvicorn
 
+log = get_logger("api")
+
 # DB 테이블 생성
 Base.metadata.create_all(bind=engine)
 
@@ -35,22 +44,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def warm_up_transport():
+    """첫 사용자 요청이 TLS 연결 비용을 치르지 않게 Solar 연결을 미리 맺어 두오.
+
+    질의 임베딩은 동기 풀을, 답변 스트리밍은 서버 루프의 비동기 풀을 쓰므로 둘 다 예열하오.
+    """
+    if Config.HTTP_WARMUP:
+        await asyncio.gather(asyncio.to_thread(warm_up), awarm_up())
+
+@app.middleware("http")
+async def bind_request_id(request: Request, call_next):
+    """요청마다 상관 ID를 붙여 그 요청의 모든 로그에 남기오. (X-Request-ID 헤더가 오면 이어 쓰오)"""
+    with request_context(request.headers.get("x-request-id")) as request_id:
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 _agents = {}
+_agents_lock = threading.Lock()
 
 def get_agent(strategy: str = "recursive"):
-    if strategy not in _agents:
-        db_manager = VectorDBManager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
-        collection_name = f"meditation_{strategy}"
-        hybrid_retriever = HybridRetriever(db_manager=db_manager, collection_name=collection_name)
-        qa_engine = QAEngine(retriever=hybrid_retriever, api_key=Config.SOLAR_API_KEY)
-        persona = JeonWoochiPersona.SYSTEM_PROMPT
-        _agents[strategy] = JeonWoochiAgent(persona=persona, qa_engine=qa_engine)
-    return _agents[strategy]
+    agent = _agents.get(strategy)
+    if agent is None:
+        with _agents_lock:
+            if strategy not in _agents:
+                # 모든 전략이 하나의 매니저(Chroma 클라이언트, 임베딩 클라이언트, 캐시)를 공유하오
+                db_manager = get_shared_manager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
+                collection_name = f"meditation_{strategy}"
+                hybrid_retriever = HybridRetriever(db_manager=db_manager, collection_name=collection_name)
+                qa_engine = QAEngine(retriever=hybrid_retriever, api_key=Config.SOLAR_API_KEY)
+                persona = JeonWoochiPersona.SYSTEM_PROMPT
+                _agents[strategy] = JeonWoochiAgent(persona=persona, qa_engine=qa_engine)
+            agent = _agents[strategy]
+    return agent
+
+async def aget_agent(strategy: str = "recursive"):
+    """get_agent의 비동기판. 처음 만들 때는 Chroma 열기, BM25/NumPy 인덱스 적재(없으면 재구축)가
+    뒤따르므로 스레드에서 만들어 그동안 이벤트 루프가 다른 요청을 받게 하오."""
+    agent = _agents.get(strategy)
+    if agent is None:
+        agent = await asyncio.to_thread(get_agent, strategy)
+    return agent
 
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[int] = None
     strategy: Optional[str] = "recursive"
+    # 검색 범위 제한 (level/category/source). 예) {"level": "basic"}
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None
+    # True면 의미 기반 답변 캐시를 건너뛰고 새로 답하오
+    bypass_cache: bool = False
 
 class ChatResponse(BaseModel):
     response: str
@@ -68,6 +112,18 @@ class SessionRenameRequest(BaseModel):
 async def root():
     return {"status": "ok", "message": "JeonWoochi API is running"}
 
+@app.get("/metrics")
+async def metrics():
+    """검색 결과/질의 임베딩/문서 임베딩/답변 캐시의 적중률과 아낀 시간, 프롬프트 고정 머리 크기, 질문 합치기 현황, HTTP 연결 풀 사용률"""
+    db_manager = get_shared_manager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
+    stats = db_manager.cache_stats()
+    if Config.ANSWER_CACHE_ENABLED:
+        stats["answer"] = get_answer_cache().stats()
+    stats["prompts"] = prompt_stats()
+    stats["coalescing"] = get_single_flight().stats()
+    stats["http"] = transport_stats()
+    return stats
+
 @app.get("/sessions", response_model=List[SessionInfo])
 async def get_sessions(db: Session = Depends(get_db)):
     sessions = db.query(ChatSession).order_by(ChatSession.created_at.desc()).all()
@@ -95,8 +151,9 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
         user_msg = ChatMessage(session_id=session.id, role="user", content=request.message)
         db.add(user_msg)
         
-        agent = get_agent(request.strategy)
-        response = agent.chat(request.message)
+        agent = await aget_agent(request.strategy)
+        response = await agent.achat(request.message, filters=request.filters,
+                                    use_cache=not request.bypass_cache)
         
         assistant_msg = ChatMessage(session_id=session.id, role="assistant", content=response)
         db.add(assistant_msg)
@@ -127,20 +184,21 @@ async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
         db.add(user_msg)
         db.commit()
 
-        agent = get_agent(request.strategy)
+        agent = await aget_agent(request.strategy)
 
         async def event_generator():
             full_response = ""
             yield f"SESSION_ID:{session_id}\n"
             
             try:
-                for chunk in agent.chat_stream(request.message):
+                async for chunk in agent.achat_stream(request.message, filters=request.filters,
+                                                      use_cache=not request.bypass_cache):
                     if chunk:  # 빈 청크 필터링
                         full_response += chunk
                         # 각 청크를 UTF-8로 인코딩하여 전송
                         yield chunk.encode('utf-8').decode('utf-8')
             except Exception as e:
-                print(f"Stream error: {e}")
+                log.exception("Stream error: %s", e)
                 yield f"\n[오류] 스트리밍 중 문제 발생: {str(e)}"
             
             try:
@@ -149,12 +207,12 @@ async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
                     save_db.add(assistant_msg)
                     save_db.commit()
             except Exception as e:
-                print(f"Error saving message: {e}")
+                log.error("Error saving message: %s", e)
 
         return StreamingResponse(event_generator(), media_type="text/plain; charset=utf-8")
 
     except Exception as e:
-        print(f"Chat stream error: {str(e)}")
+        log.exception("Chat stream error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """스레드 안전한 LRU + TTL 메모리 캐시
+
+    max_entries를 넘으면 가장 오래 쓰이지 않은 항목을 버리고,
+    ttl_seconds가 지난 항목은 조회 시점에 만료 처리하오.
+    set 때 계산 비용(cost, 초)을 함께 넘기면 적중할 때마다 아낀 시간(saved_seconds)을 쌓소.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._items = OrderedDict()  # key -> (만료 시각, 값, 계산 비용)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires_at, value, cost = item
+                if expires_at > time.monotonic():
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += cost
+                    return value
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, cost: float = 0.0):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_seconds, value, cost)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._items),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "saved_seconds": self.saved_seconds,
+        }
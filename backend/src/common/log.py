@@ -0,0 +1,115 @@
+import contextvars
+import json
+import logging
+import random
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+
+from src.config import Config
+
+ROOT_LOGGER = "jeon_woochi"
+
+# 요청 단위 상관 ID. asyncio 작업은 만들어질 때의 값을 물려받소
+_request_id = contextvars.ContextVar("request_id", default="-")
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def request_context(request_id: str = None):
+    """with 블록 안의 로그에 상관 ID를 붙이오. (없으면 새로 만드오)"""
+    token = _request_id.set(request_id or new_request_id())
+    try:
+        yield _request_id.get()
+    finally:
+        _request_id.reset(token)
+
+
+def fields(**values) -> dict:
+    """구조화 필드를 logging의 extra로 넘기는 꼴로 만드오. 예) log.info("완료", extra=fields(ms=12))"""
+    return {"fields": values}
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _TextFormatter(logging.Formatter):
+    """사람이 읽는 한 줄 형식 (구조화 필드는 key=value로 뒤에 붙임)"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-5s [%(name)s] (%(request_id)s) %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = getattr(record, "fields", None)
+        if extra:
+            line += " " + " ".join(f"{key}={value}" for key, value in extra.items())
+        return line
+
+
+class _JsonFormatter(logging.Formatter):
+    """로그 수집기용 한 줄 JSON 형식"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """프로젝트 로거(jeon_woochi)에 처리기를 한 번만 다오. (get_logger가 알아서 부르오)"""
+    global _configured
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(level or Config.LOG_LEVEL)
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.addFilter(_RequestIdFilter())
+        handler.setFormatter(_JsonFormatter() if (fmt or Config.LOG_FORMAT) == "json" else _TextFormatter())
+        root.addHandler(handler)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """jeon_woochi.<name> 로거를 반환하오.
+
+    메시지는 f-string 대신 %-인자로 넘기시오. 수준이 꺼져 있으면 문자열을 만들지 않소.
+    """
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def chunk_log_interval(logger: logging.Logger) -> int:
+    """이번 요청에서 청크 단위 DEBUG 로그를 몇 청크마다 남길지 (0이면 남기지 않음)
+
+    DEBUG가 꺼져 있거나 표본(LOG_CHUNK_SAMPLE_RATE)에 들지 않으면 0이므로,
+    스트리밍 루프는 정수 하나만 확인하고 아무 문자열도 만들지 않소.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= Config.LOG_CHUNK_SAMPLE_RATE:
+        return 0
+    return max(Config.LOG_CHUNK_EVERY, 1)
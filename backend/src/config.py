@@ -12,4 +12,118 @@ class Config:
     # [▼ 새로 추가해야 할 부분]
     # 청킹(Chunking) 설정
     CHUNK_SIZE = 500       # 문서를 500자 단위로 자름
-    CHUNK_OVERLAP = 50     # 문맥 유지를 위해 50자씩 겹치게 자름
\ No newline at end of file
+    CHUNK_OVERLAP = 50     # 문맥 유지를 위해 50자씩 겹치게 자름
+
+    # 임베딩 배치 적재 설정 (Upstage 임베딩 API는 요청당 최대 100개 입력)
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+    EMBED_BATCH_MAX_CHARS = int(os.getenv("EMBED_BATCH_MAX_CHARS", "150000"))
+    EMBED_MAX_WORKERS = int(os.getenv("EMBED_MAX_WORKERS", "4"))
+    EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+
+    # 디스크 임베딩 캐시 (모델명 + 텍스트 해시 기준)
+    EMBEDDING_CACHE_PATH = os.getenv(
+        "EMBEDDING_CACHE_PATH",
+        os.path.join(os.path.dirname(DB_PATH), "embedding_cache.sqlite3")
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+    # 크롤링 기사 변환(Distillation) 결과 캐시 - 원문이 같으면 LLM을 다시 부르지 않음
+    DISTILL_CACHE_PATH = os.getenv(
+        "DISTILL_CACHE_PATH",
+        os.path.join(os.path.dirname(DB_PATH), "distill_cache.json")
+    )
+
+    # 질의 임베딩 메모리 캐시 (같은 질문의 임베딩 왕복을 생략)
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "2048"))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+
+    # BM25 토크나이저 ("ko-ngram": 조사 제거 + 문자 bigram, "kiwi": 형태소 분석, "whitespace": 공백 분리)
+    BM25_TOKENIZER = os.getenv("BM25_TOKENIZER", "ko-ngram")
+
+    # 벡터 검색 백엔드 ("chroma" 또는 "numpy"). 컬렉션별로 다르게 쓰려면
+    # VECTOR_BACKENDS="meditation_recursive=numpy,meditation_semantic=chroma" 형식으로 지정
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    VECTOR_BACKENDS = dict(
+        item.split("=", 1) for item in os.getenv("VECTOR_BACKENDS", "").split(",") if "=" in item
+    )
+    NUMPY_VECTOR_DTYPE = os.getenv("NUMPY_VECTOR_DTYPE", "float32")  # float32 / float16 / int8
+    # 압축 형식일 때 float32 원본으로 상위 (k * 배수)개 후보를 재채점 (끄면 원본을 저장하지 않아 디스크도 절약)
+    NUMPY_VECTOR_RESCORE = os.getenv("NUMPY_VECTOR_RESCORE", "true").lower() == "true"
+    NUMPY_VECTOR_RESCORE_FACTOR = int(os.getenv("NUMPY_VECTOR_RESCORE_FACTOR", "4"))
+
+    # 임베딩 제공자 ("upstage": Solar 임베딩 API, "hashing": 오프라인 결정적 해시 임베딩)
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "upstage")
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))  # hashing 제공자의 차원
+
+    # 하이브리드 검색: BM25/벡터 두 갈래를 공유 스레드 풀에서 동시에 돌리오
+    RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", "8"))
+    # 갈래별 제한 시간(초). 벡터 갈래가 늦으면 BM25 결과만으로 답하오
+    RETRIEVAL_LEG_TIMEOUT = float(os.getenv("RETRIEVAL_LEG_TIMEOUT", "5.0"))
+
+    # 검색 결과 캐시 (정규화한 질의 + 컬렉션 + k + 필터 + 컬렉션 버전 기준, 적재하면 버전이 올라 무효화됨)
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))
+    RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "600"))
+
+    # 의미 기반 답변 캐시 (비슷한 질문에 이미 만든 답을 재사용하여 LLM 호출을 생략)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_PATH = os.getenv(
+        "ANSWER_CACHE_PATH",
+        os.path.join(os.path.dirname(DB_PATH), "answer_cache.sqlite3")
+    )
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # 질문 코사인 유사도
+    # 이번 검색 결과와 캐시된 답의 근거 청크가 이만큼(Jaccard) 겹쳐야 재사용하오
+    # (기본 1.0: 근거가 똑같을 때만. 낮추면 다른 근거로 만든 답을 돌려줄 수 있소)
+    ANSWER_CACHE_MIN_SOURCE_OVERLAP = float(os.getenv("ANSWER_CACHE_MIN_SOURCE_OVERLAP", "1.0"))
+
+    # 하이브리드 병합 시 중복 청크 제거: 본문 해시가 같거나, 문자 shingle MinHash로 추정한
+    # Jaccard 유사도가 이 값 이상이면 뒤쪽(순위 낮은) 청크를 버리오. (1.0이면 완전 중복만 제거)
+    DEDUP_NEAR_THRESHOLD = float(os.getenv("DEDUP_NEAR_THRESHOLD", "0.8"))
+    DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))
+
+    # 하이브리드 검색 결과 융합 ("minmax": 갈래별 점수 정규화 후 가중합, "rrf": 순위 역수 가중합)
+    FUSION_METHOD = os.getenv("FUSION_METHOD", "minmax")
+    FUSION_CANDIDATES = int(os.getenv("FUSION_CANDIDATES", "8"))    # 갈래별로 가져올 후보 수
+    # 갈래별 융합 가중치 (BM25, 벡터) - 예: "0.7,0.3"
+    FUSION_WEIGHTS = tuple(float(w) for w in os.getenv("FUSION_WEIGHTS", "0.7,0.3").split(","))
+    FUSION_MIN_K = int(os.getenv("FUSION_MIN_K", "1"))
+    FUSION_MAX_K = int(os.getenv("FUSION_MAX_K", "6"))
+    # 적응형 k: 앞 문서 대비 점수가 이 비율 아래로 떨어지거나(절벽), 1위 대비 이 비율 아래면 멈추오
+    FUSION_CLIFF_RATIO = float(os.getenv("FUSION_CLIFF_RATIO", "0.5"))
+    FUSION_MIN_RELATIVE_SCORE = float(os.getenv("FUSION_MIN_RELATIVE_SCORE", "0.25"))
+    FUSION_CHAR_BUDGET = int(os.getenv("FUSION_CHAR_BUDGET", "3000"))  # 컨텍스트로 보낼 본문 총 글자 수
+
+    # 2단계 재순위 ("none": 사용 안 함, "lexical": 질의어 포함/근접도, "cross-encoder": CPU 교차 인코더)
+    RERANKER = os.getenv("RERANKER", "none")
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))   # 갈래별로 넓게 가져올 후보 수
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+    RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))  # 요청당 재순위 시간 예산
+    RERANK_CROSS_ENCODER_MODEL = os.getenv(
+        "RERANK_CROSS_ENCODER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    )
+
+    # 답변 컨텍스트 토큰 예산 (관련도 순으로 청크를 채우고, 넘치는 청크는 문장 경계에서 자름)
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+    CONTEXT_MIN_TRIM_TOKENS = int(os.getenv("CONTEXT_MIN_TRIM_TOKENS", "48"))  # 이보다 적게 남으면 자르지 않고 멈춤
+    CONTEXT_TOKEN_ENCODING = os.getenv("CONTEXT_TOKEN_ENCODING", "cl100k_base")  # tiktoken 인코딩
+
+    # 공급자 프롬프트 접두 캐시가 걸리는 최소 고정 머리 길이 (토큰) - 프롬프트 크기 보고용
+    PROMPT_PREFIX_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_PREFIX_CACHE_MIN_TOKENS", "1024"))
+
+    # 같은 질문이 동시에 여럿 들어오면 검색/생성을 한 번만 하고 결과를 나눠 줌 (single-flight)
+    QA_COALESCE_ENABLED = os.getenv("QA_COALESCE_ENABLED", "true").lower() == "true"
+
+    # 로그 (DEBUG/INFO/WARNING/ERROR, 형식 text/json)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+    LOG_CHUNK_SAMPLE_RATE = float(os.getenv("LOG_CHUNK_SAMPLE_RATE", "0.1"))  # 청크 단위 DEBUG 로그를 남길 요청 비율
+    LOG_CHUNK_EVERY = int(os.getenv("LOG_CHUNK_EVERY", "10"))                 # 그 요청에서 몇 청크마다 남길지
+
+    # Solar(채팅/임베딩) 공용 HTTP 연결 풀
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))        # 놀고 있어도 붙잡아 둘 연결 수
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))  # 노는 연결을 닫기까지 (초)
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+    HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "false").lower() == "true"        # h2 패키지가 있어야 하오
+    HTTP_WARMUP = os.getenv("HTTP_WARMUP", "true").lower() == "true"       # 서버 시작 때 연결을 미리 맺음
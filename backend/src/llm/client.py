@@ -1,6 +1,13 @@
-﻿from openai import OpenAI
+﻿import asyncio
+import weakref
+from openai import AsyncOpenAI, OpenAI
 from abc import ABC, abstractmethod
 
+from src.common.log import chunk_log_interval, fields, get_logger
+from src.llm.transport import get_async_http_client, get_http_client, http_timeout
+
+log = get_logger("llm")
+
 class BaseLLMClient(ABC):
     @abstractmethod
     def generate(self, messages: list) -> str:
@@ -10,37 +17,72 @@ class BaseLLMClient(ABC):
     def stream_generate(self, messages: list):
         pass
 
+    @abstractmethod
+    async def agenerate(self, messages: list) -> str:
+        pass
+
+    @abstractmethod
+    def astream_generate(self, messages: list):
+        """async 제너레이터를 반환하오."""
+        pass
+
 class SolarClient(BaseLLMClient):
     """Upstage Solar Pro2 전용 클라이언트"""
+    BASE_URL = "https://api.upstage.ai/v1/solar"
+
     def __init__(self, api_key: str):
+        # 연결 풀은 프로세스 전체(모든 SolarClient와 임베딩)가 함께 쓰오. 클라이언트를 새로 만들어도 연결은 재사용되오
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://api.upstage.ai/v1/solar"
+            base_url=self.BASE_URL,
+            http_client=get_http_client(),
+            timeout=http_timeout()
         )
+        self.api_key = api_key
+        self._async_clients = weakref.WeakKeyDictionary()  # 이벤트 루프 -> AsyncOpenAI
         self.model = "solar-pro"
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """비동기 경로(FastAPI)용 클라이언트. 응답을 기다리는 동안 이벤트 루프를 막지 않소
+
+        비동기 연결 풀은 이벤트 루프에 묶이므로 지금 도는 루프의 공유 풀로 루프마다 하나씩 만드오.
+        (에이전트를 루프 밖 스레드에서 만들어도, 루프가 여럿이어도 안전하오)
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.BASE_URL,
+                http_client=get_async_http_client(),
+                timeout=http_timeout()
+            )
+            self._async_clients[loop] = client
+        return client
+
     def generate(self, messages: list) -> str:
         try:
-            print(f"   [LLM] Solar API 호출 중... (메시지: {len(messages)}개)")
+            log.debug("Solar API 호출 (메시지 %d개)", len(messages))
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=0.7
             )
             result = response.choices[0].message.content
-            print(f"   [LLM] 응답 받음: {len(result)}자")
+            log.info("응답 받음", extra=fields(chars=len(result)))
             return result
         except Exception as e:
-            print(f"   [LLM] API 오류: {str(e)}")
+            log.error("API 오류: %s", e)
             return f"허허, 기운(API)이 원활하지 않구려: {str(e)}"
 
     def stream_generate(self, messages: list):
         """스트리밍 응답 생성을 위한 제너레이터"""
         try:
-            print(f"   [LLM] Solar API 스트리밍 호출 중... (메시지: {len(messages)}개)")
-            print(f"   [LLM] 시스템 메시지: {messages[0]['content'][:100]}...")
-            print(f"   [LLM] 사용자 메시지 길이: {len(messages[-1]['content'])}자")
-            
+            log.debug("Solar API 스트리밍 호출 (메시지 %d개, 사용자 메시지 %d자)",
+                      len(messages), len(messages[-1]["content"]))
+            every = chunk_log_interval(log)
+
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
@@ -56,16 +98,57 @@ class SolarClient(BaseLLMClient):
                         delta = chunk.choices[0].delta
                         if delta and hasattr(delta, 'content') and delta.content:
                             content = delta.content
-                            if chunk_index <= 5:
-                                print(f"   [LLM] 첫 청크: {repr(content[:50])}")
+                            if every and chunk_index % every == 0:
+                                log.debug("청크 %d: %r", chunk_index, content[:50])
                             yield content
                 except Exception as chunk_error:
-                    print(f"   [LLM] 청크 {chunk_index} 처리 오류: {str(chunk_error)}")
+                    log.warning("청크 %d 처리 오류: %s", chunk_index, chunk_error)
                     continue
-            
-            print(f"   [LLM] 스트리밍 완료. 총 {chunk_index}개 청크")
+
+            log.info("스트리밍 완료", extra=fields(chunks=chunk_index))
+        except Exception as e:
+            log.exception("API 스트리밍 오류: %s", e)
+            yield f"\n허허, 기운(API)이 갑자기 끊겼구려: {str(e)}"
+
+    async def agenerate(self, messages: list) -> str:
+        """generate의 비동기판"""
+        try:
+            log.debug("Solar API 비동기 호출 (메시지 %d개)", len(messages))
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7
+            )
+            result = response.choices[0].message.content
+            log.info("응답 받음", extra=fields(chars=len(result)))
+            return result
+        except Exception as e:
+            log.error("API 오류: %s", e)
+            return f"허허, 기운(API)이 원활하지 않구려: {str(e)}"
+
+    async def astream_generate(self, messages: list):
+        """stream_generate의 비동기판 (async 제너레이터)"""
+        try:
+            log.debug("Solar API 비동기 스트리밍 호출 (메시지 %d개)", len(messages))
+            every = chunk_log_interval(log)
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                stream=True
+            )
+
+            chunk_index = 0
+            async for chunk in response:
+                chunk_index += 1
+                if chunk.choices:
+                    delta = chunk.choices[0].delta
+                    if delta and getattr(delta, 'content', None):
+                        if every and chunk_index % every == 0:
+                            log.debug("청크 %d: %r", chunk_index, delta.content[:50])
+                        yield delta.content
+
+            log.info("비동기 스트리밍 완료", extra=fields(chunks=chunk_index))
         except Exception as e:
-            print(f"   [LLM] API 스트리밍 오류: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("API 스트리밍 오류: %s", e)
             yield f"\n허허, 기운(API)이 갑자기 끊겼구려: {str(e)}"
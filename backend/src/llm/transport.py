@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import httpx
+
+from src.common.log import get_logger
+from src.config import Config
+
+log = get_logger("llm.transport")
+
+SOLAR_BASE_URL = "https://api.upstage.ai/v1"
+
+
+class _PoolCounters:
+    """연결 풀을 지나는 요청 수 (응답 헤더를 받을 때까지를 진행 중으로 셈)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, failed: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += failed
+
+
+def _pool_snapshot(transport) -> dict:
+    """httpcore 풀의 열린/노는 연결 수 (내부 속성이라 없으면 빈 값으로 두오)"""
+    connections = list(getattr(getattr(transport, "_pool", None), "connections", []) or [])
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {"connections": len(connections), "idle_connections": idle}
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    def __init__(self, counters: _PoolCounters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.counters.started()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = False
+            return response
+        finally:
+            self.counters.finished(failed)
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, counters: _PoolCounters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.counters.started()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = False
+            return response
+        finally:
+            self.counters.finished(failed)
+
+
+def _http2_enabled() -> bool:
+    if not Config.HTTP_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  (httpx의 HTTP/2 지원은 선택 의존성이오)
+        return True
+    except ImportError:
+        log.warning("HTTP_HTTP2가 켜져 있으나 h2 패키지가 없어 HTTP/1.1로 연결하오. (pip install httpx[http2])")
+        return False
+
+
+def http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+
+
+def _transport_kwargs() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": _http2_enabled(),
+    }
+
+
+_sync_counters = _PoolCounters()
+_async_counters = _PoolCounters()
+_http_client = None
+# httpx.AsyncClient의 연결은 만든 이벤트 루프에 묶이므로 루프마다 하나씩 두오 (루프가 사라지면 함께 버림)
+_async_http_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """프로세스 전체에서 공유하는 동기 httpx 클라이언트 (Solar 채팅/임베딩 공용 연결 풀)"""
+    global _http_client
+    if _http_client is None:
+        with _clients_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    transport=_CountingTransport(_sync_counters, **_transport_kwargs()),
+                    timeout=http_timeout(),
+                )
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """지금 도는 이벤트 루프에서 공유하는 비동기 httpx 클라이언트
+
+    비동기 연결은 만든 루프 밖에서 쓸 수 없으므로 루프마다 따로 만들고, 같은 루프의 모든
+    요청(Solar 채팅 등)이 그 연결 풀을 함께 쓰오. 도는 루프가 없으면 RuntimeError를 내오.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        with _clients_lock:
+            client = _async_http_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    transport=_AsyncCountingTransport(_async_counters, **_transport_kwargs()),
+                    timeout=http_timeout(),
+                )
+                _async_http_clients[loop] = client
+    return client
+
+
+def _warmup_request(api_key: str) -> tuple:
+    return f"{SOLAR_BASE_URL}/models", {"Authorization": f"Bearer {api_key or Config.SOLAR_API_KEY}"}
+
+
+def warm_up(api_key: str = None) -> bool:
+    """Solar 서버에 가벼운 요청 하나를 보내 TLS 연결을 미리 맺어 두오. (응답 코드는 가리지 않음)"""
+    url, headers = _warmup_request(api_key)
+    started = time.perf_counter()
+    try:
+        response = get_http_client().get(url, headers=headers, timeout=Config.HTTP_CONNECT_TIMEOUT * 2)
+        log.info("연결 예열 완료 (HTTP %d, %.0fms, %s)", response.status_code,
+                 (time.perf_counter() - started) * 1000, response.http_version)
+        return True
+    except httpx.HTTPError as e:
+        log.warning("연결 예열 실패: %s", e)
+        return False
+
+
+async def awarm_up(api_key: str = None) -> bool:
+    """warm_up의 비동기판 (서버 루프의 연결 풀을 예열)"""
+    url, headers = _warmup_request(api_key)
+    started = time.perf_counter()
+    try:
+        response = await get_async_http_client().get(url, headers=headers, timeout=Config.HTTP_CONNECT_TIMEOUT * 2)
+        log.info("비동기 연결 예열 완료 (HTTP %d, %.0fms, %s)", response.status_code,
+                 (time.perf_counter() - started) * 1000, response.http_version)
+        return True
+    except httpx.HTTPError as e:
+        log.warning("비동기 연결 예열 실패: %s", e)
+        return False
+
+
+def transport_stats() -> dict:
+    """공유 연결 풀의 사용률 (/metrics용)"""
+    stats = {}
+    async_clients = list(_async_http_clients.values())
+    for name, clients, counters in (("sync", [_http_client] if _http_client else [], _sync_counters),
+                                    ("async", async_clients, _async_counters)):
+        entry = {
+            "requests": counters.requests,
+            "errors": counters.errors,
+            "in_flight": counters.in_flight,
+            "peak_in_flight": counters.peak_in_flight,
+            "max_connections": Config.HTTP_MAX_CONNECTIONS,
+            "utilization": counters.in_flight / Config.HTTP_MAX_CONNECTIONS,
+        }
+        if clients:
+            snapshots = [_pool_snapshot(client._transport) for client in clients]
+            entry["connections"] = sum(snapshot["connections"] for snapshot in snapshots)
+            entry["idle_connections"] = sum(snapshot["idle_connections"] for snapshot in snapshots)
+        stats[name] = entry
+    stats["async"]["event_loops"] = len(async_clients)
+    return stats
@@ -1,17 +1,19 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_experimental.text_splitter import SemanticChunker
-from langchain_upstage import UpstageEmbeddings # 2026년 기준 최신 라이브러리 활용
 from src.config import Config
+from src.vector_store.embedding_cache import CachedEmbeddings, get_embedding_cache
+from src.vector_store.embedding_provider import get_embedding_provider
 
 class ChunkerFactory:
     """전략별 청커를 생성하는 공장 클래스"""
     
     @staticmethod
     def get_chunker(strategy: str):
-        # Solar 임베딩 모델 설정 (Semantic 전략용)
-        embeddings = UpstageEmbeddings(
-            api_key=Config.SOLAR_API_KEY, 
-            model="embedding-query"
+        # 임베딩 모델 설정 (Semantic 전략용, 기본: Solar 임베딩)
+        # 문장 임베딩은 디스크 캐시를 거쳐 재적재 시 다시 계산하지 않소
+        embeddings = CachedEmbeddings(
+            get_embedding_provider(api_key=Config.SOLAR_API_KEY),
+            get_embedding_cache()
         )
 
         if strategy == "recursive":
@@ -0,0 +1,140 @@
+import re
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Tuple
+
+from src.common.log import get_logger
+from src.config import Config
+
+log = get_logger("processor.tokenizer")
+
+
+class BaseTokenizer(ABC):
+    """BM25 색인/검색에 쓰는 토크나이저의 공통 규격
+
+    색인 시점과 질의 시점에 같은 토크나이저를 써야 하므로, name을 인덱스에 함께 기록하오.
+    """
+
+    name = "base"
+
+    def __init__(self, query_cache_size: int = 4096):
+        # 자주 들어오는 질의는 토큰화 결과를 메모이즈하오
+        self._tokenize_query = lru_cache(maxsize=query_cache_size)(self._tokenize_tuple)
+
+    @abstractmethod
+    def tokenize(self, text: str) -> List[str]:
+        pass
+
+    def _tokenize_tuple(self, text: str) -> Tuple[str, ...]:
+        return tuple(self.tokenize(text))
+
+    def tokenize_query(self, text: str) -> Tuple[str, ...]:
+        """질의 토큰화 (메모이즈된 경로)"""
+        return self._tokenize_query(text)
+
+
+class WhitespaceTokenizer(BaseTokenizer):
+    """공백 기준 분리 (이전 동작과 동일)"""
+
+    name = "whitespace"
+
+    def tokenize(self, text: str) -> List[str]:
+        return text.split()
+
+
+class KoreanNgramTokenizer(BaseTokenizer):
+    """외부 의존성 없는 기본 한국어 토크나이저
+
+    어절 끝의 조사·어미를 떼어 낸 어간과, 어간의 문자 bigram을 함께 토큰으로 내보내오.
+    예) "호흡법을" -> ["호흡법", "호흡", "흡법"] 이므로 "호흡법", "호흡" 질의 모두 걸리오.
+    """
+
+    name = "ko-ngram"
+
+    # 긴 것부터 맞춰 보아야 "으로"가 "로"보다 먼저 떨어지오
+    SUFFIXES = sorted([
+        "은", "는", "이", "가", "을", "를", "에", "의", "도", "만", "와", "과", "로", "으로",
+        "에서", "에게", "께서", "한테", "부터", "까지", "처럼", "보다", "이나", "나", "이란", "란",
+        "이라", "라", "이다", "입니다", "에는", "에서는", "으로는", "로는", "과의", "와의", "이며",
+        "하는", "하고", "하면", "하여", "해서", "하기", "하게", "한다", "합니다", "했다", "되는", "된다",
+    ], key=len, reverse=True)
+    WORD_PATTERN = re.compile(r"[가-힣]+|[a-z]+|[0-9]+")
+    HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+    def __init__(self, ngram: int = 2, **kwargs):
+        super().__init__(**kwargs)
+        self.ngram = ngram
+
+    def strip_suffix(self, word: str) -> str:
+        for suffix in self.SUFFIXES:
+            # 어간이 한 글자만 남을 정도로 자르지는 않소 (예: "나이" -> "나" 방지)
+            if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+                return word[:-len(suffix)]
+        return word
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens = []
+        for word in self.WORD_PATTERN.findall(text.lower()):
+            if not self.HANGUL_PATTERN.match(word):
+                tokens.append(word)
+                continue
+            stem = self.strip_suffix(word)
+            tokens.append(stem)
+            if len(stem) > self.ngram:
+                tokens.extend(stem[i:i + self.ngram] for i in range(len(stem) - self.ngram + 1))
+        return tokens
+
+
+class KiwiTokenizer(BaseTokenizer):
+    """kiwipiepy 형태소 분석 기반 토크나이저 (선택 설치)
+
+    체언·용언 어간·외국어·숫자 형태소만 남기오.
+    """
+
+    name = "kiwi"
+    KEEP_TAGS = ("NNG", "NNP", "NNB", "NR", "NP", "VV", "VA", "XR", "SL", "SN", "SH")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        from kiwipiepy import Kiwi  # 선택 의존성이므로 사용할 때만 불러오오
+        self.kiwi = Kiwi()
+        self._lock = threading.Lock()
+
+    def tokenize(self, text: str) -> List[str]:
+        with self._lock:
+            morphs = self.kiwi.tokenize(text)
+        return [m.form.lower() for m in morphs if m.tag.startswith(self.KEEP_TAGS)]
+
+
+TOKENIZERS = {
+    WhitespaceTokenizer.name: WhitespaceTokenizer,
+    KoreanNgramTokenizer.name: KoreanNgramTokenizer,
+    KiwiTokenizer.name: KiwiTokenizer,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_tokenizer(name: str = None) -> BaseTokenizer:
+    """이름으로 토크나이저를 반환하오. 같은 이름이면 프로세스 안에서 한 인스턴스를 공유하오.
+
+    선택 백엔드가 설치되어 있지 않으면 기본 토크나이저로 대신하오.
+    인덱스에는 실제로 쓰인 토크나이저의 name이 기록되오.
+    """
+    name = name or Config.BM25_TOKENIZER
+    if name not in TOKENIZERS:
+        raise ValueError(f"허허, '{name}'는 아직 연마하지 못한 토크나이저요.")
+
+    with _instances_lock:
+        if name not in _instances:
+            try:
+                _instances[name] = TOKENIZERS[name]()
+            except ImportError as e:
+                log.warning("[Tokenizer] '%s' 백엔드를 쓸 수 없어 '%s'로 대신하오: %s",
+                            name, KoreanNgramTokenizer.name, e)
+                if KoreanNgramTokenizer.name not in _instances:
+                    _instances[KoreanNgramTokenizer.name] = KoreanNgramTokenizer()
+                _instances[name] = _instances[KoreanNgramTokenizer.name]
+        return _instances[name]
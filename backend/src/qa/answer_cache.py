@@ -0,0 +1,208 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from src.config import Config
+
+
+class SemanticAnswerCache:
+    """질문 임베딩 유사도로 이전 답변을 찾아 주는 디스크 답변 캐시
+
+    항목마다 질문 임베딩(정규화 float32), 답변, 출처, 근거 청크 해시, 컬렉션 버전을 SQLite에 두고,
+    검색용 임베딩 행렬은 범위(컬렉션/임베딩 모델/필터/답변 모델/프롬프트 머리)별로 메모리에 올려
+    내적 한 번으로 찾소. (답변 모델이나 페르소나 프롬프트가 바뀌면 옛 답은 다른 범위가 되오)
+
+    재사용 조건:
+        1) 같은 범위에서 질문 유사도가 threshold 이상
+        2) 답을 만들 때의 컬렉션 버전이 지금과 같음 (적재 후 옛 답은 쓰지 않음)
+        3) 이번 검색 결과와 근거 청크가 min_source_overlap 이상 겹침
+
+    항목 수가 max_entries를 넘으면 가장 오래 쓰이지 않은 항목부터 지우오.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None, threshold: float = None,
+                 min_source_overlap: float = None):
+        self.path = path or Config.ANSWER_CACHE_PATH
+        self.max_entries = max_entries or Config.ANSWER_CACHE_MAX_ENTRIES
+        self.threshold = Config.ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.min_source_overlap = (Config.ANSWER_CACHE_MIN_SOURCE_OVERLAP
+                                   if min_source_overlap is None else min_source_overlap)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " scope TEXT NOT NULL,"
+            " index_version INTEGER NOT NULL,"
+            " question TEXT NOT NULL,"
+            " embedding BLOB NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " sources TEXT NOT NULL,"
+            " source_keys TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_scope ON answers(scope)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers(last_used)")
+        self._conn.commit()
+        self._scopes = {}  # scope -> (id 배열, 컬렉션 버전 배열, 임베딩 행렬)
+        self._load()
+
+    @staticmethod
+    def scope_key(collection: str, model: str, filters: tuple = (),
+                  chat_model: str = "", prompt_hash: str = "") -> str:
+        return json.dumps([collection, model, filters, chat_model, prompt_hash], ensure_ascii=False)
+
+    @staticmethod
+    def source_keys(docs) -> List[str]:
+        """근거 청크를 본문 해시로 나타내오."""
+        return sorted({hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest() for doc in docs})
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load(self):
+        rows = self._conn.execute("SELECT id, scope, index_version, embedding FROM answers ORDER BY id").fetchall()
+        grouped = {}
+        for entry_id, scope, version, blob in rows:
+            grouped.setdefault(scope, []).append((entry_id, version, np.frombuffer(blob, dtype=np.float32)))
+        self._scopes = {
+            scope: (
+                np.asarray([e[0] for e in entries], dtype=np.int64),
+                np.asarray([e[1] for e in entries], dtype=np.int64),
+                np.vstack([e[2] for e in entries]),
+            )
+            for scope, entries in grouped.items()
+        }
+
+    def lookup(self, scope: str, index_version: int, embedding, source_keys: List[str]) -> Optional[dict]:
+        """재사용할 수 있는 가장 비슷한 답변을 반환하오. 없으면 None이오."""
+        with self._lock:
+            entry = self._scopes.get(scope)
+            best = None
+            if entry is not None:
+                ids, versions, matrix = entry
+                if matrix.shape[1] == len(embedding):
+                    scores = matrix @ self._normalize(embedding)
+                    # 유사도가 높은 순으로 조건(버전, 근거 겹침)을 만족하는 첫 항목을 고르오
+                    for i in np.argsort(-scores):
+                        if scores[i] < self.threshold:
+                            break
+                        if versions[i] != index_version:
+                            continue
+                        row = self._conn.execute(
+                            "SELECT question, answer, sources, source_keys FROM answers WHERE id = ?",
+                            (int(ids[i]),),
+                        ).fetchone()
+                        if row is None:
+                            continue
+                        cached_keys = set(json.loads(row[3]))
+                        union = cached_keys | set(source_keys)
+                        overlap = len(cached_keys & set(source_keys)) / len(union) if union else 1.0
+                        if overlap >= self.min_source_overlap:
+                            best = {
+                                "question": row[0],
+                                "answer": row[1],
+                                "sources": json.loads(row[2]),
+                                "similarity": float(scores[i]),
+                            }
+                            self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?",
+                                               (time.time(), int(ids[i])))
+                            self._conn.commit()
+                            break
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def store(self, scope: str, index_version: int, question: str, embedding, answer: str,
+              sources: List[str], source_keys: List[str]):
+        vector = self._normalize(embedding)
+        with self._lock:
+            # 같은 범위의 옛 버전 답변은 다시 쓰일 일이 없으므로 지우오
+            self._conn.execute("DELETE FROM answers WHERE scope = ? AND index_version < ?",
+                               (scope, index_version))
+            entry_id = self._conn.execute(
+                "INSERT INTO answers (scope, index_version, question, embedding, answer, sources,"
+                " source_keys, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (scope, index_version, question, vector.tobytes(), answer,
+                 json.dumps(sources, ensure_ascii=False), json.dumps(source_keys), time.time()),
+            ).lastrowid
+
+            # 메모리 행렬에서도 옛 버전 항목을 빼고 새 항목을 덧붙이오 (전체 재적재 없음)
+            ids, versions, matrix = self._scopes.get(
+                scope, (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), None)
+            )
+            if matrix is not None:
+                keep = versions >= index_version
+                ids, versions, matrix = ids[keep], versions[keep], matrix[keep]
+            self._scopes[scope] = (
+                np.append(ids, entry_id),
+                np.append(versions, index_version),
+                vector[None, :] if matrix is None or not len(matrix) else np.vstack([matrix, vector]),
+            )
+
+            size = sum(len(scope_ids) for scope_ids, _, _ in self._scopes.values())
+            if size > self.max_entries:
+                evicted = self._conn.execute(
+                    "SELECT id, scope FROM answers ORDER BY last_used LIMIT ?", (size - self.max_entries,)
+                ).fetchall()
+                self._conn.executemany("DELETE FROM answers WHERE id = ?", [(row[0],) for row in evicted])
+                self._evict(evicted)
+            self._conn.commit()
+
+    def _evict(self, rows):
+        """지운 (id, 범위) 항목을 메모리 행렬에서 빼오."""
+        by_scope = {}
+        for entry_id, scope in rows:
+            by_scope.setdefault(scope, []).append(entry_id)
+        for scope, evicted_ids in by_scope.items():
+            if scope not in self._scopes:
+                continue
+            ids, versions, matrix = self._scopes[scope]
+            keep = ~np.isin(ids, evicted_ids)
+            if keep.any():
+                self._scopes[scope] = (ids[keep], versions[keep], matrix[keep])
+            else:
+                del self._scopes[scope]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+            self._scopes = {}
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": sum(len(ids) for ids, _, _ in self._scopes.values()),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+        }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """프로세스 전체에서 공유하는 답변 캐시를 반환하오."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SemanticAnswerCache()
+    return _shared_cache
@@ -0,0 +1,129 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List
+
+from src.common.log import get_logger
+from src.config import Config
+
+log = get_logger("qa.context")
+
+
+@lru_cache(maxsize=4)
+def _load_encoding(name: str):
+    """tiktoken 인코딩을 한 번만 불러오오. 설치/다운로드가 안 되면 None이오. (실패도 기억하여 다시 시도하지 않음)"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        log.warning("tiktoken 인코딩 '%s'을 쓸 수 없어 글자 수로 어림하오: %s", name, e)
+        return None
+
+
+class TokenCounter:
+    """프롬프트 토큰 수를 세는 도구
+
+    tiktoken이 있으면 그 인코딩으로 세고, 없으면 한글 음절은 1토큰, 그 밖의 글자는 4자당 1토큰으로
+    넉넉히 어림하오. (Solar 토크나이저보다 많게 잡히므로 예산을 넘길 일은 없소)
+    """
+
+    HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+    def __init__(self, encoding_name: str = None):
+        self.encoding_name = encoding_name or Config.CONTEXT_TOKEN_ENCODING
+        self.encoding = _load_encoding(self.encoding_name)
+
+    @property
+    def name(self) -> str:
+        return f"tiktoken:{self.encoding_name}" if self.encoding is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        hangul = len(self.HANGUL_PATTERN.findall(text))
+        return hangul + -(-(len(text) - hangul) // 4)
+
+
+@dataclass
+class PackedContext:
+    """토큰 예산에 맞춰 채운 참고 지식"""
+    text: str
+    docs: List = field(default_factory=list)  # 실제로 들어간 문서 (관련도 순)
+    tokens: int = 0                            # text의 토큰 수
+    budget: int = 0
+    trimmed: int = 0                           # 문장 경계에서 잘린 문서 수
+    dropped: int = 0                           # 예산이 모자라 빠진 문서 수
+
+    @property
+    def sources(self) -> List[str]:
+        """문서 출처 목록 (크롤러 청크는 "source"에 URL을 담소)"""
+        return [doc.metadata.get("source_url") or doc.metadata.get("source", "unknown") for doc in self.docs]
+
+
+class ContextBuilder:
+    """검색된 청크를 관련도 순으로 토큰 예산 안에 채워 넣는 컨텍스트 구성기
+
+    metadata["relevance_score"] 내림차순으로 청크를 통째로 넣다가, 남은 예산에 다 들어가지 않는
+    청크는 문장 경계에서 잘라 넣고 멈추오. 남은 예산이 min_trim_tokens보다 적으면 자르지 않고 멈추오.
+    그래서 프롬프트 크기가 질문마다 들쭉날쭉하지 않소.
+    """
+
+    # 마침표/물음표/느낌표(와 닫는 따옴표·괄호) 뒤, 또는 줄바꿈에서 문장을 나누오
+    SENTENCE_PATTERN = re.compile(r"(?<=[.!?。])[\"'”’)\]]*\s+|\n+")
+
+    def __init__(self, max_tokens: int = None, min_trim_tokens: int = None, counter: TokenCounter = None):
+        self.max_tokens = Config.CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+        self.min_trim_tokens = Config.CONTEXT_MIN_TRIM_TOKENS if min_trim_tokens is None else min_trim_tokens
+        self.counter = counter or TokenCounter()
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """max_tokens 안에 들어가는 앞쪽 문장들만 남기오. 첫 문장조차 넘치면 빈 문자열이오."""
+        kept, used = [], 0
+        position = 0
+        for match in self.SENTENCE_PATTERN.finditer(text + "\n"):
+            sentence = text[position:match.start()].strip()
+            position = match.end()
+            if not sentence:
+                continue
+            cost = self.counter.count(sentence) + (1 if kept else 0)
+            if used + cost > max_tokens:
+                break
+            kept.append(sentence)
+            used += cost
+        return " ".join(kept)
+
+    def build(self, docs, item_format: str = "[문서 {index}]: {content}", separator: str = "\n\n") -> PackedContext:
+        """item_format의 {index}(1부터), {content} 자리에 청크를 채워 예산 안의 참고 지식을 만드오."""
+        ranked = sorted(docs, key=lambda doc: (doc.metadata or {}).get("relevance_score", 0.0), reverse=True)
+        separator_tokens = self.counter.count(separator)
+        packed = PackedContext(text="", budget=self.max_tokens)
+        parts, used = [], 0
+
+        for doc in ranked:
+            index = len(parts) + 1
+            overhead = self.counter.count(item_format.format(index=index, content="")) + (
+                separator_tokens if parts else 0
+            )
+            remaining = self.max_tokens - used - overhead
+            content = doc.page_content
+            cost = self.counter.count(content)
+            if cost > remaining:
+                if remaining < self.min_trim_tokens:
+                    break
+                content = self.trim(content, remaining)
+                if not content:
+                    break
+                cost = self.counter.count(content)
+                packed.trimmed += 1
+            parts.append(item_format.format(index=index, content=content))
+            packed.docs.append(doc)
+            used += overhead + cost
+            if packed.trimmed:
+                break  # 잘라 넣었으면 예산이 찬 것이오
+
+        packed.dropped = len(ranked) - len(packed.docs)
+        packed.text = separator.join(parts)
+        packed.tokens = self.counter.count(packed.text)
+        return packed
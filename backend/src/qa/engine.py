@@ -1,147 +1,346 @@
-﻿from typing import List
+﻿import asyncio
+import contextvars
+import logging
+import threading
+from typing import List, Optional
+from src.config import Config
+from src.common.log import chunk_log_interval, fields, get_logger
 from src.llm.client import SolarClient
 from src.common.schema import Document
+from src.qa.answer_cache import SemanticAnswerCache, get_answer_cache
+from src.qa.context_builder import ContextBuilder, PackedContext
+from src.qa.prompts import QA_ANSWER, QA_CONTEXT_ITEM
+from src.qa.single_flight import Flight, get_single_flight
+from src.retriever.hybrid_retriever import HybridRetriever
+from src.retriever.metadata_index import normalize_filters
+
+log = get_logger("qa")
 
 class QAEngine:
-    """하이브리드 리트리버와 연동되는 답변 엔진"""
+    """하이브리드 리트리버와 연동되는 답변 엔진
+
+    get_answer/get_answer_stream은 동기 경로, aget_answer/astream_answer는 이벤트 루프를
+    막지 않는 비동기 경로(aretrieve + AsyncOpenAI)이오. 프롬프트는 모두 src.qa.prompts의 QA_ANSWER 틀로 만드오.
+
+    검색 뒤에는 의미 기반 답변 캐시(SemanticAnswerCache)를 먼저 보고, 비슷한 질문에 같은 근거로
+    만든 답이 있으면 LLM을 부르지 않고 그대로 돌려주오. (use_cache=False로 건너뜀)
+
+    같은 질문(정규화 후)이 같은 전략/필터로 동시에 여럿 들어오면 검색/생성은 한 번만 하고
+    나머지는 그 결과(스트리밍이면 앞부분 + 실시간 조각)를 함께 받소. (QA_COALESCE_ENABLED)
+
+    참고 지식은 두 경로 모두 ContextBuilder로 관련도 순으로 토큰 예산(CONTEXT_MAX_TOKENS) 안에 채우오.
+    """
+    NO_CONTEXT_ANSWER = "허허, 내 지식 주머니(Context)에 그에 관한 기록이 없구려."
+
     def __init__(self, retriever, api_key: str):
         self.retriever = retriever
         self.llm_client = SolarClient(api_key=api_key)
+        self.answer_cache = get_answer_cache() if Config.ANSWER_CACHE_ENABLED else None
+        self.context_builder = ContextBuilder()
+        self.flights = get_single_flight() if Config.QA_COALESCE_ENABLED else None
+
+    def _pack_context(self, docs, item_format: str, tag: str) -> PackedContext:
+        """토큰 예산 안의 참고 지식을 만들고, 쓴 토큰 수를 알리오."""
+        packed = self.context_builder.build(docs, item_format=item_format)
+        if log.isEnabledFor(logging.INFO):
+            log.info("[%s] 컨텍스트 %d/%d토큰", tag, packed.tokens, packed.budget, extra=fields(
+                counter=self.context_builder.counter.name, docs=len(packed.docs),
+                trimmed=packed.trimmed, dropped=packed.dropped,
+            ))
+        return packed
+
+    def _cache_context(self, question: str, filters, docs) -> Optional[tuple]:
+        """답변 캐시 조회/저장에 쓸 (범위, 컬렉션 버전, 질문 임베딩, 근거 해시). 쓸 수 없으면 None이오."""
+        embeddings = getattr(self.retriever, "embeddings", None)
+        if self.answer_cache is None or embeddings is None:
+            return None
+        collection = self.retriever.collection_name
+        return (
+            SemanticAnswerCache.scope_key(
+                collection, embeddings.model_name, normalize_filters(filters),
+                chat_model=self.llm_client.model, prompt_hash=QA_ANSWER.stats()["prefix_hash"],
+            ),
+            self.retriever.db_manager.get_index_version(collection),
+            # 검색 때 계산한 질의 임베딩이 질의 캐시에 있으므로 API를 다시 부르지 않소
+            embeddings.embed_query(question),
+            SemanticAnswerCache.source_keys(docs),
+        )
+
+    def _lookup_cached(self, question: str, filters, docs, use_cache: bool):
+        """(캐시 문맥, 캐시된 답변) - 캐시를 건너뛰면 (None, None)이오."""
+        if not use_cache:
+            return None, None
+        context = self._cache_context(question, filters, docs)
+        if context is None:
+            return None, None
+        cached = self.answer_cache.lookup(*context)
+        if cached is not None:
+            log.info("답변 캐시 적중 (유사도 %.3f): %s", cached["similarity"], cached["question"])
+        return context, cached
+
+    def _remember_answer(self, context: Optional[tuple], question: str, answer: str, sources: List[str]):
+        # API 오류 안내문은 담지 않소
+        if context is None or not answer or "허허, 기운(API)이" in answer:
+            return
+        scope, index_version, embedding, source_keys = context
+        self.answer_cache.store(scope, index_version, question, embedding, answer, sources, source_keys)
+
+    @staticmethod
+    def _replay(answer: str):
+        """캐시된 답변을 줄 단위로 나눠 스트리밍처럼 내보내오."""
+        return answer.splitlines(keepends=True) or [answer]
+
+    def _build_prompt(self, question: str, docs, tag: str) -> tuple:
+        """검색된 문서로 답변 프롬프트와 채운 참고 지식(PackedContext)을 만드오.
+
+        고정 머리(페르소나/형식 규칙)는 미리 만들어 둔 QA_ANSWER 틀을 그대로 쓰고,
+        참고 지식과 질문만 그 뒤에 붙이오. (일반/스트리밍 답변이 같은 머리를 쓰오)
+        """
+        packed = self._pack_context(docs, QA_CONTEXT_ITEM, tag)
+        prompt = QA_ANSWER.render(context=packed.text, question=question)
+        log.debug("[%s] 프롬프트: 고정 머리 %d토큰 + 사용자 메시지 %d자",
+                  tag, QA_ANSWER.stats()["prefix_tokens"], len(prompt[-1]["content"]))
+        return prompt, packed
 
-    def get_answer(self, question: str) -> dict:
+    def _flight_key(self, kind: str, question: str, filters, use_cache: bool) -> tuple:
+        """같은 질문으로 볼 요청의 키 (정규화한 질문, 컬렉션(전략), 필터, 캐시 사용 여부)"""
+        return (
+            kind,
+            HybridRetriever.normalize_query(question),
+            getattr(self.retriever, "collection_name", None),
+            normalize_filters(filters),
+            use_cache,
+        )
+
+    def _produce(self, flight: Flight, chunks):
+        """선도자의 스트리밍 생성을 비행 버퍼로 옮기오. (요청한 쪽이 끊겨도 끝까지 돌림)"""
+        try:
+            for chunk in chunks:
+                flight.publish(chunk)
+            flight.finish()
+        except Exception as e:
+            flight.finish(error=e)  # 오류는 기다리는 요청들이 받아 가오
+        except BaseException as e:
+            flight.finish(error=e)
+            raise  # GeneratorExit/KeyboardInterrupt는 삼키지 않소
+        finally:
+            self.flights.land(flight)
+
+    async def _aproduce(self, flight: Flight, chunks=None, answer=None):
+        """_produce의 비동기판. chunks(async 제너레이터)나 answer(코루틴) 중 하나를 받소."""
+        try:
+            if chunks is not None:
+                async for chunk in chunks:
+                    flight.publish(chunk)
+                flight.finish()
+            else:
+                flight.finish(await answer)
+        except Exception as e:
+            flight.finish(error=e)  # 오류는 기다리는 요청들이 받아 가오 (태스크는 조용히 끝남)
+        except BaseException as e:
+            flight.finish(error=e)
+            raise  # 취소(CancelledError)는 태스크까지 전하오
+        finally:
+            self.flights.land(flight)
+
+    def get_answer(self, question: str, filters: Optional[dict] = None, use_cache: bool = True) -> dict:
+        """filters: level/category/source로 검색 범위를 좁히오. 예) {"level": "basic"}
+        use_cache: False면 답변 캐시를 보지도, 채우지도 않소.
+
+        같은 질문이 이미 처리 중이면 검색/생성을 다시 하지 않고 그 결과를 함께 받소. (coalesced: True)
+        """
+        if self.flights is None:
+            return self._get_answer(question, filters, use_cache)
+        flight, leader = self.flights.join(self._flight_key("answer", question, filters, use_cache))
+        if not leader:
+            log.info("[QA] 처리 중인 같은 질문에 합류하오 (선도 요청 %s, 합류 %d건)", flight.request_id, flight.joiners)
+            return {**flight.wait(), "coalesced": True}
+        try:
+            result = self._get_answer(question, filters, use_cache)
+            flight.finish(result)
+            return result
+        except BaseException as e:
+            flight.finish(error=e)
+            raise
+        finally:
+            self.flights.land(flight)
+
+    def get_answer_stream(self, question: str, filters: Optional[dict] = None, use_cache: bool = True):
+        """스트리밍 방식으로 답변을 생성하오.
+
+        같은 질문이 이미 스트리밍 중이면 그 스트림에 합류하여, 이미 나온 앞부분부터 받은 뒤 이어지는 조각을 받소.
+        선도 요청의 생성은 별도 스레드에서 돌아가므로 선도 요청이 끊겨도 합류한 요청은 끝까지 받소.
+        """
+        if self.flights is None:
+            yield from self._get_answer_stream(question, filters, use_cache)
+            return
+        flight, leader = self.flights.join(self._flight_key("stream", question, filters, use_cache))
+        if leader:
+            # 생산 스레드도 이 요청의 상관 ID로 로그를 남기게 문맥을 복사해 넘기오
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._produce, flight, self._get_answer_stream(question, filters, use_cache)),
+                name="qa-flight", daemon=True,
+            ).start()
+        else:
+            log.info("[QA/Stream] 스트리밍 중인 같은 질문에 합류하오 (선도 요청 %s, 이미 %d개 청크 생성됨)",
+                     flight.request_id, len(flight.chunks))
+        yield from flight.stream()
+
+    async def aget_answer(self, question: str, filters: Optional[dict] = None, use_cache: bool = True) -> dict:
+        """get_answer의 비동기판. 같은 질문이 처리 중이면 그 결과를 함께 기다리오."""
+        if self.flights is None:
+            return await self._aget_answer(question, filters, use_cache)
+        flight, leader = self.flights.join(self._flight_key("answer", question, filters, use_cache))
+        if leader:
+            flight.task = asyncio.create_task(
+                self._aproduce(flight, answer=self._aget_answer(question, filters, use_cache))
+            )
+            return await flight.await_result()
+        log.info("[QA/Async] 처리 중인 같은 질문에 합류하오 (선도 요청 %s, 합류 %d건)", flight.request_id, flight.joiners)
+        return {**await flight.await_result(), "coalesced": True}
+
+    async def astream_answer(self, question: str, filters: Optional[dict] = None, use_cache: bool = True):
+        """get_answer_stream의 비동기판 (async 제너레이터). 생성은 이벤트 루프의 별도 작업에서 돌리오."""
+        if self.flights is None:
+            async for chunk in self._astream_answer(question, filters, use_cache):
+                yield chunk
+            return
+        flight, leader = self.flights.join(self._flight_key("stream", question, filters, use_cache))
+        if leader:
+            flight.task = asyncio.create_task(
+                self._aproduce(flight, chunks=self._astream_answer(question, filters, use_cache))
+            )
+        else:
+            log.info("[QA/AsyncStream] 스트리밍 중인 같은 질문에 합류하오 (선도 요청 %s, 이미 %d개 청크 생성됨)",
+                     flight.request_id, len(flight.chunks))
+        async for chunk in flight.astream():
+            yield chunk
+
+    def _get_answer(self, question: str, filters: Optional[dict] = None, use_cache: bool = True) -> dict:
+        """검색 -> 답변 캐시 -> 생성 (합치기 없이 한 요청을 그대로 처리)"""
         # 1. 하이브리드 검색 실행
-        print(f"   [QA] 검색 시작: {question}")
-        retrieved_docs = self.retriever.retrieve(question)
-        print(f"   [QA] {len(retrieved_docs)}개 문서 검색됨")
-        
+        log.debug("[QA] 검색 시작: %s", question)
+        retrieved_docs = self.retriever.retrieve(question, filters=filters)
+        log.debug("[QA] %d개 문서 검색됨", len(retrieved_docs))
+
         if not retrieved_docs:
             return {
-                "answer": "허허, 내 지식 주머니(Context)에 그에 관한 기록이 없구려.",
+                "answer": self.NO_CONTEXT_ANSWER,
                 "sources": []
             }
 
-        # 2. 참고 지식 구성
-        context_parts = []
-        for i, doc in enumerate(retrieved_docs):
-            context_parts.append(f"[비급서 {i+1}권]: {doc.page_content}")
-        
-        context_text = "\n\n".join(context_parts)
-        sources = [doc.metadata.get("source_url", "unknown") for doc in retrieved_docs]
-
-        # 3. 프롬프트 구성
-        prompt = [
-            {"role": "system", "content": (
-                "당신은 명상과 영혼의 전문가 '전우치'요. "
-                "아래 제공된 [참고한 비급서]의 내용만을 근거로 답하시오. "
-                "비급서에 없는 정보(장소명, 수치, 고유명사 등)는 절대 지어내지 말고, 모른다고 솔직히 밝히시오. "
-                "질문에서 명시적으로 묻지 않은 주제(예: 뇌파, 호르몬, 무관한 수행법 등)는 답변에 포함하지 마시오. 질문의 핵심 주제에만 집중하여 답하시오.\n\n"
-                "【출력 형식 규칙 — 반드시 준수하시오】\n"
-                "① 첫 줄에 인트로 문장을 한 줄만 쓰시오.\n"
-                "② 그 다음은 반드시 빈 줄 하나를 삽입하시오.\n"
-                "③ 섹션 제목은 '**번호. 제목**' 형식으로 독립된 줄에 쓰시오 (# 기호 사용 금지).\n"
-                "④ 제목 바로 다음 줄(빈 줄 없이)에 한 문장 설명을 쓰시오.\n"
-                "⑤ 설명 다음 줄부터 '- **키워드**: 설명' 형식으로 항목을 한 줄씩 쓰시오.\n"
-                "⑥ 섹션과 섹션 사이에만 빈 줄 하나를 삽입하시오.\n"
-                "⑦ 마지막 섹션 뒤에 빈 줄 하나 후 마무리 문장을 한 줄 쓰시오.\n"
-                "⑧ 제목·설명·항목을 절대로 한 줄에 이어 붙이지 마시오.\n"
-                "⑨ 말투는 '~하오', '~구려', '~소'를 사용하시오.\n"
-                "⑩ 영어 사용 금지. 한국어 띄어쓰기 규칙을 준수하시오.\n\n"
-                "【예시 — 이 형식 그대로 출력하시오】\n\n"
-                "도사가 호흡법 두 가지를 전하겠소.\n\n"
-                "**1. 4-7-8 호흡법**\n"
-                "초심자도 쉽게 따라 할 수 있는 기본 호흡법이오.\n"
-                "- **방법**: 4초 코로 들이쉬고, 7초 참은 뒤, 8초에 걸쳐 입으로 내쉬시오.\n"
-                "- **효과**: 부교감 신경을 활성화하여 불안과 긴장을 해소할 수 있소.\n"
-                "- **주의**: 어지러움을 느끼면 즉시 중단하시오.\n\n"
-                "**2. 역복식 호흡법**\n"
-                "내장 기능을 다스리는 도가의 비전 호흡법이오.\n"
-                "- **방법**: 들숨에 배를 안으로 당기고, 날숨에 배를 바깥으로 밀어내시오.\n"
-                "- **효과**: 내장을 자극하고 소화 기능을 높일 수 있소.\n\n"
-                "그대의 수련이 날로 깊어지길 바라오."
-            )},
-            {"role": "user", "content": f"[참고한 비급서]\n{context_text}\n\n[질문]\n{question}"}
-        ]
-
-        # 4. 답변 생성
-        print("   [QA] LLM 호출 중...")
+        cache_context, cached = self._lookup_cached(question, filters, retrieved_docs, use_cache)
+        if cached is not None:
+            return {"answer": cached["answer"], "sources": cached["sources"], "cached": True}
+
+        # 2. 참고 지식/프롬프트 구성
+        prompt, packed = self._build_prompt(question, retrieved_docs, "QA")
+
+        # 3. 답변 생성
         answer = self.llm_client.generate(prompt)
-        print(f"   [QA] 답변 생성됨")
+        log.info("[QA] 답변 생성됨", extra=fields(chars=len(answer)))
 
+        sources = list(set(packed.sources))
+        self._remember_answer(cache_context, question, answer, sources)
         return {
             "answer": answer,
-            "sources": list(set(sources))
+            "sources": sources,
+            "context_tokens": packed.tokens
         }
 
-    def get_answer_stream(self, question: str):
-        """스트리밍 방식으로 답변을 생성하오."""
+    def _get_answer_stream(self, question: str, filters: Optional[dict] = None, use_cache: bool = True):
+        """_get_answer의 스트리밍판"""
         # 1. 하이브리드 검색 실행
-        print(f"   [QA/Stream] 검색 시작: {question}")
-        retrieved_docs = self.retriever.retrieve(question)
-        print(f"   [QA/Stream] 검색됨: {len(retrieved_docs)}개 문서")
-        
+        log.debug("[QA/Stream] 검색 시작: %s", question)
+        retrieved_docs = self.retriever.retrieve(question, filters=filters)
+        log.debug("[QA/Stream] %d개 문서 검색됨", len(retrieved_docs))
+
         if not retrieved_docs:
-            yield "허허, 내 지식 주머니(Context)에 그에 관한 기록이 없구려."
+            yield self.NO_CONTEXT_ANSWER
+            return
+
+        cache_context, cached = self._lookup_cached(question, filters, retrieved_docs, use_cache)
+        if cached is not None:
+            yield from self._replay(cached["answer"])
             return
 
-        # 2. 참고 지식 구성
-        context_parts = []
-        for i, doc in enumerate(retrieved_docs):
-            content = doc.page_content[:500] if len(doc.page_content) > 500 else doc.page_content
-            context_parts.append(f"[문서 {i+1}]: {content}")
-        
-        context_text = "\n\n".join(context_parts)
-        print(f"   [QA/Stream] 컨텍스트 길이: {len(context_text)}자")
-
-        # 3. 프롬프트 구성 - 가독성 높은 포맷 강조
-        system_prompt = (
-            "당신은 명상 전문 도사 '전우치'입니다. "
-            "반드시 아래 [참고 자료]에 있는 내용만을 근거로 답하시오. "
-            "참고 자료에 없는 정보(장소명, 수치, 고유명사 등)는 절대 지어내지 말고, 모른다고 솔직히 밝히시오. "
-            "질문에서 명시적으로 묻지 않은 주제(예: 뇌파, 호르몬, 무관한 수행법 등)는 답변에 포함하지 마시오. 질문의 핵심 주제에만 집중하여 답하시오.\n\n"
-            "【출력 형식 규칙 — 반드시 준수하시오】\n"
-            "① 첫 줄에 인트로 문장을 한 줄만 쓰시오.\n"
-            "② 그 다음은 반드시 빈 줄 하나를 삽입하시오.\n"
-            "③ 섹션 제목은 '**번호. 제목**' 형식으로 독립된 줄에 쓰시오 (# 기호 사용 금지).\n"
-            "④ 제목 바로 다음 줄(빈 줄 없이)에 한 문장 설명을 쓰시오.\n"
-            "⑤ 설명 다음 줄부터 '- **키워드**: 설명' 형식으로 항목을 한 줄씩 쓰시오.\n"
-            "⑥ 섹션과 섹션 사이에만 빈 줄 하나를 삽입하시오.\n"
-            "⑦ 마지막 섹션 뒤에 빈 줄 하나 후 마무리 문장을 한 줄 쓰시오.\n"
-            "⑧ 제목·설명·항목을 절대로 한 줄에 이어 붙이지 마시오.\n"
-            "⑨ 말투는 '~하오', '~구려', '~소'를 사용하시오.\n"
-            "⑩ 영어 사용 금지. 한국어 띄어쓰기 규칙을 준수하시오.\n\n"
-            "【예시 — 이 형식 그대로 출력하시오】\n\n"
-            "도사가 호흡법 두 가지를 전하겠소.\n\n"
-            "**1. 4-7-8 호흡법**\n"
-            "초심자도 쉽게 따라 할 수 있는 기본 호흡법이오.\n"
-            "- **방법**: 4초 코로 들이쉬고, 7초 참은 뒤, 8초에 걸쳐 입으로 내쉬시오.\n"
-            "- **효과**: 부교감 신경을 활성화하여 불안과 긴장을 해소할 수 있소.\n"
-            "- **주의**: 어지러움을 느끼면 즉시 중단하시오.\n\n"
-            "**2. 역복식 호흡법**\n"
-            "내장 기능을 다스리는 도가의 비전 호흡법이오.\n"
-            "- **방법**: 들숨에 배를 안으로 당기고, 날숨에 배를 바깥으로 밀어내시오.\n"
-            "- **효과**: 내장을 자극하고 소화 기능을 높일 수 있소.\n\n"
-            "그대의 수련이 날로 깊어지길 바라오."
+        # 2. 참고 지식/프롬프트 구성
+        prompt, packed = self._build_prompt(question, retrieved_docs, "QA/Stream")
+
+        # 3. 답변 스트리밍
+        # 청크 단위 로그는 표본으로 뽑힌 요청에서만 남기오 (꺼져 있으면 정수 비교 하나뿐)
+        every = chunk_log_interval(log)
+        chunk_count = 0
+        chunks = []
+        for chunk in self.llm_client.stream_generate(prompt):
+            chunk_count += 1
+            if every and chunk_count % every == 0:
+                log.debug("[QA/Stream] 청크 %d개 수신", chunk_count)
+            chunks.append(chunk)
+            yield chunk
+        log.info("[QA/Stream] 완료", extra=fields(chunks=chunk_count))
+        sources = list(set(packed.sources))
+        self._remember_answer(cache_context, question, "".join(chunks), sources)
+
+    async def _aget_answer(self, question: str, filters: Optional[dict] = None, use_cache: bool = True) -> dict:
+        """_get_answer의 비동기판. 검색은 스레드 풀, LLM 호출은 AsyncOpenAI로 기다리오."""
+        log.debug("[QA/Async] 검색 시작: %s", question)
+        retrieved_docs = await self.retriever.aretrieve(question, filters=filters)
+        log.debug("[QA/Async] %d개 문서 검색됨", len(retrieved_docs))
+
+        if not retrieved_docs:
+            return {
+                "answer": self.NO_CONTEXT_ANSWER,
+                "sources": []
+            }
+
+        cache_context, cached = await asyncio.to_thread(
+            self._lookup_cached, question, filters, retrieved_docs, use_cache
         )
-        
-        user_content = (
-            f"참고 자료:\n{context_text}\n\n"
-            f"질문: {question}\n\n"
-            f"답변:"
+        if cached is not None:
+            return {"answer": cached["answer"], "sources": cached["sources"], "cached": True}
+
+        prompt, packed = self._build_prompt(question, retrieved_docs, "QA/Async")
+        answer = await self.llm_client.agenerate(prompt)
+        log.info("[QA/Async] 답변 생성됨", extra=fields(chars=len(answer)))
+
+        sources = list(set(packed.sources))
+        await asyncio.to_thread(self._remember_answer, cache_context, question, answer, sources)
+        return {
+            "answer": answer,
+            "sources": sources,
+            "context_tokens": packed.tokens
+        }
+
+    async def _astream_answer(self, question: str, filters: Optional[dict] = None, use_cache: bool = True):
+        """_get_answer_stream의 비동기판 (async 제너레이터)"""
+        log.debug("[QA/AsyncStream] 검색 시작: %s", question)
+        retrieved_docs = await self.retriever.aretrieve(question, filters=filters)
+        log.debug("[QA/AsyncStream] %d개 문서 검색됨", len(retrieved_docs))
+
+        if not retrieved_docs:
+            yield self.NO_CONTEXT_ANSWER
+            return
+
+        cache_context, cached = await asyncio.to_thread(
+            self._lookup_cached, question, filters, retrieved_docs, use_cache
         )
-        
-        prompt = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_content}
-        ]
-        
-        print(f"   [QA/Stream] 프롬프트 준비 완료. 시스템 메시지: {len(system_prompt)}자, 사용자 메시지: {len(user_content)}자")
-
-        # 4. 답변 스트리밍
-        print("   [QA/Stream] LLM 스트리밍 호출 중...")
+        if cached is not None:
+            for chunk in self._replay(cached["answer"]):
+                yield chunk
+            return
+
+        prompt, packed = self._build_prompt(question, retrieved_docs, "QA/AsyncStream")
+        every = chunk_log_interval(log)
         chunk_count = 0
-        for chunk in self.llm_client.stream_generate(prompt):
+        chunks = []
+        async for chunk in self.llm_client.astream_generate(prompt):
             chunk_count += 1
-            if chunk_count % 10 == 0:
-                print(f"   [QA/Stream] 청크 {chunk_count}개 수신...")
+            if every and chunk_count % every == 0:
+                log.debug("[QA/AsyncStream] 청크 %d개 수신", chunk_count)
+            chunks.append(chunk)
             yield chunk
-        print(f"   [QA/Stream] 완료. 총 {chunk_count}개 청크 전송")
+        log.info("[QA/AsyncStream] 완료", extra=fields(chunks=chunk_count))
+        sources = list(set(packed.sources))
+        await asyncio.to_thread(self._remember_answer, cache_context, question, "".join(chunks), sources)
@@ -0,0 +1,110 @@
+import hashlib
+from typing import List, Sequence, Tuple
+
+from src.agent.persona_prompt import JeonWoochiPersona
+from src.config import Config
+from src.qa.context_builder import TokenCounter
+
+# 답변 형식 규칙과 예시 (QA 답변/스트리밍 답변이 같이 쓰오)
+ANSWER_FORMAT_RULES = (
+    "【출력 형식 규칙 — 반드시 준수하시오】\n"
+    "① 첫 줄에 인트로 문장을 한 줄만 쓰시오.\n"
+    "② 그 다음은 반드시 빈 줄 하나를 삽입하시오.\n"
+    "③ 섹션 제목은 '**번호. 제목**' 형식으로 독립된 줄에 쓰시오 (# 기호 사용 금지).\n"
+    "④ 제목 바로 다음 줄(빈 줄 없이)에 한 문장 설명을 쓰시오.\n"
+    "⑤ 설명 다음 줄부터 '- **키워드**: 설명' 형식으로 항목을 한 줄씩 쓰시오.\n"
+    "⑥ 섹션과 섹션 사이에만 빈 줄 하나를 삽입하시오.\n"
+    "⑦ 마지막 섹션 뒤에 빈 줄 하나 후 마무리 문장을 한 줄 쓰시오.\n"
+    "⑧ 제목·설명·항목을 절대로 한 줄에 이어 붙이지 마시오.\n"
+    "⑨ 말투는 '~하오', '~구려', '~소'를 사용하시오.\n"
+    "⑩ 영어 사용 금지. 한국어 띄어쓰기 규칙을 준수하시오.\n\n"
+    "【예시 — 이 형식 그대로 출력하시오】\n\n"
+    "도사가 호흡법 두 가지를 전하겠소.\n\n"
+    "**1. 4-7-8 호흡법**\n"
+    "초심자도 쉽게 따라 할 수 있는 기본 호흡법이오.\n"
+    "- **방법**: 4초 코로 들이쉬고, 7초 참은 뒤, 8초에 걸쳐 입으로 내쉬시오.\n"
+    "- **효과**: 부교감 신경을 활성화하여 불안과 긴장을 해소할 수 있소.\n"
+    "- **주의**: 어지러움을 느끼면 즉시 중단하시오.\n\n"
+    "**2. 역복식 호흡법**\n"
+    "내장 기능을 다스리는 도가의 비전 호흡법이오.\n"
+    "- **방법**: 들숨에 배를 안으로 당기고, 날숨에 배를 바깥으로 밀어내시오.\n"
+    "- **효과**: 내장을 자극하고 소화 기능을 높일 수 있소.\n\n"
+    "그대의 수련이 날로 깊어지길 바라오."
+)
+
+
+class PromptTemplate:
+    """고정 머리(system)와 가변 꼬리(user)로 나뉜 프롬프트 틀
+
+    system은 모듈을 불러올 때 한 번만 만들어 두고 호출마다 바이트 하나 다르지 않게 그대로 보내오.
+    (공급자 쪽 프롬프트 접두 캐시는 앞부분이 똑같아야 걸리므로)
+    참고 지식, 대화 기록, 질문 같은 가변 부분은 모두 그 뒤에 붙이오.
+    """
+
+    def __init__(self, name: str, system: str, user_format: str):
+        self.name = name
+        self.system = system
+        self.user_format = user_format
+        self._system_message = {"role": "system", "content": system}
+        self._stats = None
+
+    def render(self, history: Sequence[Tuple[str, str]] = (), **variables) -> List[dict]:
+        """[고정 system, (대화 기록), 가변 user] 메시지 목록을 만드오.
+
+        Args:
+            history: (사용자 말, 도사 답) 쌍의 목록. 고정 머리 뒤, 이번 질문 앞에 놓이오.
+        """
+        messages = [dict(self._system_message)]
+        for user_text, ai_text in history:
+            messages.append({"role": "user", "content": user_text})
+            messages.append({"role": "assistant", "content": ai_text})
+        messages.append({"role": "user", "content": self.user_format.format(**variables)})
+        return messages
+
+    def stats(self) -> dict:
+        """고정 머리의 크기와 해시 (접두 캐시 대상인지 추적용, 한 번만 재오)"""
+        if self._stats is None:
+            tokens = TokenCounter().count(self.system)
+            self._stats = {
+                "prefix_chars": len(self.system),
+                "prefix_bytes": len(self.system.encode("utf-8")),
+                "prefix_tokens": tokens,
+                "prefix_hash": hashlib.sha1(self.system.encode("utf-8")).hexdigest()[:12],
+                "prefix_cache_eligible": tokens >= Config.PROMPT_PREFIX_CACHE_MIN_TOKENS,
+            }
+        return self._stats
+
+
+# 검색 근거 답변 (일반/스트리밍 공용) - 페르소나 + 근거 규칙 + 형식 규칙이 고정 머리이오
+QA_ANSWER = PromptTemplate(
+    name="qa_answer",
+    system=(
+        f"{JeonWoochiPersona.SYSTEM_PROMPT}\n\n"
+        "아래 제공된 [참고한 비급서]의 내용만을 근거로 답하시오. "
+        "비급서에 없는 정보(장소명, 수치, 고유명사 등)는 절대 지어내지 말고, 모른다고 솔직히 밝히시오. "
+        "질문에서 명시적으로 묻지 않은 주제(예: 뇌파, 호르몬, 무관한 수행법 등)는 답변에 포함하지 마시오. "
+        "질문의 핵심 주제에만 집중하여 답하시오.\n\n"
+        f"{ANSWER_FORMAT_RULES}"
+    ),
+    user_format="[참고한 비급서]\n{context}\n\n[질문]\n{question}",
+)
+QA_CONTEXT_ITEM = "[비급서 {index}권]: {content}"
+
+# 적재 시 원문을 비급 형태로 바꾸는 변환
+DISTILL = PromptTemplate(
+    name="distill",
+    system=(
+        "당신은 조선의 도사 '전우치'이오. 아래 제공된 [Raw Data]를 읽고, "
+        "현대인들이 읽기 쉬운 '입문자용 명상/건강 비급' 형태로 재구성하시오. "
+        "말투는 반드시 '~하오', '~구려', '~소'와 같은 고풍스러운 도사 말투를 유지하고, "
+        "내용은 핵심 위주로 정리하여 '전우치의 비급'처럼 만드시오."
+    ),
+    user_format="[Raw Data]\n{raw}",
+)
+
+TEMPLATES = {template.name: template for template in (QA_ANSWER, DISTILL)}
+
+
+def prompt_stats() -> dict:
+    """틀별 고정 머리 크기 (/metrics용)"""
+    return {name: template.stats() for name, template in TEMPLATES.items()}
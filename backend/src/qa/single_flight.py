@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from typing import Any, Hashable, List, Optional
+
+from src.common.log import get_request_id
+
+
+class Flight:
+    """진행 중인 생성 하나의 결과를 여러 요청에 나눠 주는 방송 버퍼
+
+    생성하는 쪽은 publish로 조각을 쌓고 finish로 끝내오. 받는 쪽은 처음 조각부터 읽으므로
+    늦게 합류한 요청도 이미 만들어진 앞부분을 먼저 받고, 이어서 실시간 조각을 받소.
+    동기(스레드) 소비자와 비동기(이벤트 루프) 소비자가 같은 비행에 함께 붙을 수 있소.
+    """
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.chunks: List[str] = []
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self.joiners = 0
+        self.task = None  # 비동기 생산자 작업 (GC 방지용 참조)
+        self.request_id = get_request_id()  # 선도 요청의 상관 ID (합류 로그용)
+        self._cond = threading.Condition()
+        self._async_waiters = []  # (이벤트 루프, asyncio.Event)
+
+    def _wake(self):
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+        self._async_waiters.clear()
+        self._cond.notify_all()
+
+    def publish(self, chunk: str):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._wake()
+
+    def finish(self, result: Any = None, error: BaseException = None):
+        with self._cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self._wake()
+
+    def _take(self, position: int):
+        """(position부터의 새 조각, 끝났는지) - 잠금을 쥔 채로 부르시오."""
+        return self.chunks[position:], self.done and position >= len(self.chunks)
+
+    def stream(self):
+        """조각을 처음부터 끝까지 내보내오. (동기)"""
+        position = 0
+        while True:
+            with self._cond:
+                while position >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                batch, finished = self._take(position)
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            position += len(batch)
+            yield from batch
+
+    async def astream(self):
+        """stream의 비동기판. 기다리는 동안 이벤트 루프를 놓아주오."""
+        loop = asyncio.get_running_loop()
+        position = 0
+        while True:
+            event = None
+            with self._cond:
+                batch, finished = self._take(position)
+                if not batch and not finished:
+                    event = asyncio.Event()
+                    self._async_waiters.append((loop, event))
+            if event is not None:
+                await event.wait()
+                continue
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            position += len(batch)
+            for chunk in batch:
+                yield chunk
+
+    def wait(self) -> Any:
+        """생성이 끝나기를 기다려 결과를 돌려주오. (동기)"""
+        with self._cond:
+            while not self.done:
+                self._cond.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    async def await_result(self) -> Any:
+        """wait의 비동기판"""
+        async for _ in self.astream():
+            pass
+        return self.result
+
+
+class SingleFlight:
+    """같은 키의 요청이 동시에 여럿 오면 첫 요청(선도자)만 생성하고 나머지는 그 비행에 합류시키오.
+
+    비행은 생성이 끝나면 목록에서 빠지므로, 그 뒤에 온 같은 질문은 새로 생성하오. (답변 캐시가 따로 받소)
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: Hashable) -> tuple:
+        """(비행, 선도자인지) - 선도자는 생성을 마친 뒤 반드시 land를 부르시오."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.joiners += 1
+                self.coalesced += 1
+                return flight, False
+            flight = Flight(key)
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def land(self, flight: Flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "coalesce_rate": self.coalesced / total if total else 0.0,
+            }
+
+
+_shared_flights = None
+_shared_flights_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """프로세스 전체에서 공유하는 single-flight 목록을 반환하오."""
+    global _shared_flights
+    if _shared_flights is None:
+        with _shared_flights_lock:
+            if _shared_flights is None:
+                _shared_flights = SingleFlight()
+    return _shared_flights
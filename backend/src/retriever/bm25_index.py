@@ -0,0 +1,302 @@
+import json
+import os
+from collections import Counter
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.processor.tokenizer import BaseTokenizer, get_tokenizer
+from src.retriever.metadata_index import MetadataIndex
+from src.vector_store.artifact import read_current_meta, write_versioned
+from src.vector_store.doc_store import DocStore
+
+
+class BM25Index:
+    """역색인(postings) 기반 BM25 인덱스
+
+    점수 계산은 rank_bm25의 BM25Okapi와 같은 공식(k1, b, 음수 idf 보정 epsilon)을 따르오.
+    어휘(vocab), 역색인(postings), 문서 길이, idf를 버전별 디렉터리에 .npy로 저장하고,
+    서버 기동 시에는 메모리 매핑으로 열어 코퍼스 크기와 무관하게 빠르게 올라오오.
+
+    저장 구조 (<root>/<collection>/):
+        CURRENT            현재 버전 디렉터리 이름
+        v<버전>/meta.json   포맷 버전, 컬렉션 버전, 통계
+        v<버전>/vocab.json  단어 -> 단어 ID
+        v<버전>/*.npy       postings_ptr, postings_doc, postings_tf, doc_len, idf
+        v<버전>/*.npy       doc_tokens_ptr, doc_tokens (문서별 토큰 스트림, 단어 ID)
+        v<버전>/docs.bin    청크 본문 (DocStore)
+        v<버전>/metadata_*  level/category/source 필터용 색인 (MetadataIndex)
+
+    토큰 스트림을 함께 저장해 두므로, 다음 적재 때 바뀌지 않은 청크는 다시 토큰화하지 않소.
+    필터가 주어지면 postings에서 필터 밖 문서를 먼저 걸러낸 뒤 점수를 매기오.
+    """
+
+    FORMAT_VERSION = 3
+    ARRAYS = ("postings_ptr", "postings_doc", "postings_tf", "doc_len", "idf",
+              "doc_tokens_ptr", "doc_tokens")
+
+    def __init__(self, vocab: dict, postings_ptr, postings_doc, postings_tf, doc_len, idf,
+                 doc_tokens_ptr, doc_tokens, avgdl: float, doc_store: DocStore,
+                 tokenizer_name: str, k1: float = 1.5, b: float = 0.75,
+                 collection_version: int = 0, metadata_index: Optional[MetadataIndex] = None):
+        self.vocab = vocab
+        self.postings_ptr = postings_ptr
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.idf = idf
+        self.avgdl = avgdl
+        self.doc_tokens_ptr = doc_tokens_ptr
+        self.doc_tokens = doc_tokens
+        self.doc_store = doc_store
+        self.tokenizer_name = tokenizer_name
+        self._terms = None  # 단어 ID -> 단어 (토큰 스트림 복원용, 필요할 때 만듦)
+        self.reused_token_streams = 0  # build 시 이전 인덱스에서 재사용한 토큰 스트림 수
+        self.k1 = k1
+        self.b = b
+        self.collection_version = collection_version
+        self.metadata_index = metadata_index
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, ids: List[str], docs: List[Document],
+              tokenizer: Optional[BaseTokenizer] = None, previous: Optional["BM25Index"] = None,
+              k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25,
+              collection_version: int = 0) -> "BM25Index":
+        """문서 리스트로 메모리 상의 인덱스를 만드오.
+
+        previous가 같은 토크나이저로 만든 인덱스라면, 같은 청크 ID의 저장된 토큰 스트림을
+        그대로 가져다 쓰고 새 청크만 토큰화하오. (청크 ID는 본문에서 나오므로 안전함)
+        """
+        tokenizer = tokenizer or get_tokenizer()
+        reusable = {}
+        if previous is not None and previous.tokenizer_name == tokenizer.name:
+            reusable = {chunk_id: i for i, chunk_id in enumerate(previous.doc_store.ids())}
+
+        vocab = {}
+        term_ids, doc_ids, tfs = [], [], []
+        doc_tokens = []
+        doc_tokens_ptr = np.zeros(len(docs) + 1, dtype=np.int64)
+        doc_len = np.zeros(len(docs), dtype=np.float32)
+        reused = 0
+
+        for doc_index, (chunk_id, doc) in enumerate(zip(ids, docs)):
+            previous_index = reusable.get(chunk_id)
+            if previous_index is not None:
+                tokens = previous.get_tokens(previous_index)
+                reused += 1
+            else:
+                tokens = tokenizer.tokenize(doc.page_content)
+            doc_len[doc_index] = len(tokens)
+            doc_tokens.extend(vocab.setdefault(token, len(vocab)) for token in tokens)
+            doc_tokens_ptr[doc_index + 1] = len(doc_tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab[term])
+                doc_ids.append(doc_index)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        # 단어 ID 순으로 정렬하여 CSR 형태의 역색인을 만드오 (안정 정렬이라 문서 순서 유지)
+        order = np.argsort(term_ids, kind="stable")
+        postings_doc = np.asarray(doc_ids, dtype=np.int32)[order]
+        postings_tf = np.asarray(tfs, dtype=np.float32)[order]
+        doc_freq = np.bincount(term_ids, minlength=len(vocab))
+        postings_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=postings_ptr[1:])
+
+        # BM25Okapi와 같은 idf: 음수 idf는 평균 idf * epsilon으로 대체
+        corpus_size = len(docs)
+        idf = (np.log(corpus_size - doc_freq + 0.5) - np.log(doc_freq + 0.5)).astype(np.float32)
+        if len(idf):
+            idf[idf < 0] = epsilon * float(idf.mean())
+
+        total = float(doc_len.sum())
+        avgdl = total / corpus_size if corpus_size and total else 1.0
+
+        index = cls(
+            vocab=vocab,
+            postings_ptr=postings_ptr,
+            postings_doc=postings_doc,
+            postings_tf=postings_tf,
+            doc_len=doc_len,
+            idf=idf,
+            avgdl=avgdl,
+            doc_tokens_ptr=doc_tokens_ptr,
+            doc_tokens=np.asarray(doc_tokens, dtype=np.int32),
+            doc_store=DocStore.from_documents(ids, docs),
+            tokenizer_name=tokenizer.name,
+            k1=k1,
+            b=b,
+            collection_version=collection_version,
+            metadata_index=MetadataIndex.build([doc.metadata for doc in docs]),
+        )
+        index.reused_token_streams = reused
+        return index
+
+    def allowed_mask(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        """필터에 맞는 문서 비트맵 (필터가 없으면 None)"""
+        if not filters:
+            return None
+        return self.metadata_index.mask(filters)
+
+    def _postings(self, query_tokens: List[str], allowed: Optional[np.ndarray] = None):
+        """질의 단어별 (문서 번호 배열, 점수 기여 배열)을 돌려주오. 일치하는 postings만 읽소.
+
+        allowed(문서 비트맵)가 주어지면 필터 밖 문서는 채점 전에 빼오.
+        """
+        for token in query_tokens:
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = self.postings_ptr[term], self.postings_ptr[term + 1]
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end]
+            if allowed is not None:
+                keep = allowed[docs]
+                docs, tf = docs[keep], tf[keep]
+                if not len(docs):
+                    continue
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avgdl)
+            yield docs, self.idf[term] * (tf * (self.k1 + 1) / (tf + norm))
+
+    def score_candidates(self, query_tokens: List[str], allowed: Optional[np.ndarray] = None):
+        """질의 단어가 하나라도 나온 문서만 점수를 매기오.
+
+        Returns:
+            (문서 번호 배열, BM25 점수 배열) - 문서 번호 오름차순
+        """
+        parts = list(self._postings(query_tokens, allowed))
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        docs = np.concatenate([p[0] for p in parts])
+        contributions = np.concatenate([p[1] for p in parts]).astype(np.float64)
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        return candidates, np.bincount(inverse, weights=contributions, minlength=len(candidates))
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """BM25Okapi.get_scores와 같은 전체 점수 배열 (일치하지 않은 문서는 0)"""
+        scores = np.zeros(len(self), dtype=np.float64)
+        candidates, candidate_scores = self.score_candidates(query_tokens)
+        scores[candidates] = candidate_scores
+        return scores
+
+    @staticmethod
+    def _select_top(candidates: np.ndarray, scores: np.ndarray, k: int) -> List[tuple]:
+        """양수 점수 중 상위 k개를 부분 선택(argpartition)으로 고르오. 동점이면 앞 문서 우선."""
+        positive = scores > 0
+        candidates, scores = candidates[positive], scores[positive]
+        if len(scores) > k:
+            # k번째 점수를 부분 선택으로 구하고, 경계 동점은 문서 번호가 작은 쪽을 남기오
+            threshold = -np.partition(-scores, k - 1)[k - 1]
+            above = np.flatnonzero(scores > threshold)
+            ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+            keep = np.concatenate([above, ties])
+            candidates, scores = candidates[keep], scores[keep]
+        order = np.lexsort((candidates, -scores))
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def top_k(self, query_tokens: List[str], k: int, filters: Optional[dict] = None) -> List[tuple]:
+        """상위 k개 (문서 번호, 점수)를 점수 내림차순으로 반환하오. filters로 후보를 제한할 수 있소."""
+        if k <= 0:
+            return []
+        return self._select_top(*self.score_candidates(query_tokens, self.allowed_mask(filters)), k)
+
+    def top_k_batch(self, queries_tokens: List[List[str]], k: int,
+                    filters: Optional[dict] = None) -> List[List[tuple]]:
+        """여러 질의를 한 번의 벡터 연산으로 채점하여 질의별 상위 k개를 반환하오."""
+        n_docs = len(self)
+        allowed = self.allowed_mask(filters)
+        keys, contributions = [], []
+        for query_index, query_tokens in enumerate(queries_tokens):
+            for docs, contribution in self._postings(query_tokens, allowed):
+                # (질의 번호, 문서 번호)를 하나의 정수 키로 묶어 한꺼번에 합산하오
+                keys.append(query_index * n_docs + docs.astype(np.int64))
+                contributions.append(contribution)
+
+        results = [[] for _ in queries_tokens]
+        if not keys or k <= 0:
+            return results
+
+        unique_keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        scores = np.bincount(
+            inverse,
+            weights=np.concatenate(contributions).astype(np.float64),
+            minlength=len(unique_keys),
+        )
+        query_ids = unique_keys // n_docs
+        doc_ids = unique_keys % n_docs
+        # unique_keys가 정렬되어 있으므로 질의별 구간을 이분 탐색으로 자르오
+        bounds = np.searchsorted(query_ids, np.arange(len(queries_tokens) + 1))
+        for query_index in range(len(queries_tokens)):
+            start, end = bounds[query_index], bounds[query_index + 1]
+            if start < end:
+                results[query_index] = self._select_top(doc_ids[start:end], scores[start:end], k)
+        return results
+
+    def get_document(self, i: int) -> Document:
+        return self.doc_store.get(i)
+
+    def get_tokens(self, i: int) -> List[str]:
+        """i번째 문서의 저장된 토큰 스트림"""
+        if self._terms is None:
+            terms = [None] * len(self.vocab)
+            for term, term_id in self.vocab.items():
+                terms[term_id] = term
+            self._terms = terms
+        start, end = self.doc_tokens_ptr[i], self.doc_tokens_ptr[i + 1]
+        return [self._terms[t] for t in self.doc_tokens[start:end]]
+
+    # ----- 저장 / 불러오기 -----
+
+    def save(self, root_dir: str):
+        """v<컬렉션 버전> 디렉터리에 기록한 뒤 CURRENT를 원자적으로 교체하오."""
+        def write_files(dir_path: str):
+            for array_name in self.ARRAYS:
+                np.save(os.path.join(dir_path, f"{array_name}.npy"), getattr(self, array_name))
+            with open(os.path.join(dir_path, "vocab.json"), "w", encoding="utf-8") as f:
+                json.dump(self.vocab, f, ensure_ascii=False)
+            self.doc_store.save(dir_path)
+            self.metadata_index.save(dir_path)
+
+        meta = {
+            "format_version": self.FORMAT_VERSION,
+            "n_docs": len(self),
+            "n_terms": len(self.vocab),
+            "avgdl": self.avgdl,
+            "tokenizer": self.tokenizer_name,
+            "k1": self.k1,
+            "b": self.b,
+        }
+        write_versioned(root_dir, self.collection_version, meta, write_files)
+
+    @classmethod
+    def load(cls, root_dir: str, expected_version: Optional[int] = None,
+             expected_tokenizer: Optional[str] = None) -> Optional["BM25Index"]:
+        """저장된 인덱스를 메모리 매핑으로 여오. 없거나 컬렉션 버전/토크나이저가 다르면 None이오."""
+        meta = read_current_meta(root_dir, cls.FORMAT_VERSION, expected_version)
+        if meta is None:
+            return None
+        if expected_tokenizer is not None and meta["tokenizer"] != expected_tokenizer:
+            return None
+
+        index_dir = meta["dir"]
+        arrays = {
+            name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+            for name in cls.ARRAYS
+        }
+        with open(os.path.join(index_dir, "vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+        return cls(
+            vocab=vocab,
+            avgdl=meta["avgdl"],
+            doc_store=DocStore.open(index_dir),
+            tokenizer_name=meta["tokenizer"],
+            k1=meta["k1"],
+            b=meta["b"],
+            collection_version=meta["collection_version"],
+            metadata_index=MetadataIndex.load(index_dir),
+            **arrays,
+        )
@@ -0,0 +1,64 @@
+import hashlib
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import Config
+
+# MinHash 순열 (a * h + b) mod p. h < 2^32, a < 2^31이라 곱이 uint64를 넘지 않소
+_PRIME = np.uint64((1 << 31) - 1)
+_NUM_PERM = 64
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, (1 << 31) - 1, _NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 31) - 1, _NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    """공백 차이를 무시하도록 연속 공백을 하나로 줄이오."""
+    return " ".join(text.split())
+
+
+def content_key(text: str) -> str:
+    """공백을 정리한 본문의 해시 (같은 청크 판별용)"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def minhash_signature(text: str, shingle_size: int = None) -> np.ndarray:
+    """문자 shingle 집합의 MinHash 서명 (_NUM_PERM개)"""
+    shingle_size = shingle_size or Config.DEDUP_SHINGLE_SIZE
+    codepoints = np.frombuffer(normalize_text(text).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    n = max(len(codepoints) - shingle_size + 1, 1)
+    # 모든 위치의 shingle 해시(32비트)를 한 번에 계산하오
+    hashes = np.zeros(n, dtype=np.uint64)
+    for offset in range(min(shingle_size, len(codepoints))):
+        hashes = (hashes * np.uint64(1000003) + codepoints[offset:offset + n]) & np.uint64(0xFFFFFFFF)
+    hashes = np.unique(hashes)
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def dedup_documents(docs: List[Document], near_threshold: float = None) -> List[Document]:
+    """순위대로 훑으며 완전 중복(본문 해시)과 유사 중복(MinHash Jaccard >= near_threshold)을 버리오.
+
+    앞쪽(순위 높은) 청크를 남기므로 병합 순위가 그대로 유지되오.
+    """
+    near_threshold = Config.DEDUP_NEAR_THRESHOLD if near_threshold is None else near_threshold
+    seen, kept, signatures = set(), [], []
+    for doc in docs:
+        key = content_key(doc.page_content)
+        if key in seen:
+            continue
+        seen.add(key)
+        if near_threshold < 1.0:
+            signature = minhash_signature(doc.page_content)
+            if any(estimated_jaccard(signature, other) >= near_threshold for other in signatures):
+                continue
+            signatures.append(signature)
+        kept.append(doc)
+    return kept
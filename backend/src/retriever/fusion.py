@@ -0,0 +1,104 @@
+from typing import List, Sequence
+
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.retriever.dedup import content_key, dedup_documents
+
+
+class FusionEngine:
+    """여러 갈래의 (문서, 점수) 목록을 하나로 융합하고, 적응형 k와 글자 예산으로 잘라내는 단계
+
+    융합 방식:
+        "rrf"     순위 역수 가중합 weight / (rank + c) - 점수 척도가 다른 갈래도 안전하게 합침
+        "minmax"  갈래별 점수를 [0, 1]로 정규화한 뒤 가중합 - 점수 차이(확신 정도)가 살아 있음
+
+    선택:
+        융합 점수 내림차순으로 훑으며 min_k개를 채운 뒤에는, 앞 문서 대비 cliff_ratio 아래로
+        떨어지거나 1위 대비 min_relative_score 아래가 되면 멈추오. (쉬운 질문은 적게, 어려운 질문은 많이)
+        0점 이하(재순위기가 채점하지 못한 후보 등)도 min_k를 채운 뒤에는 넣지 않소.
+        본문 글자 수 합이 char_budget을 넘는 문서부터는 넣지 않소. (1위 문서는 항상 포함)
+
+    반환하는 문서의 metadata["relevance_score"]에 융합 점수를 담소.
+    """
+
+    METHODS = ("rrf", "minmax")
+
+    def __init__(self, method: str = None, weights: Sequence[float] = None, rrf_c: int = 60,
+                 min_k: int = None, max_k: int = None, cliff_ratio: float = None,
+                 min_relative_score: float = None, char_budget: int = None):
+        self.method = method or Config.FUSION_METHOD
+        if self.method not in self.METHODS:
+            raise ValueError(f"허허, '{self.method}'는 알 수 없는 융합 방식이오. ({', '.join(self.METHODS)})")
+        self.weights = tuple(Config.FUSION_WEIGHTS if weights is None else weights)
+        self.rrf_c = rrf_c
+        self.min_k = Config.FUSION_MIN_K if min_k is None else min_k
+        self.max_k = Config.FUSION_MAX_K if max_k is None else max_k
+        self.cliff_ratio = Config.FUSION_CLIFF_RATIO if cliff_ratio is None else cliff_ratio
+        self.min_relative_score = (Config.FUSION_MIN_RELATIVE_SCORE
+                                   if min_relative_score is None else min_relative_score)
+        self.char_budget = Config.FUSION_CHAR_BUDGET if char_budget is None else char_budget
+
+    @property
+    def signature(self) -> tuple:
+        """결과에 영향을 주는 설정 (검색 캐시 키용)"""
+        return (self.method, self.weights, self.rrf_c, self.min_k, self.max_k,
+                self.cliff_ratio, self.min_relative_score, self.char_budget)
+
+    @staticmethod
+    def _minmax(scores: List[float]) -> List[float]:
+        low, high = min(scores), max(scores)
+        if high == low:
+            return [1.0] * len(scores)
+        return [(score - low) / (high - low) for score in scores]
+
+    def fuse(self, legs: Sequence[List[tuple]]) -> List[tuple]:
+        """갈래별 (문서, 점수) 목록(점수 내림차순)을 융합하여 (문서, 융합 점수) 내림차순으로 반환하오.
+
+        같은 청크(본문 해시)는 하나로 합치고, 유사 중복은 순위 낮은 쪽을 버리오.
+        """
+        fused, docs = {}, {}
+        for weight, hits in zip(self.weights, legs):
+            if not hits:
+                continue
+            if self.method == "rrf":
+                contributions = [weight / (rank + self.rrf_c) for rank in range(1, len(hits) + 1)]
+            else:
+                contributions = [weight * s for s in self._minmax([score for _, score in hits])]
+            for (doc, _), contribution in zip(hits, contributions):
+                key = content_key(doc.page_content)
+                fused[key] = fused.get(key, 0.0) + contribution
+                docs.setdefault(key, doc)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)
+        kept = {id(doc) for doc in dedup_documents([docs[key] for key in ranked])}
+        return [(docs[key], fused[key]) for key in ranked if id(docs[key]) in kept]
+
+    def select(self, scored: List[tuple]) -> List[tuple]:
+        """적응형 k와 글자 예산으로 앞쪽 문서만 남기오."""
+        selected, used_chars = [], 0
+        top_score = scored[0][1] if scored else 0.0
+        for doc, score in scored[:self.max_k]:
+            if len(selected) >= self.min_k:
+                previous = selected[-1][1]
+                if (score < previous * self.cliff_ratio or score < top_score * self.min_relative_score
+                        or score <= 0 < top_score):
+                    break
+            if selected and used_chars + len(doc.page_content) > self.char_budget:
+                break
+            selected.append((doc, score))
+            used_chars += len(doc.page_content)
+        return selected
+
+    @staticmethod
+    def to_documents(scored: List[tuple]) -> List[Document]:
+        """(문서, 점수)를 metadata["relevance_score"]에 점수를 담은 문서로 바꾸오."""
+        return [
+            Document(id=doc.id, page_content=doc.page_content,
+                     metadata={**(doc.metadata or {}), "relevance_score": score})
+            for doc, score in scored
+        ]
+
+    def run(self, legs: Sequence[List[tuple]]) -> List[Document]:
+        """융합 -> 선택까지 거친 문서 목록 (metadata["relevance_score"]에 융합 점수)"""
+        return self.to_documents(self.select(self.fuse(legs)))
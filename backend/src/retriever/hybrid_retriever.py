@@ -1,70 +1,333 @@
-try:
-    from langchain.retrievers import EnsembleRetriever
-    _HAS_ENSEMBLE = True
-except Exception:
-    _HAS_ENSEMBLE = False
+import asyncio
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List
 
-from src.vector_store.manager import VectorDBManager
+from langchain_core.documents import Document
+
+from src.common.log import get_logger
+from src.config import Config
+from src.retriever.fusion import FusionEngine
+from src.retriever.metadata_index import normalize_filters, to_chroma_where
+from src.retriever.reranker import get_reranker
+from src.vector_store.manager import BM25Retriever, VectorDBManager
+from src.vector_store.numpy_store import NumpyVectorRetriever
+
+log = get_logger("retriever.hybrid")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    """프로세스 전체에서 공유하는 검색용 스레드 풀을 반환하오."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.RETRIEVAL_MAX_WORKERS, thread_name_prefix="retrieval"
+                )
+    return _executor
 
 
 class HybridRetriever:
     """벡터(의미)와 BM25(키워드)를 결합하여 검색 정확도를 높이는 간단한 하이브리드 리트리버.
 
-    런타임에 `langchain.retrievers.EnsembleRetriever`를 사용할 수 없으면
-    내부적으로 두 리트리버의 결과를 병합하는 간단한 폴백을 사용하오.
+    두 갈래를 공유 스레드 풀에서 동시에 돌려 지연 시간이 느린 쪽 하나만큼만 걸리게 하고,
+    갈래별 제한 시간(RETRIEVAL_LEG_TIMEOUT)을 넘긴 갈래는 버리오. (벡터가 늦으면 BM25만 사용)
+    갈래마다 후보 FUSION_CANDIDATES개를 점수와 함께 받아 FusionEngine(가중치 FUSION_WEIGHTS,
+    기본 BM25 0.7 / 벡터 0.3)으로 융합하고, 적응형 k와 글자 예산에 맞는 문서만 돌려주오.
+
+    재순위기(RERANKER)를 켜면 갈래마다 후보를 RERANK_CANDIDATES개까지 넓게 받아, 융합 상위
+    후보를 재순위기로 다시 채점한 뒤 그 점수로 적응형 k를 고르오. (프롬프트 크기는 그대로)
+
+    filters(level/category/source)가 주어지면 두 갈래 모두 채점 전에 후보를 거르오.
+    (BM25/NumPy는 메타데이터 색인, Chroma는 where 절)
+
+    결과는 매니저의 검색 캐시에 (정규화한 질의, 컬렉션, k, 필터, 컬렉션 버전) 키로 담아 두오.
+    적재로 컬렉션 버전이 오르면 키가 달라지고, 검색마다 쥐고 있는 BM25/NumPy 산출물의 버전도
+    견주어 다르면 새로 받아 오므로(refresh) 옛 청크를 돌려주는 일은 없소.
+    갈래 하나가 빠진(시간 초과/오류) 결과는 담지 않소.
     """
 
-    def __init__(self, db_manager: VectorDBManager, collection_name: str):
-        vector_retriever = db_manager.get_vector_retriever(collection_name)
-        bm25_retriever = db_manager.get_bm25_retriever(collection_name)
+    def __init__(self, db_manager: VectorDBManager, collection_name: str,
+                 leg_timeout: float = None, candidate_k: int = None, fusion: FusionEngine = None,
+                 reranker: str = None):
+        self.reranker = get_reranker(reranker)  # 이름 ("none"이면 사용 안 함, 생략하면 설정 RERANKER)
+        if candidate_k is None:
+            candidate_k = Config.FUSION_CANDIDATES
+            if self.reranker is not None:
+                candidate_k = max(candidate_k, Config.RERANK_CANDIDATES)
+        vector_retriever = db_manager.get_vector_retriever(collection_name, k=candidate_k)
+        bm25_retriever = db_manager.get_bm25_retriever(collection_name, k=candidate_k)
 
         if bm25_retriever is None:
             raise ValueError("BM25 리트리버가 준비되지 않았구려. 먼저 Ingest를 수행하시오.")
 
-        if _HAS_ENSEMBLE:
-            self.ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_retriever],
-                weights=[0.7, 0.3],
-            )
-            self._use_ensemble = True
-        else:
-            # 폴백: 단순 병합 로직 사용
-            self._use_ensemble = False
-            self._bm25 = bm25_retriever
-            self._vector = vector_retriever
-
-    def retrieve(self, query: str):
-        """최종 하이브리드 검색 결과를 반환하오."""
-        print(f"--- 하이브리드 도술로 '{query}'의 근거를 찾고 있소 ---")
-        if self._use_ensemble:
-            return self.ensemble_retriever.get_relevant_documents(query)
-
-        # 폴백 병합: BM25 결과 우선으로 두고 중복은 제거하오.
-        # VectorStore retriever는 invoke() 또는 get_relevant_documents() 사용
+        self._bm25 = bm25_retriever
+        self._vector = vector_retriever
+        self._embeddings = db_manager.embedding_func
+        self.db_manager = db_manager
+        self.collection_name = collection_name
+        self.cache = db_manager.retrieval_cache
+        self.leg_timeout = Config.RETRIEVAL_LEG_TIMEOUT if leg_timeout is None else leg_timeout
+        self.fusion = fusion or FusionEngine()
+
+    @property
+    def embeddings(self):
+        """질의 임베딩 모델 (벡터 갈래와 같은 질의 캐시를 쓰는 CachedEmbeddings)"""
+        return self._embeddings
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """캐시 키용 질의 정규화 (유니코드 NFKC, 소문자, 공백 정리)"""
+        return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+    def cache_key(self, query: str, filters=None, version: int = None) -> tuple:
+        if version is None:
+            version = self.db_manager.get_index_version(self.collection_name)
+        return (
+            self.normalize_query(query),
+            self.collection_name,
+            self._bm25.k,
+            self.vector_k,
+            self.fusion.signature,
+            self.reranker.signature if self.reranker is not None else None,
+            normalize_filters(filters),
+            version,
+        )
+
+    def refresh(self, version: int) -> bool:
+        """쥐고 있는 BM25/NumPy 산출물이 컬렉션 버전과 다르면 매니저에서 새로 받아 오오.
+
+        리트리버는 서버가 떠 있는 동안 계속 쓰이므로, 다른 프로세스의 적재로 버전이 오르면
+        여기서 바꿔 끼워야 지운 청크를 돌려주거나 새 청크를 놓치지 않소.
+        Returns:
+            두 산출물이 모두 version과 맞으면 True (아니면 결과를 캐시에 담지 않음)
+        """
+        index = self._bm25.index
+        if index is None or index.collection_version != version:
+            log.info("BM25 인덱스가 컬렉션 버전 %s와 달라 다시 불러오오.", version)
+            self._bm25 = (self.db_manager.get_bm25_retriever(self.collection_name, k=self._bm25.k)
+                          or BM25Retriever(index=None, k=self._bm25.k))
+        if isinstance(self._vector, NumpyVectorRetriever) and self._vector.store.collection_version != version:
+            log.info("NumPy 벡터 인덱스가 컬렉션 버전 %s와 달라 다시 불러오오.", version)
+            try:
+                self._vector = self.db_manager.get_vector_retriever(self.collection_name, k=self._vector.k)
+            except ValueError as e:
+                log.warning("NumPy 벡터 인덱스를 다시 불러오지 못했소: %s", e)
+
+        index = self._bm25.index
+        fresh = index is not None and index.collection_version == version
+        if isinstance(self._vector, NumpyVectorRetriever):
+            fresh = fresh and self._vector.store.collection_version == version
+        return fresh
+
+    def _remember(self, key: tuple, docs, bm25_docs, vector_docs, started: float, fresh: bool = True):
+        """두 갈래가 모두 제때 돌아온 결과만 캐시에 담소. (계산에 든 시간을 함께 기록)
+
+        산출물이 키의 컬렉션 버전과 맞지 않았으면(fresh=False) 담지 않소.
+        """
+        if fresh and bm25_docs is not None and vector_docs is not None:
+            self.cache.set(key, tuple(docs), cost=time.perf_counter() - started)
+
+    def _search_bm25(self, query: str, filters=None) -> List[tuple]:
+        """(문서, BM25 점수) 상위 후보"""
+        return self._bm25.search_with_scores(query, filters)
+
+    def _search_vector(self, query: str, filters=None) -> List[tuple]:
+        """(문서, 유사도) 상위 후보. Chroma는 거리를 음수로 바꿔 클수록 가깝게 맞추오."""
+        if isinstance(self._vector, NumpyVectorRetriever):
+            return self._vector.search_with_scores(query, filters)
+        hits = self._vector.vectorstore.similarity_search_with_score(
+            query, k=self.vector_k, filter=to_chroma_where(filters)
+        )
+        return [(doc, -distance) for doc, distance in hits]
+
+    @staticmethod
+    def _collect(name: str, future, deadline: float):
+        """갈래 결과를 마감 시각까지 기다리오. 시간 초과/오류면 None이오."""
         try:
-            bm25_docs = self._bm25.get_relevant_documents(query)
-        except Exception:
-            bm25_docs = []
-        
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            log.warning("%s 검색이 제한 시간을 넘겨 제외하오.", name)
+        except Exception as e:
+            log.warning("%s 검색 실패로 제외하오: %s", name, e)
+        return None
+
+    def merge(self, query: str, bm25_hits, vector_hits) -> List[Document]:
+        """두 갈래의 (문서, 점수) 후보를 융합하고 적응형 k/글자 예산으로 잘라내오.
+
+        같은 청크(본문 해시)와 유사 중복(MinHash)은 하나만 남기오.
+        재순위기가 있으면 융합 상위 RERANK_CANDIDATES개를 시간 예산 안에서 다시 채점한 뒤 고르오.
+        """
+        scored = self.fusion.fuse([bm25_hits, vector_hits])
+        if self.reranker is not None and scored:
+            scored = self.reranker.rerank(query, scored[:Config.RERANK_CANDIDATES])
+        return self.fusion.to_documents(self.fusion.select(scored))
+
+    def retrieve(self, query: str, filters=None):
+        """최종 하이브리드 검색 결과를 반환하오.
+
+        Args:
+            filters: 예) {"level": "basic"}, {"category": ["stb_healing", "health_management"]}
+        """
+        log.debug("하이브리드 도술로 '%s'의 근거를 찾고 있소", query)
+        # 알 수 없는 필드는 검색 전에 거절하오 (갈래 오류는 아래에서 삼키므로)
+        filters = filters if normalize_filters(filters) else None
+        version = self.db_manager.get_index_version(self.collection_name)
+        key = self.cache_key(query, filters, version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            log.debug("검색 결과 캐시 적중")
+            return list(cached)
+
+        started = time.perf_counter()
+        fresh = self.refresh(version)
+        executor = get_retrieval_executor()
+        deadline = time.monotonic() + self.leg_timeout
+        bm25_future = executor.submit(self._search_bm25, query, filters)
+        vector_future = executor.submit(self._search_vector, query, filters)
+
+        bm25_docs = self._collect("BM25", bm25_future, deadline)
+        vector_docs = self._collect("벡터", vector_future, deadline)
+        docs = self.merge(query, bm25_docs or [], vector_docs or [])
+        self._remember(key, docs, bm25_docs, vector_docs, started, fresh)
+        return docs
+
+    @property
+    def vector_k(self) -> int:
+        if isinstance(self._vector, NumpyVectorRetriever):
+            return self._vector.k
+        return self._vector.search_kwargs.get("k", 4)
+
+    def _search_vector_batch(self, queries: List[str], filters=None) -> List[List[tuple]]:
+        """질의 임베딩을 한 번의 배치 요청으로 만들고, 다중 질의 검색 한 번으로 찾소."""
+        query_embeddings = self._embeddings.embed_queries(queries)
+        if isinstance(self._vector, NumpyVectorRetriever):
+            store = self._vector.store
+            results = store.search_batch(query_embeddings, self.vector_k, filters)
+            return [[(store.get_document(i), score) for i, score in hits] for hits in results]
+
+        # Chroma는 query_embeddings 여러 개를 한 번의 query 호출로 받소
+        collection = self._vector.vectorstore._collection
+        response = collection.query(
+            query_embeddings=query_embeddings,
+            n_results=self.vector_k,
+            where=to_chroma_where(filters),
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [(Document(id=i, page_content=text, metadata=metadata or {}), -distance)
+             for i, text, metadata, distance in zip(ids, texts, metadatas, distances)]
+            for ids, texts, metadatas, distances in zip(
+                response["ids"], response["documents"], response["metadatas"], response["distances"]
+            )
+        ]
+
+    def retrieve_many(self, queries: List[str], filters=None) -> List[dict]:
+        """여러 질의를 한꺼번에 검색하오. (오프라인 평가, 자주 묻는 질문 미리 계산/캐시 예열용)
+
+        캐시에 없는 질의만 모아, 질의 임베딩은 배치 요청 한 번, 벡터 검색은 다중 질의 검색 한 번,
+        BM25는 벡터화된 채점 한 번으로 처리하고, 두 갈래는 공유 스레드 풀에서 동시에 돌리오.
+        계산한 결과는 검색 캐시에 담기므로 이후 retrieve가 바로 적중하오.
+
+        Returns:
+            질의 순서대로 {"query", "documents", "cached", "timings"} 목록.
+            timings(ms)의 bm25/vector는 배치 전체 시간을 계산한 질의 수로 나눈 몫이오.
+        """
+        if not queries:
+            return []
+        filters = filters if normalize_filters(filters) else None
+        started = time.perf_counter()
+
+        version = self.db_manager.get_index_version(self.collection_name)
+        keys = [self.cache_key(query, filters, version) for query in queries]
+        results = [None] * len(queries)
+        for i, (query, key) in enumerate(zip(queries, keys)):
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = {"query": query, "documents": list(cached), "cached": True, "timings": {}}
+        # 캐시에 없는 질의만 (중복 없이) 계산하오
+        pending = list(dict.fromkeys(key for key, result in zip(keys, results) if result is None))
+        if not pending:
+            return results
+        pending_queries = [queries[keys.index(key)] for key in pending]
+        fresh = self.refresh(version)
+
+        def timed(func, *args):
+            t0 = time.perf_counter()
+            result = func(*args)
+            return result, (time.perf_counter() - t0) * 1000
+
+        executor = get_retrieval_executor()
+        bm25_future = executor.submit(timed, self._bm25.batch_search_with_scores, pending_queries, filters)
+        vector_future = executor.submit(timed, self._search_vector_batch, pending_queries, filters)
+        bm25_results, bm25_ms = bm25_future.result()
+        vector_results, vector_ms = vector_future.result()
+
+        computed = {}
+        share_ms = (bm25_ms + vector_ms) / len(pending)
+        for key, query, bm25_docs, vector_docs in zip(pending, pending_queries, bm25_results, vector_results):
+            t0 = time.perf_counter()
+            docs = self.merge(query, bm25_docs, vector_docs)
+            merge_ms = (time.perf_counter() - t0) * 1000
+            if fresh:
+                self.cache.set(key, tuple(docs), cost=(share_ms + merge_ms) / 1000)
+            computed[key] = (docs, {
+                "bm25_ms": bm25_ms / len(pending),
+                "vector_ms": vector_ms / len(pending),
+                "merge_ms": merge_ms,
+            })
+        for i, (query, key) in enumerate(zip(queries, keys)):
+            if results[i] is None:
+                docs, timings = computed[key]
+                results[i] = {"query": query, "documents": list(docs), "cached": False, "timings": timings}
+
+        total_ms = (time.perf_counter() - started) * 1000
+        log.info("질의 %d개 일괄 검색 완료 (계산 %d개): %.0fms (BM25 %.0fms, 벡터 %.0fms)",
+                 len(queries), len(pending), total_ms, bm25_ms, vector_ms)
+        return results
+
+    @staticmethod
+    async def _acollect(name: str, future, timeout: float):
+        """_collect의 비동기판. 기다리는 동안 이벤트 루프를 놓아주오."""
         try:
-            # VectorStoreRetriever는 invoke 메서드 사용
-            if hasattr(self._vector, 'get_relevant_documents'):
-                vector_docs = self._vector.get_relevant_documents(query)
-            elif hasattr(self._vector, 'invoke'):
-                vector_docs = self._vector.invoke(query)
-            else:
-                vector_docs = []
-        except Exception:
-            vector_docs = []
-
-        seen_ids = set()
-        merged = []
-        for d in bm25_docs + vector_docs:
-            doc_id = getattr(d, 'doc_id', None) or getattr(d, 'id', None)
-            key = doc_id or (getattr(d, 'metadata', {}).get('source_url') if hasattr(d, 'metadata') else None)
-            if key in seen_ids:
-                continue
-            seen_ids.add(key)
-            merged.append(d)
-
-        return merged
\ No newline at end of file
+            return await asyncio.wait_for(future, timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            log.warning("%s 검색이 제한 시간을 넘겨 제외하오.", name)
+        except Exception as e:
+            log.warning("%s 검색 실패로 제외하오: %s", name, e)
+        return None
+
+    async def aretrieve(self, query: str, filters=None):
+        """retrieve의 비동기판. 두 갈래를 공유 스레드 풀에서 돌리고 await로 기다리오.
+
+        컬렉션 버전 조회(Chroma), 산출물 다시 불러오기, 융합/중복 제거/재순위도 막히는 작업이므로
+        모두 스레드로 넘겨 이벤트 루프를 붙잡지 않소.
+        """
+        log.debug("하이브리드 도술로 '%s'의 근거를 찾고 있소", query)
+        filters = filters if normalize_filters(filters) else None
+        version = await asyncio.to_thread(self.db_manager.get_index_version, self.collection_name)
+        key = self.cache_key(query, filters, version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            log.debug("검색 결과 캐시 적중")
+            return list(cached)
+
+        started = time.perf_counter()
+        fresh = await asyncio.to_thread(self.refresh, version)
+        loop = asyncio.get_running_loop()
+        executor = get_retrieval_executor()
+        deadline = time.monotonic() + self.leg_timeout
+        bm25_future = loop.run_in_executor(executor, self._search_bm25, query, filters)
+        vector_future = loop.run_in_executor(executor, self._search_vector, query, filters)
+
+        bm25_docs = await self._acollect("BM25", bm25_future, deadline - time.monotonic())
+        vector_docs = await self._acollect("벡터", vector_future, deadline - time.monotonic())
+        docs = await asyncio.to_thread(self.merge, query, bm25_docs or [], vector_docs or [])
+        self._remember(key, docs, bm25_docs, vector_docs, started, fresh)
+        return docs
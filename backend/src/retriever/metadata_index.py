@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+FilterValue = Union[str, List[str]]
+
+# 검색 필터로 쓸 수 있는 메타데이터 필드 (크롤러가 붙이는 level/category와 출처)
+FILTER_FIELDS = ("level", "category", "source")
+
+
+def normalize_filters(filters: Optional[Dict[str, FilterValue]]) -> tuple:
+    """필터를 정렬된 튜플로 바꾸오. 캐시 키로 쓰고, 알 수 없는 필드는 거절하오.
+
+    예) {"level": "basic", "category": ["a", "b"]} -> (("category", ("a", "b")), ("level", ("basic",)))
+    """
+    if not filters:
+        return ()
+    normalized = []
+    for field, value in filters.items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"허허, '{field}'로는 거를 수 없소. ({', '.join(FILTER_FIELDS)} 중에서 고르시오)")
+        values = (value,) if isinstance(value, str) else tuple(value)
+        normalized.append((field, tuple(sorted(set(values)))))
+    return tuple(sorted(normalized))
+
+
+def to_chroma_where(filters: Optional[Dict[str, FilterValue]]) -> Optional[dict]:
+    """필터를 Chroma where 절로 바꾸오. (필드 사이 AND, 값 목록은 OR)"""
+    clauses = [
+        {field: values[0]} if len(values) == 1 else {field: {"$in": list(values)}}
+        for field, values in normalize_filters(filters)
+    ]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class MetadataIndex:
+    """메타데이터 값 -> 문서 번호 posting list 색인
+
+    필터에 맞는 문서를 채점 전에 골라내어, BM25와 벡터 검색이 그 후보만 보게 하오.
+    필터 조합별 비트맵(bool 배열)은 몇 개만 쓰이므로 만들어 둔 것을 재사용하오.
+    """
+
+    FILE = "metadata_index.json"
+    POSTINGS_FILE = "metadata_postings.npy"
+    MAX_CACHED_MASKS = 64
+
+    def __init__(self, ranges: Dict[str, Dict[str, List[int]]], postings: np.ndarray, n_docs: int):
+        self.ranges = ranges  # 필드 -> 값 -> [postings 시작, 끝]
+        self.postings = postings
+        self.n_docs = n_docs
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, metadatas: List[dict], fields=FILTER_FIELDS) -> "MetadataIndex":
+        lists = {field: {} for field in fields}
+        for doc_index, metadata in enumerate(metadatas):
+            for field in fields:
+                value = (metadata or {}).get(field)
+                if value is not None:
+                    lists[field].setdefault(str(value), []).append(doc_index)
+
+        ranges, chunks, offset = {}, [], 0
+        for field, values in lists.items():
+            ranges[field] = {}
+            for value, doc_ids in values.items():
+                ranges[field][value] = [offset, offset + len(doc_ids)]
+                chunks.append(np.asarray(doc_ids, dtype=np.int32))
+                offset += len(doc_ids)
+        postings = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        return cls(ranges, postings, len(metadatas))
+
+    def _doc_ids_for(self, field: str, values: tuple) -> np.ndarray:
+        parts = []
+        for value in values:
+            bounds = self.ranges.get(field, {}).get(value)
+            if bounds:
+                parts.append(self.postings[bounds[0]:bounds[1]])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+
+    def mask(self, filters: Optional[Dict[str, FilterValue]]) -> Optional[np.ndarray]:
+        """필터에 맞는 문서 비트맵. 필터가 없으면 None(전체)이오."""
+        key = normalize_filters(filters)
+        if not key:
+            return None
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.ones(self.n_docs, dtype=bool)
+            for field, values in key:
+                field_mask = np.zeros(self.n_docs, dtype=bool)
+                field_mask[self._doc_ids_for(field, values)] = True
+                mask &= field_mask
+            with self._lock:
+                if len(self._masks) >= self.MAX_CACHED_MASKS:
+                    self._masks.clear()
+                self._masks[key] = mask
+        return mask
+
+    def doc_ids(self, filters: Optional[Dict[str, FilterValue]]) -> Optional[np.ndarray]:
+        """필터에 맞는 문서 번호 (오름차순). 필터가 없으면 None(전체)이오."""
+        mask = self.mask(filters)
+        return None if mask is None else np.flatnonzero(mask)
+
+    def save(self, dir_path: str):
+        np.save(os.path.join(dir_path, self.POSTINGS_FILE), self.postings)
+        with open(os.path.join(dir_path, self.FILE), "w", encoding="utf-8") as f:
+            json.dump({"n_docs": self.n_docs, "ranges": self.ranges}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, dir_path: str) -> "MetadataIndex":
+        with open(os.path.join(dir_path, cls.FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        postings = np.load(os.path.join(dir_path, cls.POSTINGS_FILE), mmap_mode="r")
+        return cls(data["ranges"], postings, data["n_docs"])
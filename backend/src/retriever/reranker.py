@@ -0,0 +1,189 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.common.log import get_logger
+from src.config import Config
+from src.processor.tokenizer import get_tokenizer
+
+log = get_logger("retriever.rerank")
+
+
+class BaseReranker(ABC):
+    """융합된 후보를 질의와 함께 다시 채점하는 2단계 재순위기의 공통 규격
+
+    후보를 융합 순위대로 batch_size개씩 채점하다가 시간 예산(budget_ms)을 넘기면 멈추고,
+    채점하지 못한 후보는 0점으로 채점한 후보 뒤에 원래 순서대로 붙이오. (예산이 응답 지연의 상한)
+    채점한 후보의 점수는 최소-최대로 [0, 1]에 펴서 적응형 k 선택(FusionEngine.select)에 넘기오.
+    (흔한 단어 하나만 맞은 후보들이 1위와 비슷한 절대 점수를 받아 k가 넓어지는 일을 막소)
+    """
+
+    name = "base"
+
+    def __init__(self, batch_size: int = None, budget_ms: float = None):
+        self.batch_size = batch_size or Config.RERANK_BATCH_SIZE
+        self.budget_ms = Config.RERANK_BUDGET_MS if budget_ms is None else budget_ms
+
+    @abstractmethod
+    def score_batch(self, query: str, docs: List[Document]) -> np.ndarray:
+        """문서 묶음의 관련도 점수 ([0, 1])"""
+        pass
+
+    @property
+    def signature(self) -> tuple:
+        """결과에 영향을 주는 설정 (검색 캐시 키용). 예산/배치 크기는 채점할 후보 수를 바꾸오."""
+        return (self.name, self.budget_ms, self.batch_size)
+
+    @staticmethod
+    def _minmax(scored: List[tuple]) -> List[tuple]:
+        """채점한 (문서, 점수)를 [0, 1]로 펴오. 모두 같으면 1.0이오. (FusionEngine의 minmax와 같은 규칙)"""
+        if not scored:
+            return scored
+        low, high = min(score for _, score in scored), max(score for _, score in scored)
+        if high == low:
+            return [(doc, 1.0) for doc, _ in scored]
+        return [(doc, (score - low) / (high - low)) for doc, score in scored]
+
+    def rerank(self, query: str, candidates: List[tuple], budget_ms: float = None) -> List[tuple]:
+        """(문서, 융합 점수) 후보를 (문서, 재순위 점수) 내림차순으로 바꾸오."""
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        deadline = time.perf_counter() + budget_ms / 1000
+        scored = []
+        position = 0
+        while position < len(candidates) and (not scored or time.perf_counter() < deadline):
+            batch = candidates[position:position + self.batch_size]
+            scores = self.score_batch(query, [doc for doc, _ in batch])
+            scored.extend((doc, float(score)) for (doc, _), score in zip(batch, scores))
+            position += len(batch)
+
+        scored = self._minmax(sorted(scored, key=lambda item: item[1], reverse=True))
+        rest = candidates[position:]
+        if rest:
+            log.debug("시간 예산(%.0fms) 초과로 후보 %d개는 채점하지 못했소.", budget_ms, len(rest))
+            # 채점하지 못한 후보는 0점으로 뒤에 붙이오 (순서는 유지). 최저점의 몇 분의 1로 두면
+            # 앞 후보 대비 비율이 절벽 비율과 같아져 적응형 k가 자르지 못하므로, min_k를 채울
+            # 때만 쓰이고 그 뒤로는 절벽/상대 점수 규칙에 걸려 선택되지 않게 하오
+            scored.extend((doc, 0.0) for doc, _ in rest)
+        return scored
+
+
+class LexicalProximityReranker(BaseReranker):
+    """질의어 포함 비율과 근접도(질의어가 모여 나오는 가장 짧은 구간)로 채점하는 재순위기
+
+    외부 모델 없이 돌아가며, BM25와 같은 토크나이저로 질의/문서를 나누오.
+    점수 = 0.7 * (문서에 나온 질의어 비율) + 0.3 * (나온 질의어 수 / 그것들을 모두 덮는 최단 구간 길이)
+    근접도는 질의어가 둘 이상 나왔을 때만 주오. (한 단어만 맞으면 구간이 1이라 늘 만점이 되므로)
+    """
+
+    name = "lexical"
+
+    def __init__(self, tokenizer_name: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.tokenizer = get_tokenizer(tokenizer_name)
+        self._tokenize_doc = lru_cache(maxsize=8192)(self.tokenizer._tokenize_tuple)
+
+    @property
+    def signature(self) -> tuple:
+        return super().signature + (self.tokenizer.name,)
+
+    @staticmethod
+    def _min_span(tokens: Tuple[str, ...], terms: set) -> int:
+        """terms를 모두 담는 가장 짧은 연속 구간의 길이 (슬라이딩 윈도)"""
+        need, counts, have = len(terms), Counter(), 0
+        best, left = len(tokens), 0
+        for right, token in enumerate(tokens):
+            if token not in terms:
+                continue
+            counts[token] += 1
+            if counts[token] == 1:
+                have += 1
+            while have == need:
+                best = min(best, right - left + 1)
+                left_token = tokens[left]
+                if left_token in terms:
+                    counts[left_token] -= 1
+                    if counts[left_token] == 0:
+                        have -= 1
+                left += 1
+        return best
+
+    def score_batch(self, query: str, docs: List[Document]) -> np.ndarray:
+        query_terms = set(self.tokenizer.tokenize_query(query))
+        scores = np.zeros(len(docs), dtype=np.float64)
+        if not query_terms:
+            return scores
+        for i, doc in enumerate(docs):
+            tokens = self._tokenize_doc(doc.page_content)
+            matched = query_terms.intersection(tokens)
+            if not matched:
+                continue
+            coverage = len(matched) / len(query_terms)
+            proximity = len(matched) / self._min_span(tokens, matched) if len(matched) >= 2 else 0.0
+            scores[i] = 0.7 * coverage + 0.3 * proximity
+        return scores
+
+
+_cross_encoders = {}
+_cross_encoders_lock = threading.Lock()
+
+
+class CrossEncoderReranker(BaseReranker):
+    """sentence-transformers CrossEncoder(CPU)로 (질의, 문서) 쌍을 채점하는 재순위기 (선택 설치)
+
+    모델은 이름별로 프로세스에서 한 번만 올리고, 출력(logit)은 시그모이드로 [0, 1]에 맞추오.
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.model_name = model_name or Config.RERANK_CROSS_ENCODER_MODEL
+        model = _cross_encoders.get(self.model_name)
+        if model is None:
+            with _cross_encoders_lock:
+                model = _cross_encoders.get(self.model_name)
+                if model is None:
+                    # 선택 의존성이므로 사용할 때만 불러오오
+                    from sentence_transformers import CrossEncoder
+                    model = CrossEncoder(self.model_name, device="cpu")
+                    _cross_encoders[self.model_name] = model
+        self.model = model
+
+    @property
+    def signature(self) -> tuple:
+        return super().signature + (self.model_name,)
+
+    def score_batch(self, query: str, docs: List[Document]) -> np.ndarray:
+        logits = np.asarray(self.model.predict(
+            [(query, doc.page_content) for doc in docs], batch_size=self.batch_size, show_progress_bar=False
+        ), dtype=np.float64)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
+RERANKERS = {
+    LexicalProximityReranker.name: LexicalProximityReranker,
+    CrossEncoderReranker.name: CrossEncoderReranker,
+}
+
+
+def get_reranker(name: str = None):
+    """설정(RERANKER)에 따라 재순위기를 만드오. "none"이면 None이오.
+
+    교차 인코더 의존성(sentence-transformers)이 없으면 lexical 재순위기로 대신하오.
+    """
+    name = name or Config.RERANKER
+    if name == "none":
+        return None
+    if name not in RERANKERS:
+        raise ValueError(f"허허, '{name}'는 알 수 없는 재순위기요. (none, {', '.join(RERANKERS)})")
+    try:
+        return RERANKERS[name]()
+    except ImportError:
+        log.warning("'%s' 재순위기에 필요한 패키지가 없어 lexical로 대신하오.", name)
+        return LexicalProximityReranker()
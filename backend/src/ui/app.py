@@ -6,7 +6,7 @@ import base64
 from pathlib import Path
 from datetime import datetime
 from src.qa.engine import QAEngine
-from src.vector_store.manager import VectorDBManager
+from src.vector_store.manager import get_shared_manager
 from src.retriever.hybrid_retriever import HybridRetriever
 from src.agent.orchestrator import JeonWoochiAgent
 from src.agent.persona_prompt import JeonWoochiPersona
@@ -231,7 +231,8 @@ JEON_WOOCHI_SVG = """
 # 에이전트는 무겁기 때문에 캐싱하여 매번 새로 만들지 않게 함
 @st.cache_resource
 def get_agent(strategy="recursive"):
-    db_manager = VectorDBManager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
+    # 전략이 달라도 매니저(Chroma 클라이언트, 임베딩 클라이언트, 캐시)는 하나를 공유하오
+    db_manager = get_shared_manager(api_key=Config.SOLAR_API_KEY, db_path=Config.DB_PATH)
     collection_name = f"meditation_{strategy}"
     hybrid_retriever = HybridRetriever(db_manager=db_manager, collection_name=collection_name)
     
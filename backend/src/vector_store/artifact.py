@@ -0,0 +1,92 @@
+import json
+import os
+import re
+import shutil
+from typing import Callable, Optional
+
+# 완성된 산출물 디렉터리 이름: v<버전> 또는 같은 버전을 다시 쓴 v<버전>.<번호> (.tmp-<pid>는 작성 중)
+_FINISHED_DIR = re.compile(r"^v(\d+)(?:\.(\d+))?$")
+
+
+def _read_current(root_dir: str):
+    """(CURRENT가 가리키는 디렉터리 이름, meta.json) - 없거나 깨졌으면 (None, None)이오."""
+    try:
+        with open(os.path.join(root_dir, "CURRENT"), encoding="utf-8") as f:
+            name = f.read().strip()
+        with open(os.path.join(root_dir, name, "meta.json"), encoding="utf-8") as f:
+            return name, json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None, None
+
+
+def write_versioned(root_dir: str, version: int, meta: dict, write_files: Callable[[str], None]) -> bool:
+    """컬렉션 버전별 산출물 디렉터리를 기록하고 CURRENT 포인터를 원자적으로 교체하오.
+
+    구조: <root_dir>/CURRENT (현재 디렉터리 이름), <root_dir>/v<버전>/meta.json + 데이터 파일
+    읽는 쪽은 CURRENT가 가리키는 완성된 디렉터리만 보게 되오.
+
+    CURRENT가 이미 같은 버전, 같은 meta의 산출물을 가리키면 다시 쓰지 않소. (적재마다 재구축 방지)
+    읽는 쪽이 매핑하고 있을 수 있는 디렉터리는 덮어쓰지 않고, 같은 버전을 다시 쓸 때는
+    v<버전>.<번호> 새 디렉터리에 쓰오. 정리는 더 낮은 버전의 완성된 디렉터리만 하므로
+    다른 프로세스가 작성 중인 .tmp- 디렉터리는 건드리지 않소.
+
+    Returns:
+        새로 기록했으면 True, 이미 같은 산출물이 있어 건너뛰었으면 False
+    """
+    meta = dict(meta, collection_version=version)
+    current_name, current_meta = _read_current(root_dir)
+    if current_meta is not None and current_meta == json.loads(json.dumps(meta, ensure_ascii=False)):
+        return False
+
+    os.makedirs(root_dir, exist_ok=True)
+    name = f"v{version}"
+    serial = 0
+    while os.path.exists(os.path.join(root_dir, name)):
+        serial += 1
+        name = f"v{version}.{serial}"
+    tmp_dir = os.path.join(root_dir, f"{name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    write_files(tmp_dir)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    try:
+        os.rename(tmp_dir, os.path.join(root_dir, name))
+    except OSError:
+        # 다른 프로세스가 같은 이름을 먼저 차지했으면 그쪽 산출물을 쓰오
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    # 더 새 버전을 이미 가리키고 있으면 포인터를 되돌리지 않소
+    _, current_meta = _read_current(root_dir)
+    if current_meta is None or int(current_meta.get("collection_version", -1)) <= version:
+        current_tmp = os.path.join(root_dir, f"CURRENT.tmp-{os.getpid()}")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(current_tmp, os.path.join(root_dir, "CURRENT"))
+
+    # 더 낮은 버전의 완성된 디렉터리만 정리하오 (다른 프로세스가 매핑 중이라 못 지우면 다음 기회에)
+    for entry in os.listdir(root_dir):
+        match = _FINISHED_DIR.match(entry)
+        if match and int(match.group(1)) < version:
+            shutil.rmtree(os.path.join(root_dir, entry), ignore_errors=True)
+    return True
+
+
+def read_current_meta(root_dir: str, format_version: int,
+                      expected_version: Optional[int] = None) -> Optional[dict]:
+    """CURRENT가 가리키는 산출물의 meta.json을 읽소.
+
+    없거나, 포맷이 다르거나, 컬렉션 버전이 expected_version과 다르면 None이오.
+    반환값의 "dir"에 산출물 디렉터리 경로가 담기오.
+    """
+    name, meta = _read_current(root_dir)
+    if meta is None:
+        return None
+    if meta.get("format_version") != format_version:
+        return None
+    if expected_version is not None and meta.get("collection_version") != expected_version:
+        return None
+    meta["dir"] = os.path.join(root_dir, name)
+    return meta
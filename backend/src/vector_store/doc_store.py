@@ -0,0 +1,82 @@
+import json
+import mmap
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class DocStore:
+    """청크 ID/본문/메타데이터를 담는 읽기 전용 문서 테이블
+
+    디스크에서는 JSON 레코드를 이어 붙인 docs.bin과 레코드 시작 위치 doc_offsets.npy로 저장하고,
+    열 때는 메모리 매핑하여 실제로 꺼내는 문서만 읽소. (전체를 미리 올리지 않음)
+    """
+
+    DATA_FILE = "docs.bin"
+    OFFSETS_FILE = "doc_offsets.npy"
+    IDS_FILE = "doc_ids.json"
+
+    def __init__(self, records: Optional[List[dict]] = None, data=None, offsets=None, dir_path: str = None):
+        self._records = records
+        self._data = data
+        self._offsets = offsets
+        self._dir_path = dir_path
+        self._ids = None
+
+    @classmethod
+    def from_documents(cls, ids: List[str], docs: List[Document]) -> "DocStore":
+        records = [
+            {"id": chunk_id, "page_content": doc.page_content, "metadata": doc.metadata}
+            for chunk_id, doc in zip(ids, docs)
+        ]
+        return cls(records=records)
+
+    def __len__(self) -> int:
+        if self._records is not None:
+            return len(self._records)
+        return len(self._offsets) - 1
+
+    def _record(self, i: int) -> dict:
+        if self._records is not None:
+            return self._records[i]
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return json.loads(self._data[start:end].decode("utf-8"))
+
+    def get_id(self, i: int) -> str:
+        return self._record(i)["id"]
+
+    def ids(self) -> List[str]:
+        """전체 청크 ID 목록 (본문을 읽지 않고 별도 파일에서 가져오오)"""
+        if self._ids is None:
+            if self._records is not None:
+                self._ids = [record["id"] for record in self._records]
+            else:
+                with open(os.path.join(self._dir_path, self.IDS_FILE), encoding="utf-8") as f:
+                    self._ids = json.load(f)
+        return self._ids
+
+    def get(self, i: int) -> Document:
+        record = self._record(i)
+        return Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"] or {})
+
+    def save(self, dir_path: str):
+        offsets = [0]
+        with open(os.path.join(dir_path, self.DATA_FILE), "wb") as f:
+            for i in range(len(self)):
+                line = json.dumps(self._record(i), ensure_ascii=False).encode("utf-8")
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(os.path.join(dir_path, self.OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+        with open(os.path.join(dir_path, self.IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.ids(), f)
+
+    @classmethod
+    def open(cls, dir_path: str) -> "DocStore":
+        offsets = np.load(os.path.join(dir_path, cls.OFFSETS_FILE), mmap_mode="r")
+        data = b""
+        if offsets[-1] > 0:
+            with open(os.path.join(dir_path, cls.DATA_FILE), "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data=data, offsets=offsets, dir_path=dir_path)
@@ -0,0 +1,180 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.common.cache import TTLCache
+from src.config import Config
+
+
+class EmbeddingCache:
+    """(모델명, 텍스트 SHA-256)을 키로 하는 디스크 임베딩 캐시
+
+    같은 텍스트를 다시 적재할 때 임베딩 API를 부르지 않도록 SQLite 파일에 벡터를 보관하오.
+    항목 수가 max_entries를 넘으면 가장 오래 쓰이지 않은 항목부터 지우오.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or Config.EMBEDDING_CACHE_PATH
+        self.max_entries = max_entries or Config.EMBEDDING_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_sha TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_sha))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """텍스트별 캐시된 벡터를 반환하오. 없는 항목은 None이오."""
+        keys = [self.text_key(text) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하려고 나눠서 조회하오
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_sha, vector FROM embeddings WHERE model = ? AND text_sha IN ({placeholders})",
+                    [model, *part],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_sha = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._conn.commit()
+            results = [found.get(key) for key in keys]
+            hit_count = sum(1 for blob in results if blob is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+
+        return [None if blob is None else array("f", blob).tolist() for blob in results]
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        now = time.time()
+        rows = [
+            (model, self.text_key(text), array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_sha, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._size += self._conn.total_changes - before
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+            self._conn.commit()
+
+    def _evict(self, count: int):
+        """가장 오래 쓰이지 않은 항목 count개를 지우오. (잠금을 쥔 상태에서 호출)"""
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (count,),
+        )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """EmbeddingCache를 먼저 확인하고, 없는 텍스트만 원본 임베딩 모델로 계산하는 래퍼
+
+    문서 임베딩은 디스크 캐시(cache)를, 질의 임베딩은 메모리 LRU 캐시(query_cache)를 거치오.
+    질의와 문서에 다른 모델을 쓰는 제공자(Upstage: -query/-passage)가 있으므로, 질의 캐시는
+    model_name으로, 문서 캐시는 문서에 실제로 쓰는 document_model로 키를 잡소.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str = None,
+                 query_cache: Optional[TTLCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.query_cache = query_cache
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+        self.document_model = getattr(embeddings, "document_model", None) or self.model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.document_model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # 같은 배치 안의 중복 텍스트는 한 번만 계산하오
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = self.embeddings.embed_documents(unique_texts)
+            self.cache.put_many(self.document_model, unique_texts, computed)
+            by_text = dict(zip(unique_texts, computed))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_cache is None:
+            return self.embeddings.embed_query(text)
+
+        key = (self.model_name, text)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = tuple(self.embeddings.embed_query(text))
+            self.query_cache.set(key, vector)
+        return list(vector)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """질의 여러 개를 임베딩하오. 캐시에 없는 질의만 모아 한 번의 배치 요청으로 보내오.
+
+        원본 모델에 embed_queries가 없으면 질의마다 embed_query를 부르오.
+        """
+        vectors = [None] * len(texts)
+        if self.query_cache is not None:
+            vectors = [self.query_cache.get((self.model_name, text)) for text in texts]
+        unique_texts = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if unique_texts:
+            batch = getattr(self.embeddings, "embed_queries", None)
+            computed = batch(unique_texts) if batch else [self.embeddings.embed_query(t) for t in unique_texts]
+            by_text = {text: tuple(vector) for text, vector in zip(unique_texts, computed)}
+            if self.query_cache is not None:
+                for text, vector in by_text.items():
+                    self.query_cache.set((self.model_name, text), vector)
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return [list(vector) for vector in vectors]
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """프로세스 전체에서 공유하는 디스크 임베딩 캐시를 반환하오."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = EmbeddingCache()
+    return _shared_cache
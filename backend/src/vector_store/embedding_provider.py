@@ -0,0 +1,117 @@
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.config import Config
+
+
+class HashingEmbeddings(Embeddings):
+    """네트워크 없이 쓰는 결정적 임베딩 (해시된 문자 n-gram 특징 벡터)
+
+    문자 n-gram마다 고정 해시로 차원과 부호를 정해 더한 뒤 L2 정규화하오.
+    같은 텍스트는 어느 프로세스에서든 같은 벡터가 나오므로 CI, 부하 시험, 오프라인 개발에 쓰오.
+    의미 검색 품질은 실제 모델에 못 미치니 서비스용은 아니오.
+    """
+
+    # 64비트 곱셈 해시 상수 (오버플로는 2^64 나머지로 감김)
+    _MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+    _SEED = np.uint64(0xCBF29CE484222325)
+
+    def __init__(self, dim: int = None, ngram_range: tuple = (1, 3)):
+        self.dim = dim or Config.EMBEDDING_DIM
+        self.ngram_range = ngram_range
+
+    @property
+    def model(self) -> str:
+        low, high = self.ngram_range
+        return f"hashing-ngram{low}-{high}-d{self.dim}"
+
+    @property
+    def document_model(self) -> str:
+        """문서 임베딩에 실제로 쓰는 모델 (질의와 같음)"""
+        return self.model
+
+    def _embed(self, text: str) -> np.ndarray:
+        codepoints = np.frombuffer(text.lower().encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        vector = np.zeros(self.dim, dtype=np.float64)
+        low, high = self.ngram_range
+        with np.errstate(over="ignore"):
+            for n in range(low, high + 1):
+                if len(codepoints) < n:
+                    break
+                # 모든 위치의 n-gram 해시를 한 번에 계산하오
+                hashes = np.full(len(codepoints) - n + 1, self._SEED, dtype=np.uint64)
+                for offset in range(n):
+                    hashes = (hashes ^ codepoints[offset:len(codepoints) - n + 1 + offset]) * self._MULTIPLIER
+                buckets = (hashes % np.uint64(self.dim)).astype(np.int64)
+                signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0)
+                vector += np.bincount(buckets, weights=signs, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+
+@lru_cache(maxsize=None)
+def _upstage_class():
+    """질의 여러 개를 한 번의 요청으로 임베딩하는 embed_queries를 더한 UpstageEmbeddings"""
+    from langchain_upstage import UpstageEmbeddings
+
+    class BatchQueryUpstageEmbeddings(UpstageEmbeddings):
+        @property
+        def document_model(self) -> str:
+            """embed_documents가 실제로 부르는 문서용 모델 (기본 이름 + -passage)"""
+            return self.model.replace("-query", "").replace("-passage", "") + "-passage"
+
+        def embed_queries(self, texts: List[str]) -> List[List[float]]:
+            # embed_query와 같은 질의용 모델(-query)로, embed_documents처럼 배치로 보내오
+            params = self._invocation_params
+            params["model"] = params["model"] + "-query"
+            vectors = []
+            for start in range(0, len(texts), self.embed_batch_size):
+                data = self.client.create(input=texts[start:start + self.embed_batch_size], **params).data
+                vectors.extend(r.embedding for r in data)
+            return vectors
+
+    return BatchQueryUpstageEmbeddings
+
+
+def _upstage(api_key: str = None) -> Embeddings:
+    # Solar 채팅과 같은 공용 연결 풀을 쓰오 (임베딩은 동기 경로로만 부르므로 비동기 풀은 넘기지 않소.
+    # 비동기 풀은 이벤트 루프에 묶여 루프 밖에서 만드는 이 객체에 붙일 수 없소)
+    from src.llm.transport import get_http_client
+    return _upstage_class()(
+        api_key=api_key or Config.SOLAR_API_KEY, model="embedding-query",
+        http_client=get_http_client(),
+    )
+
+
+def _hashing(api_key: str = None) -> Embeddings:
+    return HashingEmbeddings()
+
+
+EMBEDDING_PROVIDERS = {
+    "upstage": _upstage,
+    "hashing": _hashing,
+}
+
+
+def get_embedding_provider(name: str = None, api_key: str = None) -> Embeddings:
+    """설정(EMBEDDING_PROVIDER)에 따라 임베딩 모델을 만드오.
+
+    "upstage": Upstage Solar 임베딩 API (서비스 기본값)
+    "hashing": 네트워크가 필요 없는 결정적 해시 임베딩 (CI/부하 시험/오프라인 개발용)
+    """
+    name = name or Config.EMBEDDING_PROVIDER
+    if name not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"허허, '{name}'는 알 수 없는 임베딩 제공자요. ({', '.join(EMBEDDING_PROVIDERS)})")
+    return EMBEDDING_PROVIDERS[name](api_key=api_key)
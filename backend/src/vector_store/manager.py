@@ -1,121 +1,463 @@
 import os
-import uuid
-import pickle
-from typing import List, Any
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Any, Optional
 
 import chromadb
 from chromadb.config import Settings
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
 from langchain_core.embeddings import Embeddings
-from rank_bm25 import BM25Okapi
 from langchain_core.retrievers import BaseRetriever
 from pydantic import Field
 
-from langchain_upstage import UpstageEmbeddings
 from src.config import Config
+from src.common.cache import TTLCache
+from src.common.log import get_logger
+from src.vector_store.embedding_cache import CachedEmbeddings, get_embedding_cache
+from src.vector_store.embedding_provider import get_embedding_provider
+from src.retriever.bm25_index import BM25Index
+from src.vector_store.numpy_store import NumpyVectorStore, NumpyVectorRetriever
+from src.processor.tokenizer import get_tokenizer
+
+log = get_logger("vector_store")
 
 class BM25Retriever(BaseRetriever):
     """BM25 기반 키워드 검색 리트리버"""
     
-    docs: List[Document] = Field(description="검색할 Document 객체 리스트")
+    index: Any = Field(exclude=True, default=None, description="검색할 BM25Index")
     k: int = Field(default=3, description="반환할 상위 문서 개수")
-    bm25: BM25Okapi = Field(exclude=True, default=None)
     
     class Config:
         arbitrary_types_allowed = True
     
-    def __init__(self, docs: List[Document], k: int = 3):
+    def __init__(self, index: BM25Index, k: int = 3):
         """
         BM25 리트리버 초기화
         
         Args:
-            docs: 검색할 Document 객체 리스트
+            index: 미리 만들어 두었거나 디스크에서 연 BM25Index
             k: 반환할 상위 문서 개수
         """
-        # 문서 텍스트를 토큰화하여 BM25 인덱스 생성
-        corpus = [doc.page_content.split() for doc in docs]
-        bm25 = BM25Okapi(corpus)
-        
-        super().__init__(docs=docs, k=k, bm25=bm25)
+        super().__init__(index=index, k=k)
+
+    @classmethod
+    def from_documents(cls, docs: List[Document], k: int = 3) -> "BM25Retriever":
+        """문서 리스트로 메모리 상의 인덱스를 즉석에서 만들어 리트리버를 반환하오."""
+        ids = [VectorDBManager.chunk_id(doc) for doc in docs]
+        return cls(index=BM25Index.build(ids, docs), k=k)
     
-    def _get_relevant_documents(self, query: str) -> List[Document]:
-        """BM25를 사용하여 관련 문서 검색"""
-        if not self.bm25 or not self.docs:
+    def search_with_scores(self, query: str, filters: Optional[dict] = None) -> List[tuple]:
+        """상위 k개 (문서, BM25 점수)를 점수 내림차순으로 반환하오. (filters: level/category/source 조건)"""
+        if self.index is None or not len(self.index):
             return []
-        
-        query_tokens = query.split()
-        scores = self.bm25.get_scores(query_tokens)
-        
-        # 상위 k개의 인덱스 추출
-        top_indices = sorted(
-            range(len(scores)),
-            key=lambda i: scores[i],
-            reverse=True
-        )[:self.k]
-        
-        return [self.docs[i] for i in top_indices if scores[i] > 0]
+
+        # 인덱스와 같은 토크나이저로 질의를 토큰화하고(메모이즈),
+        # 질의 단어의 postings만 채점하여 상위 k개를 부분 선택하오
+        query_tokens = get_tokenizer(self.index.tokenizer_name).tokenize_query(query)
+        top = self.index.top_k(query_tokens, self.k, filters)
+        return [(self.index.get_document(i), score) for i, score in top]
+
+    def batch_search_with_scores(self, queries: List[str], filters: Optional[dict] = None) -> List[List[tuple]]:
+        """여러 질의를 한 번에 채점하여 질의별 상위 k개 (문서, BM25 점수)를 반환하오."""
+        if self.index is None or not len(self.index):
+            return [[] for _ in queries]
+        tokenizer = get_tokenizer(self.index.tokenizer_name)
+        results = self.index.top_k_batch(
+            [tokenizer.tokenize_query(query) for query in queries], self.k, filters
+        )
+        return [[(self.index.get_document(i), score) for i, score in top] for top in results]
+
+    def _get_relevant_documents(self, query: str, filters: Optional[dict] = None) -> List[Document]:
+        """BM25를 사용하여 관련 문서 검색"""
+        return [doc for doc, _ in self.search_with_scores(query, filters)]
+
+    def batch_search(self, queries: List[str], filters: Optional[dict] = None) -> List[List[Document]]:
+        """여러 질의를 한 번에 채점하여 질의별 상위 k개 문서를 반환하오."""
+        return [[doc for doc, _ in hits] for hits in self.batch_search_with_scores(queries, filters)]
     
-    def get_relevant_documents(self, query: str) -> List[Document]:
+    def get_relevant_documents(self, query: str, filters: Optional[dict] = None) -> List[Document]:
         """LangChain BaseRetriever와 호환되는 메서드"""
-        return self._get_relevant_documents(query)
+        return self._get_relevant_documents(query, filters)
 
 class VectorDBManager:
+    # Chroma 메타데이터 갱신/삭제 시 한 번에 보내는 ID 개수
+    WRITE_BATCH_SIZE = 1000
+
     def __init__(self, api_key: str = None, db_path: str = "./chroma_db"):
         self.api_key = api_key or Config.SOLAR_API_KEY
         self.db_path = db_path
         self.client = chromadb.PersistentClient(path=db_path)
         self.collection = None
-        # [수정] MockEmbeddings 대신 실제 UpstageEmbeddings를 사용하오
-        self.embedding_func = UpstageEmbeddings(
-            api_key=self.api_key,
-            model="embedding-query"
+        # 임베딩 모델은 설정(EMBEDDING_PROVIDER)으로 고르오 (기본: UpstageEmbeddings)
+        # 이미 계산한 텍스트는 디스크 캐시에서 꺼내 쓰오
+        # 질의 임베딩 캐시는 이 매니저가 만드는 모든 리트리버가 함께 쓰오
+        self.query_cache = TTLCache(
+            max_entries=Config.QUERY_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.QUERY_CACHE_TTL
+        )
+        self.embedding_func = CachedEmbeddings(
+            get_embedding_provider(api_key=self.api_key),
+            get_embedding_cache(),
+            query_cache=self.query_cache
+        )
+        # 하이브리드 검색 결과 캐시 (키에 컬렉션 버전이 들어가 적재 후 옛 결과는 쓰이지 않음)
+        self.retrieval_cache = TTLCache(
+            max_entries=Config.RETRIEVAL_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.RETRIEVAL_CACHE_TTL
         )
-        self.stored_docs = {}  # collection_name -> List[Document] 매핑
+        self.bm25_indexes = {}  # collection_name -> BM25Index (현재 컬렉션 버전 기준)
+        self.numpy_stores = {}  # collection_name -> NumpyVectorStore (현재 컬렉션 버전 기준)
+        self._lock = threading.RLock()  # 파생 인덱스 적재/재생성 직렬화
 
     def get_collection(self, collection_name: str):
         self.collection = self.client.get_or_create_collection(name=collection_name)
         return self.collection
 
+    @property
+    def embedding_model(self) -> str:
+        return self.embedding_func.model_name
+
+    @property
+    def document_model(self) -> str:
+        """청크 임베딩에 실제로 쓰는 모델 (Upstage는 질의용과 다른 -passage 모델)"""
+        return self.embedding_func.document_model
+
+    def stale_document_model(self, collection) -> Optional[str]:
+        """비어 있지 않은 컬렉션의 청크가 지금과 다른 문서 모델로 임베딩되었으면 그 기록을 반환하오.
+
+        문서 모델 기록이 없는 예전 컬렉션은 질의용 모델로 임베딩된 청크가 섞여 있을 수 있으므로
+        "(기록 없음)"으로 보오. 같으면 None이오.
+        """
+        recorded = (collection.metadata or {}).get("embedding_document_model")
+        if recorded == self.document_model or not collection.count():
+            return None
+        return recorded or "(기록 없음)"
+
+    def check_embedding_contract(self, collection, dim: int = None):
+        """컬렉션을 만든 임베딩 모델/차원과 지금 쓰는 모델이 같은지 확인하오.
+
+        다른 모델의 벡터가 한 컬렉션에 섞이거나, 다른 모델로 질의하는 사고를 막기 위함이오.
+        (모델 기록이 없는 예전 컬렉션은 다음 적재 때 기록되오)
+        """
+        metadata = collection.metadata or {}
+        recorded_model = metadata.get("embedding_model")
+        if recorded_model and recorded_model != self.embedding_model:
+            raise ValueError(
+                f"'{collection.name}' 컬렉션은 '{recorded_model}' 임베딩으로 만들어졌는데 "
+                f"지금은 '{self.embedding_model}'을 쓰고 있구려. 설정을 맞추거나 컬렉션을 지우고 다시 적재하시오."
+            )
+        recorded_dim = metadata.get("embedding_dim")
+        if dim is not None and recorded_dim and recorded_dim != dim:
+            raise ValueError(
+                f"'{collection.name}' 컬렉션의 임베딩 차원({recorded_dim})과 "
+                f"새 임베딩 차원({dim})이 다르오."
+            )
+
     def get_embedding(self, text: str) -> List[float]:
         return self.embedding_func.embed_query(text)
 
-    def add_documents(self, docs: List[Document], collection_name: str = "default_collection"):
-        """문서를 벡터화하여 ChromaDB에 저장"""
-        if self.collection is None or self.collection.name != collection_name:
-            self.get_collection(collection_name)
+    def cache_stats(self) -> dict:
+        """임베딩/검색 결과 캐시 적중률, 아낀 시간 등 지표를 반환하오."""
+        return {
+            "query_embedding": self.query_cache.stats(),
+            "document_embedding": self.embedding_func.cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+        }
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """텍스트 묶음을 한 번의 API 호출로 임베딩하오. 실패하면 지수 백오프로 재시도하오."""
+        last_error = None
+        for attempt in range(Config.EMBED_MAX_RETRIES + 1):
+            try:
+                return self.embedding_func.embed_documents(texts)
+            except Exception as e:
+                last_error = e
+                if attempt < Config.EMBED_MAX_RETRIES:
+                    wait = 2 ** attempt
+                    log.warning("[VectorDB] 임베딩 배치 실패(%s), %d초 후 재시도 (%d/%d)",
+                                e, wait, attempt + 1, Config.EMBED_MAX_RETRIES)
+                    time.sleep(wait)
+        raise last_error
 
-        print(f"   [VectorDB] '{collection_name}' 컬렉션에 {len(docs)}개의 문서를 저장 중...")
+    @staticmethod
+    def chunk_id(doc: Document) -> str:
+        """출처와 본문으로 만든 안정적인 청크 ID (같은 내용이면 몇 번 적재해도 같은 ID)"""
+        if doc.metadata.get("id"):
+            return str(doc.metadata["id"])
+        source = str(doc.metadata.get("source", ""))
+        return hashlib.sha256(f"{source}\x00{doc.page_content}".encode("utf-8")).hexdigest()[:32]
 
-        ids = []
-        embeddings = []
-        metadatas = []
-        documents = []
+    @staticmethod
+    def fingerprint(doc: Document) -> str:
+        """본문과 메타데이터를 모두 반영한 청크 지문 (변경 감지용)"""
+        metadata = {k: v for k, v in doc.metadata.items() if k != "fingerprint"}
+        payload = json.dumps(metadata, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{doc.page_content}\x00{payload}".encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def prepare_chunks(cls, docs: List[Document]) -> dict:
+        """청크 ID -> 지문이 기록된 Document 매핑을 만드오. 중복 청크는 하나만 남기오."""
+        prepared = {}
+        for doc in docs:
+            chunk_id = cls.chunk_id(doc)
+            if chunk_id in prepared:
+                continue
+            metadata = dict(doc.metadata)
+            metadata["fingerprint"] = cls.fingerprint(doc)
+            prepared[chunk_id] = Document(page_content=doc.page_content, metadata=metadata)
+        return prepared
 
+    @staticmethod
+    def make_batches(docs: List[Document]) -> List[List[Document]]:
+        """임베딩 API 한도(입력 개수, 글자 수)에 맞춰 문서를 배치로 묶소."""
+        batches = []
+        current, current_chars = [], 0
         for doc in docs:
-            text = doc.page_content
-            doc_id = doc.metadata.get("id", str(uuid.uuid4()))
-            emb = self.get_embedding(text)
-            
-            ids.append(doc_id)
-            embeddings.append(emb)
-            metadatas.append(doc.metadata)
-            documents.append(text)
-            
-        if ids:
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                documents=documents
+            size = len(doc.page_content)
+            if current and (len(current) >= Config.EMBED_BATCH_SIZE
+                            or current_chars + size > Config.EMBED_BATCH_MAX_CHARS):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(doc)
+            current_chars += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def add_documents(self, docs: List[Document], collection_name: str = "default_collection",
+                      progress_callback: Optional[Callable[[int, int], None]] = None):
+        """문서를 배치 단위로 동시에 벡터화하여 ChromaDB에 저장
+
+        Args:
+            docs: 저장할 Document 리스트
+            collection_name: 저장 대상 컬렉션 이름
+            progress_callback: (완료 문서 수, 전체 문서 수)를 받는 진행 콜백
+        """
+        # 여러 전략이 매니저를 공유하므로 self.collection 대신 지역 변수로 다루오
+        collection = self.get_collection(collection_name)
+        self.check_embedding_contract(collection)
+        stale_model = self.stale_document_model(collection)
+        if stale_model:
+            # 다른 모델의 벡터가 섞이지 않게 하오 (sync_documents는 전부 다시 임베딩하오)
+            raise ValueError(
+                f"'{collection_name}' 컬렉션의 청크는 '{stale_model}' 문서 모델로 임베딩되었는데 "
+                f"지금은 '{self.document_model}'을 쓰고 있구려. sync_documents(ingest)로 다시 적재하시오."
             )
-        print("   [VectorDB] 저장 완료!")
-        
-        # BM25를 위해 문서를 메모리에 저장
-        self.stored_docs[collection_name] = docs
+
+        written = {"count": 0, "dim": None}
+        try:
+            self._upsert_documents(collection, docs, written, progress_callback)
+        finally:
+            # 일부 배치만 들어가고 실패해도 Chroma는 이미 바뀌었으므로 버전을 올려 옛 산출물/캐시를 무효화하오
+            if written["count"]:
+                self._bump_index_version(collection, **self._write_contract(written["dim"]))
+        log.info("[VectorDB] 저장 완료!")
+
+    def _write_contract(self, dim: int = None) -> dict:
+        """적재 후 컬렉션에 기록할 임베딩 계약 (질의 모델, 문서 모델, 차원)"""
+        contract = {"embedding_model": self.embedding_model, "embedding_document_model": self.document_model}
+        if dim is not None:
+            contract["embedding_dim"] = dim
+        return contract
+
+    def _upsert_documents(self, collection, docs: List[Document], written: dict,
+                          progress_callback: Optional[Callable[[int, int], None]] = None):
+        """문서를 배치로 동시에 임베딩하여 upsert하오. (버전은 올리지 않으니 호출한 쪽에서 한 번만 올리시오)
+
+        written["count"]/written["dim"]에 실제로 쓴 문서 수와 임베딩 차원을 기록하므로,
+        도중에 예외가 나도 호출한 쪽이 컬렉션이 바뀌었는지 알 수 있소.
+        """
+        # 같은 ID가 한 번의 upsert에 두 번 들어가지 않도록 중복을 걸러내오
+        docs = list(self.prepare_chunks(docs).values())
+        batches = self.make_batches(docs)
+        log.info("[VectorDB] '%s' 컬렉션에 %d개의 문서를 %d개 배치로 저장 중... (동시 %d개)",
+                 collection.name, len(docs), len(batches), Config.EMBED_MAX_WORKERS)
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=Config.EMBED_MAX_WORKERS) as pool:
+            futures = {
+                pool.submit(self.embed_batch, [doc.page_content for doc in batch]): batch
+                for batch in batches
+            }
+            # Chroma 쓰기는 완료된 배치 순서대로 이 스레드에서만 수행하오
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    embeddings = future.result()
+                except Exception as e:
+                    log.error("[VectorDB] 배치 %d개 문서 임베딩 최종 실패: %s", len(batch), e)
+                    failed.append(batch)
+                    continue
+
+                if written["dim"] is None:
+                    self.check_embedding_contract(collection, len(embeddings[0]))
+                    written["dim"] = len(embeddings[0])
+                collection.upsert(
+                    ids=[self.chunk_id(doc) for doc in batch],
+                    embeddings=embeddings,
+                    metadatas=[doc.metadata for doc in batch],
+                    documents=[doc.page_content for doc in batch]
+                )
+                written["count"] += len(batch)
+                if progress_callback:
+                    progress_callback(written["count"], len(docs))
+
+        if failed:
+            failed_count = sum(len(batch) for batch in failed)
+            raise RuntimeError(f"{len(failed)}개 배치({failed_count}개 문서)의 임베딩에 실패했소. 다시 적재하시오.")
+
+    def sync_documents(self, docs: List[Document], collection_name: str,
+                       progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        """컬렉션을 주어진 청크 집합과 똑같이 맞추는 증분 적재
+
+        새 청크만 임베딩하여 upsert하고, 메타데이터만 바뀐 청크는 갱신하며,
+        이번 적재에 없는 청크(출처가 사라졌거나 내용이 바뀐 청크)는 삭제하오.
+        추가/갱신/삭제를 모두 마친 뒤 컬렉션 버전은 한 번만 올리오.
+
+        Returns:
+            {"added", "updated", "removed", "unchanged"} 개수 요약
+        """
+        collection = self.get_collection(collection_name)
+        self.check_embedding_contract(collection)
+        desired = self.prepare_chunks(docs)
+
+        existing = collection.get(include=["metadatas"])
+        existing_fingerprints = {
+            chunk_id: (metadata or {}).get("fingerprint")
+            for chunk_id, metadata in zip(existing["ids"], existing["metadatas"] or [])
+        }
+
+        to_add = [doc for chunk_id, doc in desired.items() if chunk_id not in existing_fingerprints]
+        to_update = [
+            chunk_id for chunk_id, doc in desired.items()
+            if chunk_id in existing_fingerprints
+            and existing_fingerprints[chunk_id] != doc.metadata["fingerprint"]
+        ]
+        to_remove = [chunk_id for chunk_id in existing_fingerprints if chunk_id not in desired]
+
+        stale_model = self.stale_document_model(collection)
+        if stale_model:
+            # 청크 ID가 본문에서 나오므로 전부 upsert하면 옛 모델의 벡터를 제자리에서 덮어쓰오
+            log.warning("[VectorDB] '%s' 컬렉션의 청크가 '%s' 문서 모델로 임베딩되어 있어 '%s'로 모두 다시 임베딩하오.",
+                        collection_name, stale_model, self.document_model)
+            to_add = list(desired.values())
+            to_update = []
+
+        written = {"count": 0, "dim": None}
+        try:
+            if to_add:
+                self._upsert_documents(collection, to_add, written, progress_callback)
+
+            # ID가 본문에서 나오므로 갱신 대상은 메타데이터만 바뀐 청크이오 (재임베딩 불필요)
+            for start in range(0, len(to_update), self.WRITE_BATCH_SIZE):
+                part = to_update[start:start + self.WRITE_BATCH_SIZE]
+                written["count"] += len(part)
+                collection.update(ids=part, metadatas=[desired[chunk_id].metadata for chunk_id in part])
+
+            for start in range(0, len(to_remove), self.WRITE_BATCH_SIZE):
+                part = to_remove[start:start + self.WRITE_BATCH_SIZE]
+                written["count"] += len(part)
+                collection.delete(ids=part)
+        finally:
+            # 도중에 실패해도 이미 쓴 것이 있으면 버전을 올려 옛 산출물/캐시를 무효화하오
+            if written["count"]:
+                self._bump_index_version(collection, **self._write_contract(written["dim"]))
+
+        summary = {
+            "added": len(to_add),
+            "updated": len(to_update),
+            "removed": len(to_remove),
+            "unchanged": len(desired) - len(to_add) - len(to_update),
+        }
+        log.info("[VectorDB] 증분 적재 결과: 추가 %d / 갱신 %d / 삭제 %d / 유지 %d",
+                 summary["added"], summary["updated"], summary["removed"], summary["unchanged"])
+        return summary
+
+    @staticmethod
+    def vector_backend(collection_name: str) -> str:
+        """컬렉션에 지정된 벡터 검색 백엔드 ("chroma" 또는 "numpy")"""
+        backend = Config.VECTOR_BACKENDS.get(collection_name, Config.VECTOR_BACKEND)
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"허허, '{backend}'는 알 수 없는 벡터 백엔드요.")
+        return backend
+
+    def numpy_store_dir(self, collection_name: str) -> str:
+        return os.path.join(self.db_path, "numpy", collection_name)
+
+    def build_numpy_store(self, collection_name: str, dtype: str = None) -> Optional[NumpyVectorStore]:
+        """Chroma 컬렉션의 임베딩을 그대로 옮겨 NumPy 벡터 인덱스를 만들고 저장하오. (재임베딩 없음)
+
+        같은 컬렉션 버전, 같은 저장 형식(dtype/재채점)의 인덱스가 이미 저장되어 있으면 그것을 여오.
+        """
+        version = self.get_index_version(collection_name)
+        dtype = dtype or Config.NUMPY_VECTOR_DTYPE
+        store = NumpyVectorStore.load(self.numpy_store_dir(collection_name), expected_version=version)
+        if (store is not None and store.dtype == dtype
+                and (store.full is not None) == (Config.NUMPY_VECTOR_RESCORE and dtype != "float32")):
+            log.info("[NumpyVector] '%s' 인덱스가 이미 최신이오 (버전 %s, %s)", collection_name, version, dtype)
+            self.numpy_stores[collection_name] = store
+            return store
+
+        collection = self.client.get_collection(name=collection_name)
+        all_items = collection.get(include=["embeddings", "documents", "metadatas"])
+        if not all_items or not len(all_items['ids']):
+            return None
+
+        docs = [
+            Document(page_content=doc_text, metadata=metadata or {})
+            for doc_text, metadata in zip(all_items['documents'], all_items['metadatas'])
+        ]
+        store = NumpyVectorStore.build(all_items['ids'], docs, all_items['embeddings'],
+                                       dtype=dtype, collection_version=version,
+                                       rescore=Config.NUMPY_VECTOR_RESCORE,
+                                       rescore_factor=Config.NUMPY_VECTOR_RESCORE_FACTOR)
+        index_dir = self.numpy_store_dir(collection_name)
+        store.save(index_dir)
+        log.info("[NumpyVector] '%s' 저장 완료 (버전 %s, 문서 %d개, %d차원 %s, 상주 %.1fMB, 재채점 %s)",
+                 collection_name, version, len(store), store.dim, store.dtype,
+                 store.resident_bytes / 1024 / 1024, "사용" if store.full is not None else "안 함")
+
+        store = NumpyVectorStore.load(index_dir, expected_version=version) or store
+        self.numpy_stores[collection_name] = store
+        return store
+
+    def get_numpy_store(self, collection_name: str) -> Optional[NumpyVectorStore]:
+        """현재 컬렉션 버전과 일치하는 NumPy 벡터 인덱스 (없거나 낡았으면 Chroma에서 다시 만듦)"""
+        version = self.get_index_version(collection_name)
+        if version < 0:
+            return None
+
+        store = self.numpy_stores.get(collection_name)
+        if store is not None and store.collection_version == version:
+            return store
+
+        # 동시에 들어온 첫 요청들이 같은 인덱스를 두 번 만들지 않도록 잠그고 다시 확인하오
+        with self._lock:
+            store = self.numpy_stores.get(collection_name)
+            if store is not None and store.collection_version == version:
+                return store
+
+            store = NumpyVectorStore.load(self.numpy_store_dir(collection_name), expected_version=version)
+            if store is not None:
+                self.numpy_stores[collection_name] = store
+                return store
+
+            log.info("[NumpyVector] '%s' 저장된 인덱스가 없거나 낡아 다시 만드오.", collection_name)
+            return self.build_numpy_store(collection_name)
 
     def get_vector_retriever(self, collection_name: str, k: int = 2):
         """[중요] 검색기 반환 함수"""
+        self.check_embedding_contract(self.client.get_collection(name=collection_name))
+        if self.vector_backend(collection_name) == "numpy":
+            store = self.get_numpy_store(collection_name)
+            if store is None:
+                raise ValueError(f"'{collection_name}' 컬렉션이 비어 있구려. 먼저 Ingest를 수행하시오.")
+            return NumpyVectorRetriever(store=store, embeddings=self.embedding_func, k=k)
+
         vectorstore = Chroma(
             client=self.client,
             collection_name=collection_name,
@@ -123,32 +465,134 @@ class VectorDBManager:
         )
         return vectorstore.as_retriever(search_kwargs={"k": k})
     
+    def get_index_version(self, collection_name: str) -> int:
+        """컬렉션 버전 (적재로 내용이 바뀔 때마다 1씩 오름). 컬렉션이 없으면 -1이오."""
+        try:
+            collection = self.client.get_collection(name=collection_name)
+        except Exception:
+            return -1
+        return int((collection.metadata or {}).get("index_version", 0))
+
+    def _bump_index_version(self, collection, **extra_metadata) -> int:
+        """컬렉션 버전을 올려 디스크의 BM25 인덱스 등 파생 산출물을 무효화하오.
+
+        적재를 시작할 때 받은 핸들의 메타데이터는 낡았을 수 있으므로 (modify는 메타데이터를
+        통째로 바꾸오) 방금 읽은 메타데이터에 extra_metadata(임베딩 계약)를 합쳐 기록하오.
+        """
+        collection = self.client.get_collection(name=collection.name)
+        # hnsw:* 설정은 생성 후 바꿀 수 없으므로 그대로 두고 버전만 갱신하오
+        metadata = {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+        metadata.update(extra_metadata)
+        metadata["index_version"] = int(metadata.get("index_version", 0)) + 1
+        collection.modify(metadata=metadata)
+        return metadata["index_version"]
+
+    def bm25_index_dir(self, collection_name: str) -> str:
+        return os.path.join(self.db_path, "bm25", collection_name)
+
+    def build_bm25_index(self, collection_name: str) -> Optional[BM25Index]:
+        """컬렉션 전체로 BM25 인덱스를 만들어 Chroma 데이터 옆에 저장하오.
+
+        같은 컬렉션 버전, 같은 토크나이저의 인덱스가 이미 저장되어 있으면 다시 만들지 않고 그것을 여오.
+        """
+        version = self.get_index_version(collection_name)
+        index_dir = self.bm25_index_dir(collection_name)
+        tokenizer = get_tokenizer()
+        index = BM25Index.load(index_dir, expected_version=version, expected_tokenizer=tokenizer.name)
+        if index is not None:
+            log.info("[BM25] '%s' 인덱스가 이미 최신이오 (버전 %s)", collection_name, version)
+            self.bm25_indexes[collection_name] = index
+            return index
+
+        collection = self.client.get_collection(name=collection_name)
+        all_items = collection.get(include=["documents", "metadatas"])  # 모든 문서 조회
+
+        if not all_items or not all_items.get('documents'):
+            return None
+
+        # ChromaDB 데이터를 Document 객체로 변환
+        docs = [
+            Document(page_content=doc_text, metadata=metadata or {})
+            for doc_text, metadata in zip(all_items['documents'], all_items['metadatas'])
+        ]
+        # 이전 인덱스에 저장된 토큰 스트림을 재사용하여 바뀐 청크만 토큰화하오
+        previous = BM25Index.load(index_dir)
+        index = BM25Index.build(all_items['ids'], docs, tokenizer=tokenizer, previous=previous,
+                                collection_version=version)
+        index.save(index_dir)
+        log.info("[BM25] '%s' 인덱스 저장 완료 (버전 %s, 토크나이저 %s, 문서 %d개, 어휘 %d개, 토큰 재사용 %d개)",
+                 collection_name, version, index.tokenizer_name, len(index), len(index.vocab),
+                 index.reused_token_streams)
+
+        # 저장한 파일을 메모리 매핑으로 다시 열어 메모리 사용을 줄이오
+        index = BM25Index.load(index_dir, expected_version=version) or index
+        self.bm25_indexes[collection_name] = index
+        return index
+
+    def get_bm25_index(self, collection_name: str) -> Optional[BM25Index]:
+        """현재 컬렉션 버전과 일치하는 BM25 인덱스를 반환하오.
+
+        메모리 -> 디스크(메모리 매핑) 순으로 찾고, 없거나 낡았으면(버전 또는 토크나이저 불일치)
+        Chroma에서 다시 만드오.
+        """
+        version = self.get_index_version(collection_name)
+        if version < 0:
+            return None
+
+        tokenizer_name = get_tokenizer().name
+        index = self.bm25_indexes.get(collection_name)
+        if index is not None and index.collection_version == version and index.tokenizer_name == tokenizer_name:
+            return index
+
+        # 동시에 들어온 첫 요청들이 같은 인덱스를 두 번 만들지 않도록 잠그고 다시 확인하오
+        with self._lock:
+            index = self.bm25_indexes.get(collection_name)
+            if index is not None and index.collection_version == version and index.tokenizer_name == tokenizer_name:
+                return index
+
+            index = BM25Index.load(self.bm25_index_dir(collection_name), expected_version=version,
+                                   expected_tokenizer=tokenizer_name)
+            if index is not None:
+                self.bm25_indexes[collection_name] = index
+                return index
+
+            log.info("[BM25] '%s' 저장된 인덱스가 없거나 낡아 다시 만드오.", collection_name)
+            return self.build_bm25_index(collection_name)
+
     def get_bm25_retriever(self, collection_name: str = "default_collection", k: int = 2):
         """BM25 기반 검색기 반환 함수"""
-        # 먼저 메모리에 있는 문서 확인
-        if collection_name in self.stored_docs:
-            docs = self.stored_docs[collection_name]
-            if docs:
-                return BM25Retriever(docs=docs, k=k)
-        
-        # 메모리에 없으면 ChromaDB에서 로드
         try:
-            collection = self.client.get_collection(name=collection_name)
-            all_items = collection.get()  # 모든 문서 조회
-            
-            if not all_items or not all_items.get('documents'):
-                return None
-            
-            # ChromaDB 데이터를 Document 객체로 변환
-            docs = []
-            for doc_text, metadata in zip(all_items['documents'], all_items.get('metadatas', [])):
-                doc = Document(page_content=doc_text, metadata=metadata or {})
-                docs.append(doc)
-            
-            # 메모리에 캐시
-            self.stored_docs[collection_name] = docs
-            
-            return BM25Retriever(docs=docs, k=k)
+            index = self.get_bm25_index(collection_name)
         except Exception as e:
-            print(f"   [BM25] {collection_name} 컬렉션을 찾을 수 없소: {e}")
-            return None
\ No newline at end of file
+            log.warning("[BM25] %s 컬렉션을 찾을 수 없소: %s", collection_name, e)
+            return None
+
+        if index is None or not len(index):
+            log.warning("[BM25] %s 컬렉션을 찾을 수 없소.", collection_name)
+            return None
+        return BM25Retriever(index=index, k=k)
+
+
+_shared_managers = {}
+_shared_managers_lock = threading.Lock()
+
+
+def get_shared_manager(api_key: str = None, db_path: str = None) -> VectorDBManager:
+    """프로세스 전체에서 공유하는 VectorDBManager를 반환하오.
+
+    전략(컬렉션)마다 매니저를 새로 만들면 같은 경로에 Chroma 클라이언트, 임베딩 HTTP 클라이언트,
+    캐시가 따로 생기므로, (DB 경로, API 키)당 하나만 만들어 모든 전략이 함께 쓰오.
+    동시에 들어온 첫 요청에도 한 번만 초기화되오.
+    """
+    api_key = api_key or Config.SOLAR_API_KEY
+    db_path = os.path.abspath(db_path or Config.DB_PATH)
+    key = (db_path, api_key)
+
+    manager = _shared_managers.get(key)
+    if manager is None:
+        with _shared_managers_lock:
+            manager = _shared_managers.get(key)
+            if manager is None:
+                manager = VectorDBManager(api_key=api_key, db_path=db_path)
+                _shared_managers[key] = manager
+    return manager
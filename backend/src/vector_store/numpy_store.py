@@ -0,0 +1,254 @@
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import Field
+
+from src.retriever.metadata_index import MetadataIndex
+from src.vector_store.artifact import read_current_meta, write_versioned
+from src.vector_store.doc_store import DocStore
+
+
+class NumpyVectorStore:
+    """메모리 매핑한 NumPy 임베딩 행렬 위에서 도는 내장 벡터 인덱스
+
+    수만 개 규모의 청크라면 정규화된 행렬과 질의 벡터의 내적 한 번(코사인 유사도)과
+    argpartition으로 충분하오. Chroma 클라이언트/LangChain 래퍼를 거치지 않소.
+
+    압축 형식(float16, int8)으로 저장하면 압축된 행렬로 후보를 넓게 고른 뒤,
+    float32 원본(full.npy, 메모리 매핑이라 후보 행만 읽힘)으로 상위 후보를 다시 채점하오.
+
+    저장 구조 (<root>/<collection>/v<버전>/):
+        embeddings.npy   L2 정규화된 (문서 수, 차원) 행렬 (float32 / float16 / int8)
+        scales.npy       int8일 때 벡터별 복원 배율
+        full.npy         압축 형식 + 재채점 사용 시 float32 원본
+        docs.bin ...     청크 ID/본문/메타데이터 (DocStore)
+        metadata_*       level/category/source 필터용 색인 (MetadataIndex)
+
+    필터가 주어지면 필터에 맞는 행만 골라 내적하오.
+    """
+
+    FORMAT_VERSION = 3
+    DTYPES = ("float32", "float16", "int8")
+    # float16/int8 행렬은 BLAS를 못 타므로 이 크기의 블록씩 float32로 바꿔 곱하오
+    BLOCK_ROWS = 8192
+
+    def __init__(self, embeddings: np.ndarray, doc_store: DocStore, collection_version: int = 0,
+                 scales: Optional[np.ndarray] = None, full: Optional[np.ndarray] = None,
+                 rescore_factor: int = 4, metadata_index: Optional[MetadataIndex] = None):
+        self.embeddings = embeddings
+        self.scales = scales
+        self.full = full
+        self.doc_store = doc_store
+        self.collection_version = collection_version
+        self.rescore_factor = rescore_factor
+        self.metadata_index = metadata_index
+
+    def __len__(self) -> int:
+        return self.embeddings.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    @property
+    def dtype(self) -> str:
+        return str(self.embeddings.dtype)
+
+    @property
+    def resident_bytes(self) -> int:
+        """검색 때마다 전부 읽는 압축 행렬(+배율)의 크기. 원본은 후보 행만 읽으므로 제외하오."""
+        return self.embeddings.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def quantize_int8(matrix: np.ndarray):
+        """벡터별 최대 절댓값을 127에 맞추는 대칭 int8 양자화. (int8 행렬, 배율)을 반환하오."""
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    @classmethod
+    def build(cls, ids: List[str], docs: List[Document], embeddings, dtype: str = "float32",
+              collection_version: int = 0, rescore: bool = True, rescore_factor: int = 4) -> "NumpyVectorStore":
+        if dtype not in cls.DTYPES:
+            raise ValueError(f"허허, '{dtype}' 형식의 벡터 저장은 지원하지 않소. ({', '.join(cls.DTYPES)})")
+        full = cls.normalize(embeddings)
+        scales = None
+        if dtype == "int8":
+            matrix, scales = cls.quantize_int8(full)
+        else:
+            matrix = full.astype(dtype)
+        keep_full = rescore and dtype != "float32"
+        return cls(matrix, DocStore.from_documents(ids, docs), collection_version,
+                   scales=scales, full=full if keep_full else None, rescore_factor=rescore_factor,
+                   metadata_index=MetadataIndex.build([doc.metadata for doc in docs]))
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(질의 수, 차원) 정규화 질의와 전체 문서의 (근사) 코사인 유사도 (질의 수, 문서 수)
+
+        rows(필터에 맞는 문서 번호)가 주어지면 그 행만 읽어 (질의 수, len(rows))를 반환하오.
+        """
+        if rows is not None:
+            scores = queries @ np.asarray(self.embeddings[rows], dtype=np.float32).T
+            if self.scales is not None:
+                scores *= self.scales[rows]
+            return scores
+        if self.embeddings.dtype == np.float32:
+            return queries @ self.embeddings.T
+        scores = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    @staticmethod
+    def top_k_from_scores(scores: np.ndarray, k: int) -> List[tuple]:
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        part = np.argpartition(-scores, k - 1)[:k]
+        order = part[np.argsort(-scores[part], kind="stable")]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def _rescore(self, query: np.ndarray, candidates: List[tuple], k: int) -> List[tuple]:
+        """압축 행렬로 고른 후보를 float32 원본으로 다시 채점하여 상위 k개를 고르오."""
+        rows = np.sort(np.asarray([i for i, _ in candidates], dtype=np.int64))
+        exact = np.asarray(self.full[rows], dtype=np.float32) @ query
+        order = np.argsort(-exact, kind="stable")[:k]
+        return [(int(rows[i]), float(exact[i])) for i in order]
+
+    def search_batch(self, query_embeddings, k: int, filters: Optional[dict] = None) -> List[List[tuple]]:
+        """질의 벡터 여러 개를 행렬곱 한 번으로 검색하여 질의별 (문서 번호, 유사도) 상위 k개를 반환하오."""
+        queries = self.normalize(np.atleast_2d(query_embeddings))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"질의 임베딩 차원({queries.shape[1]})이 인덱스 차원({self.dim})과 다르오.")
+        rows = self.metadata_index.doc_ids(filters) if filters else None
+        if not len(self) or (rows is not None and not len(rows)):
+            return [[] for _ in range(len(queries))]
+        scores = self._scores(queries, rows)
+        results = []
+        for query, row in zip(queries, scores):
+            top = self.top_k_from_scores(row, k if self.full is None else k * self.rescore_factor)
+            if rows is not None:
+                top = [(int(rows[i]), score) for i, score in top]
+            results.append(top if self.full is None else self._rescore(query, top, k))
+        return results
+
+    def search(self, query_embedding, k: int, filters: Optional[dict] = None) -> List[tuple]:
+        return self.search_batch([query_embedding], k, filters)[0]
+
+    def get_document(self, i: int) -> Document:
+        return self.doc_store.get(i)
+
+    # ----- 저장 / 불러오기 -----
+
+    def save(self, root_dir: str):
+        def write_files(dir_path: str):
+            np.save(os.path.join(dir_path, "embeddings.npy"), self.embeddings)
+            if self.scales is not None:
+                np.save(os.path.join(dir_path, "scales.npy"), self.scales)
+            if self.full is not None:
+                np.save(os.path.join(dir_path, "full.npy"), self.full)
+            self.doc_store.save(dir_path)
+            self.metadata_index.save(dir_path)
+
+        meta = {
+            "format_version": self.FORMAT_VERSION,
+            "n_docs": len(self),
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "rescore": self.full is not None,
+            "rescore_factor": self.rescore_factor,
+        }
+        write_versioned(root_dir, self.collection_version, meta, write_files)
+
+    @classmethod
+    def load(cls, root_dir: str, expected_version: Optional[int] = None) -> Optional["NumpyVectorStore"]:
+        """저장된 행렬을 메모리 매핑으로 여오. 없거나 컬렉션 버전과 다르면 None이오."""
+        meta = read_current_meta(root_dir, cls.FORMAT_VERSION, expected_version)
+        if meta is None:
+            return None
+        index_dir = meta["dir"]
+        embeddings = np.load(os.path.join(index_dir, "embeddings.npy"), mmap_mode="r")
+        # 배율은 매 검색마다 전부 쓰이므로 메모리에 올리오
+        scales = np.load(os.path.join(index_dir, "scales.npy")) if meta["dtype"] == "int8" else None
+        full = np.load(os.path.join(index_dir, "full.npy"), mmap_mode="r") if meta["rescore"] else None
+        return cls(embeddings, DocStore.open(index_dir), meta["collection_version"],
+                   scales=scales, full=full, rescore_factor=meta["rescore_factor"],
+                   metadata_index=MetadataIndex.load(index_dir))
+
+
+def quantization_report(embeddings, k: int = 5, n_queries: int = 100, rescore_factor: int = 4,
+                        seed: int = 0) -> List[dict]:
+    """저장 형식별 recall@k(float32 정확 검색 대비)와 상주 메모리를 비교하오.
+
+    질의는 컬렉션 안의 임베딩을 무작위로 골라 쓰오.
+    """
+    full = NumpyVectorStore.normalize(embeddings)
+    rng = np.random.default_rng(seed)
+    queries = full[rng.choice(len(full), size=min(n_queries, len(full)), replace=False)]
+    ids = [str(i) for i in range(len(full))]
+    docs = [Document(page_content="") for _ in ids]
+
+    exact = NumpyVectorStore.build(ids, docs, full, dtype="float32").search_batch(queries, k)
+    exact_sets = [set(i for i, _ in result) for result in exact]
+    baseline_bytes = full.nbytes
+
+    rows = []
+    for dtype in NumpyVectorStore.DTYPES:
+        for rescore in ((False,) if dtype == "float32" else (False, True)):
+            store = NumpyVectorStore.build(ids, docs, full, dtype=dtype, rescore=rescore,
+                                           rescore_factor=rescore_factor)
+            results = store.search_batch(queries, k)
+            recall = np.mean([
+                len(exact_set & set(i for i, _ in result)) / max(len(exact_set), 1)
+                for exact_set, result in zip(exact_sets, results)
+            ])
+            rows.append({
+                "dtype": dtype,
+                "rescore": rescore,
+                "recall_at_k": float(recall),
+                "resident_mb": store.resident_bytes / 1024 / 1024,
+                "memory_saved": 1 - store.resident_bytes / baseline_bytes,
+            })
+    return rows
+
+
+class NumpyVectorRetriever(BaseRetriever):
+    """NumpyVectorStore 기반 의미 검색 리트리버"""
+
+    store: Any = Field(exclude=True, default=None, description="검색할 NumpyVectorStore")
+    embeddings: Any = Field(exclude=True, default=None, description="질의 임베딩 모델")
+    k: int = Field(default=2, description="반환할 상위 문서 개수")
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, store: NumpyVectorStore, embeddings: Embeddings, k: int = 2):
+        super().__init__(store=store, embeddings=embeddings, k=k)
+
+    def search_with_scores(self, query: str, filters: Optional[dict] = None) -> List[tuple]:
+        """상위 k개 (문서, 코사인 유사도)를 유사도 내림차순으로 반환하오."""
+        query_embedding = self.embeddings.embed_query(query)
+        hits = self.store.search(query_embedding, self.k, filters)
+        return [(self.store.get_document(i), score) for i, score in hits]
+
+    def _get_relevant_documents(self, query: str, filters: Optional[dict] = None) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query, filters)]
+
+    def get_relevant_documents(self, query: str, filters: Optional[dict] = None) -> List[Document]:
+        """LangChain BaseRetriever와 호환되는 메서드"""
+        return self._get_relevant_documents(query, filters)
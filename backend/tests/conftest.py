@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+# src 패키지를 찾고, 설정(Config)이 읽히기 전에 네트워크/서비스 데이터와 떨어진 환경을 잡아 두오
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="jeon_woochi_tests_")
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embedding_cache.sqlite3")
+os.environ["ANSWER_CACHE_PATH"] = os.path.join(_scratch, "answer_cache.sqlite3")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+import pytest  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+CHUNKS = [
+    ("호흡 명상은 들숨과 날숨을 세며 마음을 한곳에 모으는 수행이오.", "basic", "breath"),
+    ("걷기 명상은 발바닥의 감각에 주의를 두고 천천히 걷는 수행이오.", "basic", "walking"),
+    ("잠이 오지 않을 때는 몸을 머리부터 발끝까지 훑는 바디스캔 명상을 하시오.", "advanced", "sleep"),
+    ("자비 명상은 나와 남의 평안을 비는 문구를 되뇌는 수행이오.", "advanced", "compassion"),
+]
+
+
+def make_chunks(rows=CHUNKS):
+    return [Document(page_content=text, metadata={"level": level, "source": source})
+            for text, level, source in rows]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """임시 디렉터리에 Chroma를 여는 VectorDBManager (해시 임베딩, 네트워크 없음)"""
+    from src.vector_store.manager import VectorDBManager
+    return VectorDBManager(db_path=str(tmp_path / "chroma"))
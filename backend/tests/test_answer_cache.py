@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from src.config import Config
+from src.qa.answer_cache import SemanticAnswerCache
+
+SOURCES = ["a" * 40, "b" * 40]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticAnswerCache(path=str(tmp_path / "answers.sqlite3"), max_entries=10, threshold=0.9)
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_exact_sources_required_by_default(cache):
+    assert Config.ANSWER_CACHE_MIN_SOURCE_OVERLAP == 1.0
+    scope = SemanticAnswerCache.scope_key("col", "model")
+    cache.store(scope, 1, "호흡 명상이 무엇이오?", unit(1, 0, 0), "숨을 세시오.", ["breath"], SOURCES)
+    assert cache.lookup(scope, 1, unit(1, 0, 0), SOURCES)["answer"] == "숨을 세시오."
+    # 근거가 하나라도 다르면 쓰지 않소
+    assert cache.lookup(scope, 1, unit(1, 0, 0), SOURCES[:1]) is None
+    assert cache.lookup(scope, 1, unit(1, 0, 0), [*SOURCES, "c" * 40]) is None
+
+
+def test_similarity_threshold(cache):
+    scope = SemanticAnswerCache.scope_key("col", "model")
+    cache.store(scope, 1, "질문", unit(1, 0, 0), "답", [], SOURCES)
+    close = unit(1, 0.3, 0)   # 코사인 약 0.958
+    far = unit(1, 0.6, 0)     # 코사인 약 0.857
+    assert cache.lookup(scope, 1, close, SOURCES)["similarity"] == pytest.approx(float(close[0]), rel=1e-5)
+    assert cache.lookup(scope, 1, far, SOURCES) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_version_must_match(cache):
+    scope = SemanticAnswerCache.scope_key("col", "model")
+    cache.store(scope, 1, "질문", unit(1, 0, 0), "옛 답", [], SOURCES)
+    assert cache.lookup(scope, 2, unit(1, 0, 0), SOURCES) is None
+    # 새 버전 답을 담으면 같은 범위의 옛 버전 답은 지워지오
+    cache.store(scope, 2, "질문", unit(1, 0, 0), "새 답", [], SOURCES)
+    assert cache.stats()["entries"] == 1
+    assert cache.lookup(scope, 2, unit(1, 0, 0), SOURCES)["answer"] == "새 답"
+
+
+@pytest.mark.parametrize("other", [
+    {"collection": "other"},
+    {"model": "other-embedding"},
+    {"filters": (("level", ("basic",)),)},
+    {"chat_model": "solar-mini"},
+    {"prompt_hash": "0123456789ab"},
+])
+def test_scope_isolates_answers(cache, other):
+    base = {"collection": "col", "model": "model", "filters": (), "chat_model": "solar-pro",
+            "prompt_hash": "feedfacecafe"}
+    cache.store(SemanticAnswerCache.scope_key(**base), 1, "질문", unit(1, 0, 0), "답", [], SOURCES)
+    assert cache.lookup(SemanticAnswerCache.scope_key(**{**base, **other}), 1, unit(1, 0, 0), SOURCES) is None
+    assert cache.lookup(SemanticAnswerCache.scope_key(**base), 1, unit(1, 0, 0), SOURCES) is not None
+
+
+def test_lower_overlap_is_opt_in(tmp_path):
+    cache = SemanticAnswerCache(path=str(tmp_path / "answers.sqlite3"), threshold=0.9, min_source_overlap=0.5)
+    scope = SemanticAnswerCache.scope_key("col", "model")
+    cache.store(scope, 1, "질문", unit(1, 0, 0), "답", [], SOURCES)
+    assert cache.lookup(scope, 1, unit(1, 0, 0), SOURCES[:1]) is not None
+
+
+def test_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    scope = SemanticAnswerCache.scope_key("col", "model")
+    SemanticAnswerCache(path=path, threshold=0.9).store(scope, 1, "질문", unit(0, 1, 0), "답", [], SOURCES)
+    assert SemanticAnswerCache(path=path, threshold=0.9).lookup(scope, 1, unit(0, 1, 0), SOURCES)["answer"] == "답"
+
+
+def test_eviction_updates_memory_without_reload(cache, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr("src.qa.answer_cache.time.time", lambda: float(next(clock)))
+    scopes = [SemanticAnswerCache.scope_key("col", "model"), SemanticAnswerCache.scope_key("col", "other")]
+    for i in range(10):
+        cache.store(scopes[i % 2], 1, f"질문{i}", unit(1, i, 0), f"답{i}", [], SOURCES)
+    monkeypatch.setattr(cache, "_load", lambda: pytest.fail("전체 재적재는 하지 않아야 하오"))
+
+    cache.store(scopes[0], 1, "질문10", unit(1, 10, 0), "답10", [], SOURCES)
+    cache.store(scopes[1], 2, "질문11", unit(1, 11, 0), "답11", [], SOURCES)
+    # 가장 오래된 질문0이 밀려나고, scopes[1]의 버전 1 항목 다섯 개는 새 버전에 밀려나오
+    assert cache.stats()["entries"] == 6
+    assert cache.lookup(scopes[0], 1, unit(1, 0, 0), SOURCES) is None
+    assert cache.lookup(scopes[0], 1, unit(1, 2, 0), SOURCES)["answer"] == "답2"
+    assert cache.lookup(scopes[1], 2, unit(1, 11, 0), SOURCES)["answer"] == "답11"
+
+    reopened = SemanticAnswerCache(path=cache.path, max_entries=10, threshold=0.9)
+    for scope in scopes:
+        assert reopened._scopes[scope][0].tolist() == cache._scopes[scope][0].tolist()
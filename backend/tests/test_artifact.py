@@ -0,0 +1,44 @@
+import os
+
+from src.vector_store.artifact import read_current_meta, write_versioned
+
+
+def write_marker(text):
+    def write_files(dir_path):
+        with open(os.path.join(dir_path, "data.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+    return write_files
+
+
+def current_data(root):
+    meta = read_current_meta(str(root), format_version=1)
+    with open(os.path.join(meta["dir"], "data.txt"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_same_meta_is_not_rewritten(tmp_path):
+    meta = {"format_version": 1, "tokenizer": "kiwi"}
+    assert write_versioned(str(tmp_path), 3, meta, write_marker("처음"))
+    assert not write_versioned(str(tmp_path), 3, meta, write_marker("다시"))
+    assert current_data(tmp_path) == "처음"
+
+    # 같은 버전이라도 meta가 다르면 살아있는 v3을 지우지 않고 새 디렉터리에 쓰오
+    assert write_versioned(str(tmp_path), 3, dict(meta, tokenizer="whitespace"), write_marker("바뀜"))
+    assert current_data(tmp_path) == "바뀜"
+    assert {"v3", "v3.1"} <= set(os.listdir(tmp_path))
+
+
+def test_cleanup_spares_tmp_dirs_and_pointer_never_regresses(tmp_path):
+    meta = {"format_version": 1}
+    write_versioned(str(tmp_path), 1, meta, write_marker("하나"))
+    in_progress = tmp_path / "v2.tmp-99999"  # 다른 프로세스가 작성 중인 디렉터리
+    in_progress.mkdir()
+
+    write_versioned(str(tmp_path), 2, meta, write_marker("둘"))
+    assert in_progress.exists()
+    assert "v1" not in os.listdir(tmp_path)
+
+    # 늦게 끝난 낮은 버전 작성은 포인터를 되돌리지 않소
+    write_versioned(str(tmp_path), 1, meta, write_marker("늦은 하나"))
+    assert read_current_meta(str(tmp_path), format_version=1)["collection_version"] == 2
+    assert current_data(tmp_path) == "둘"
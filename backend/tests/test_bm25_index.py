@@ -0,0 +1,81 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src.processor.tokenizer import WhitespaceTokenizer
+from src.retriever.bm25_index import BM25Index
+
+CORPUS = [
+    "호흡 명상 은 숨 을 세는 수행 이오",
+    "걷기 명상 은 발 의 감각 에 집중 하오",
+    "숨 을 길게 내쉬면 마음 이 가라앉소 숨 숨",
+    "잠 이 오지 않을 때 는 몸 을 훑는 명상",
+    "명상",
+]
+
+
+def reference_scores(corpus_tokens, query_tokens, k1=1.5, b=0.75, epsilon=0.25):
+    """rank_bm25.BM25Okapi와 같은 공식을 그대로 옮긴 순수 파이썬 참조 구현"""
+    n = len(corpus_tokens)
+    avgdl = sum(len(tokens) for tokens in corpus_tokens) / n
+    df = Counter(term for tokens in corpus_tokens for term in set(tokens))
+    idf = {term: math.log(n - freq + 0.5) - math.log(freq + 0.5) for term, freq in df.items()}
+    average_idf = sum(idf.values()) / len(idf)
+    idf = {term: (epsilon * average_idf if value < 0 else value) for term, value in idf.items()}
+
+    scores = []
+    for tokens in corpus_tokens:
+        tf = Counter(tokens)
+        score = 0.0
+        for term in query_tokens:
+            if term not in tf:
+                continue
+            norm = k1 * (1 - b + b * len(tokens) / avgdl)
+            score += idf[term] * tf[term] * (k1 + 1) / (tf[term] + norm)
+        scores.append(score)
+    return np.array(scores)
+
+
+@pytest.fixture
+def index():
+    docs = [Document(page_content=text, metadata={"source": f"doc{i}"}) for i, text in enumerate(CORPUS)]
+    return BM25Index.build([f"id{i}" for i in range(len(docs))], docs, tokenizer=WhitespaceTokenizer())
+
+
+@pytest.mark.parametrize("query", ["명상", "숨 을", "호흡 명상 마음", "없는 단어"])
+def test_scores_match_reference(index, query):
+    corpus_tokens = [text.split() for text in CORPUS]
+    expected = reference_scores(corpus_tokens, query.split())
+    np.testing.assert_allclose(index.get_scores(query.split()), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_scores_match_rank_bm25(index):
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    corpus_tokens = [text.split() for text in CORPUS]
+    okapi = rank_bm25.BM25Okapi(corpus_tokens)
+    for query in ("명상", "숨 을 마음", "걷기 발"):
+        np.testing.assert_allclose(index.get_scores(query.split()), okapi.get_scores(query.split()),
+                                   rtol=1e-5, atol=1e-6)
+
+
+def test_top_k_and_batch_agree(index):
+    queries = [["숨"], ["명상", "감각"], ["없는"]]
+    batch = index.top_k_batch(queries, k=2)
+    for query, top in zip(queries, batch):
+        assert top == index.top_k(query, k=2)
+    scores = index.get_scores(["숨"])
+    assert [i for i, _ in batch[0]] == list(np.argsort(-scores)[:2])
+    assert batch[2] == []
+
+
+def test_save_and_load_checks_version(index, tmp_path):
+    index.collection_version = 3
+    index.save(str(tmp_path))
+    assert BM25Index.load(str(tmp_path), expected_version=4) is None
+    loaded = BM25Index.load(str(tmp_path), expected_version=3)
+    assert loaded.collection_version == 3
+    np.testing.assert_allclose(loaded.get_scores(["숨"]), index.get_scores(["숨"]))
+    assert loaded.get_document(1).page_content == CORPUS[1]
@@ -0,0 +1,32 @@
+from langchain_core.documents import Document
+
+from src.qa.context_builder import ContextBuilder, TokenCounter
+
+
+def builder(max_tokens=200, min_trim_tokens=5):
+    # 없는 인코딩 이름이면 글자 수 어림으로 세므로 네트워크 없이도 결과가 정해지오
+    return ContextBuilder(max_tokens=max_tokens, min_trim_tokens=min_trim_tokens,
+                          counter=TokenCounter("estimate-only"))
+
+
+def doc(text, score, **metadata):
+    return Document(page_content=text, metadata={"relevance_score": score, **metadata})
+
+
+def test_sources_fall_back_to_chunk_source():
+    packed = builder().build([
+        doc("호흡을 고르시오.", 0.9, source="https://example.com/breath"),
+        doc("몸을 살피시오.", 0.8, source_url="https://example.com/body", source="ignored"),
+        doc("마음을 비우시오.", 0.7),
+    ])
+    assert packed.sources == ["https://example.com/breath", "https://example.com/body", "unknown"]
+
+
+def test_packs_by_relevance_and_trims_at_sentence():
+    packed = builder(max_tokens=30).build([
+        doc("둘째 문서이오.", 0.2),
+        doc("첫째 문서이오. 숨을 깊이 들이쉬시오. 천천히 내쉬시오.", 0.9),
+    ], item_format="{content}")
+    assert packed.text.startswith("첫째 문서이오.")
+    assert packed.tokens <= packed.budget
+    assert packed.trimmed + packed.dropped >= 1
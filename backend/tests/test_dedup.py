@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from src.retriever.dedup import content_key, dedup_documents, estimated_jaccard, minhash_signature
+
+BASE = "호흡 명상은 들숨과 날숨을 세며 마음을 한곳에 모으는 수행이오. 숨이 흩어지면 다시 하나부터 세시오."
+
+
+def test_content_key_ignores_whitespace():
+    assert content_key("가  나\n다") == content_key("가 나 다")
+    assert content_key("가 나 다") != content_key("가 나 라")
+
+
+def test_minhash_estimates_jaccard():
+    near = BASE.replace("다시 하나부터", "처음부터 다시")
+    other = "걷기 명상은 발바닥의 감각에 주의를 두고 천천히 걷는 수행이오."
+    assert estimated_jaccard(minhash_signature(BASE), minhash_signature(BASE)) == 1.0
+    assert estimated_jaccard(minhash_signature(BASE), minhash_signature(near)) > 0.6
+    assert estimated_jaccard(minhash_signature(BASE), minhash_signature(other)) < 0.3
+
+
+def test_dedup_keeps_first_of_exact_and_near_duplicates():
+    docs = [
+        Document(page_content=BASE, metadata={"rank": 0}),
+        Document(page_content="걷기 명상은 발의 감각에 집중하오.", metadata={"rank": 1}),
+        Document(page_content=BASE.replace(" ", "  "), metadata={"rank": 2}),  # 완전 중복
+        Document(page_content=BASE + " 끝.", metadata={"rank": 3}),            # 유사 중복
+    ]
+    assert [d.metadata["rank"] for d in dedup_documents(docs, near_threshold=0.8)] == [0, 1]
+    # 1.0이면 완전 중복만 지우오
+    assert [d.metadata["rank"] for d in dedup_documents(docs, near_threshold=1.0)] == [0, 1, 3]
@@ -0,0 +1,59 @@
+import pytest
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.retriever.fusion import FusionEngine
+
+
+def doc(text):
+    return Document(page_content=text)
+
+
+def texts(scored):
+    return [d.page_content for d, _ in scored]
+
+
+def test_minmax_fusion_weights_and_merges_same_chunk():
+    engine = FusionEngine(method="minmax", weights=(0.7, 0.3))
+    bm25 = [(doc("가 청크"), 12.0), (doc("나 청크"), 2.0)]
+    vector = [(doc("나  청크"), 0.9), (doc("다 청크"), 0.1)]  # 공백만 다른 같은 청크
+    fused = engine.fuse([bm25, vector])
+    assert texts(fused) == ["가 청크", "나 청크", "다 청크"]
+    assert [score for _, score in fused] == pytest.approx([0.7, 0.3, 0.0])
+
+
+def test_rrf_fusion_uses_ranks_only():
+    engine = FusionEngine(method="rrf", weights=(1.0, 1.0), rrf_c=60)
+    fused = engine.fuse([[(doc("a"), 100.0), (doc("b"), 99.0)], [(doc("b"), 0.2), (doc("a"), 0.1)]])
+    assert fused[0][1] == pytest.approx(fused[1][1])
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        FusionEngine(method="borda")
+
+
+@pytest.mark.parametrize("scores, expected", [
+    ([1.0, 0.9, 0.8, 0.7], 4),    # 고르게 높으면 max_k까지
+    ([1.0, 0.9, 0.3, 0.29], 2),   # 앞 문서 대비 절벽에서 멈춤
+    ([1.0, 0.6, 0.35, 0.2], 3),   # 1위 대비 상대 점수 아래에서 멈춤
+])
+def test_adaptive_k(scores, expected):
+    engine = FusionEngine(min_k=1, max_k=4, cliff_ratio=0.5, min_relative_score=0.25, char_budget=10_000)
+    assert len(engine.select([(doc(str(i)), s) for i, s in enumerate(scores)])) == expected
+
+
+def test_min_k_and_char_budget():
+    engine = FusionEngine(min_k=2, max_k=5, cliff_ratio=0.5, min_relative_score=0.25, char_budget=10)
+    scored = [(doc("짧은글"), 1.0), (doc("두번째"), 0.01), (doc("세번째"), 0.009)]
+    assert texts(engine.select(scored)) == ["짧은글", "두번째"]  # 절벽이어도 min_k는 채우오
+    budget = FusionEngine(min_k=1, max_k=5, cliff_ratio=0.0, min_relative_score=0.0, char_budget=10)
+    assert texts(budget.select([(doc("1234567890"), 1.0), (doc("x"), 0.9)])) == ["1234567890"]
+    assert texts(budget.select([(doc("12345678901"), 1.0)])) == ["12345678901"]  # 1위는 항상 포함
+
+
+def test_weights_default_to_config(monkeypatch):
+    monkeypatch.setattr(Config, "FUSION_WEIGHTS", (0.4, 0.6))
+    assert FusionEngine().weights == (0.4, 0.6)
+    assert FusionEngine(weights=(1.0, 1.0)).weights == (1.0, 1.0)
@@ -0,0 +1,105 @@
+import pytest
+from conftest import CHUNKS, make_chunks
+
+from src.config import Config
+from src.retriever.hybrid_retriever import HybridRetriever
+from src.vector_store.manager import VectorDBManager
+
+COLLECTION = "meditation_test"
+
+
+def contents(docs):
+    return {doc.page_content for doc in docs}
+
+
+def test_sync_bumps_version_once(manager):
+    assert manager.get_index_version(COLLECTION) == -1
+    manager.sync_documents(make_chunks(), COLLECTION)
+    assert manager.get_index_version(COLLECTION) == 1
+
+    # 추가 + 메타데이터 갱신 + 삭제를 한 번에 해도 버전은 한 번만 오르오
+    rows = [(CHUNKS[0][0], "advanced", "breath"), *CHUNKS[1:3], ("새로 들어온 청크이오.", "basic", "new")]
+    summary = manager.sync_documents(make_chunks(rows), COLLECTION)
+    assert (summary["added"], summary["updated"], summary["removed"]) == (1, 1, 1)
+    assert manager.get_index_version(COLLECTION) == 2
+
+    # 바뀐 것이 없으면 버전도 그대로요
+    manager.sync_documents(make_chunks(rows), COLLECTION)
+    assert manager.get_index_version(COLLECTION) == 2
+
+
+def test_bump_keeps_embedding_contract(manager):
+    manager.sync_documents(make_chunks(), COLLECTION)
+    collection = manager.client.get_collection(COLLECTION)
+    # 계약 기록이 없는 예전 컬렉션에서 삭제만 해도 계약이 기록되오
+    collection.modify(metadata={"index_version": 5})
+    manager.sync_documents(make_chunks(CHUNKS[:2]), COLLECTION)
+    metadata = manager.client.get_collection(COLLECTION).metadata
+    assert metadata["embedding_model"] == manager.embedding_model
+    assert metadata["embedding_document_model"] == manager.document_model
+    assert metadata["embedding_dim"] == Config.EMBEDDING_DIM
+    assert metadata["index_version"] == 6
+
+
+def test_bump_reads_fresh_metadata(manager):
+    manager.sync_documents(make_chunks(), COLLECTION)
+    stale = manager.client.get_collection(COLLECTION)
+    other = VectorDBManager(db_path=manager.db_path)
+    other.sync_documents(make_chunks(CHUNKS[:3]), COLLECTION)
+    assert manager._bump_index_version(stale) == 3
+    assert manager.client.get_collection(COLLECTION).metadata["embedding_dim"] == Config.EMBEDDING_DIM
+
+
+def test_partial_failure_still_bumps(manager, monkeypatch):
+    monkeypatch.setattr(Config, "EMBED_BATCH_SIZE", 1)
+    monkeypatch.setattr(Config, "EMBED_MAX_RETRIES", 0)
+    monkeypatch.setattr(Config, "EMBED_MAX_WORKERS", 1)
+    embed_batch = manager.embed_batch
+
+    def flaky(texts):
+        if "자비" in texts[0]:
+            raise RuntimeError("boom")
+        return embed_batch(texts)
+
+    monkeypatch.setattr(manager, "embed_batch", flaky)
+    with pytest.raises(RuntimeError):
+        manager.sync_documents(make_chunks(), COLLECTION)
+    assert manager.client.get_collection(COLLECTION).count() == 3
+    assert manager.get_index_version(COLLECTION) == 1
+
+
+def test_retrieval_cache_key_follows_version(manager):
+    manager.sync_documents(make_chunks(), COLLECTION)
+    retriever = HybridRetriever(manager, COLLECTION)
+    before = retriever.cache_key("호흡 명상")
+    manager.sync_documents(make_chunks(CHUNKS[:2]), COLLECTION)
+    assert retriever.cache_key("호흡 명상") != before
+
+
+@pytest.mark.parametrize("backend", ["chroma", "numpy"])
+def test_long_lived_retriever_reloads_stale_artifacts(manager, monkeypatch, backend):
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", backend)
+    manager.sync_documents(make_chunks(), COLLECTION)
+    retriever = HybridRetriever(manager, COLLECTION)
+    assert CHUNKS[0][0] in contents(retriever.retrieve("호흡 명상"))
+
+    # 다른 프로세스(매니저)가 청크를 지우고 새 청크를 넣었소
+    other = VectorDBManager(db_path=manager.db_path)
+    other.sync_documents(make_chunks([*CHUNKS[1:], ("호흡을 고르는 새 비결이오.", "basic", "new")]), COLLECTION)
+
+    found = contents(retriever.retrieve("호흡 명상"))
+    assert CHUNKS[0][0] not in found
+    assert "호흡을 고르는 새 비결이오." in found
+    assert retriever._bm25.index.collection_version == 2
+    if backend == "numpy":
+        assert retriever._vector.store.collection_version == 2
+
+
+def test_stale_results_are_not_cached_under_new_version(manager, monkeypatch):
+    manager.sync_documents(make_chunks(), COLLECTION)
+    retriever = HybridRetriever(manager, COLLECTION)
+    # 산출물을 다시 불러오지 못한 척하면 결과를 새 버전 키로 담지 않소
+    monkeypatch.setattr(retriever, "refresh", lambda version: False)
+    manager.sync_documents(make_chunks(CHUNKS[:2]), COLLECTION)
+    retriever.retrieve("호흡 명상")
+    assert retriever.cache.get(retriever.cache_key("호흡 명상")) is None
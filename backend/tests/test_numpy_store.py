@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src.vector_store.numpy_store import NumpyVectorStore
+
+N_DOCS, DIM = 40, 16
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(N_DOCS, DIM)).astype(np.float32)
+    docs = [
+        Document(page_content=f"청크 {i}", metadata={"level": "basic" if i % 2 else "advanced", "source": f"s{i}"})
+        for i in range(N_DOCS)
+    ]
+    return [f"id{i}" for i in range(N_DOCS)], docs, embeddings
+
+
+def brute_force(embeddings, query, k, rows=None):
+    """정규화한 행렬과의 내적(코사인)으로 전부 채점한 정답 순위"""
+    matrix = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    candidates = np.arange(len(matrix)) if rows is None else np.asarray(rows)
+    return [int(i) for i in candidates[np.argsort(-scores[candidates], kind="stable")][:k]]
+
+
+def test_float32_search_matches_brute_force(corpus):
+    ids, docs, embeddings = corpus
+    store = NumpyVectorStore.build(ids, docs, embeddings)
+    query = embeddings[7] + 0.1
+    top = store.search(query, k=5)
+    assert [i for i, _ in top] == brute_force(embeddings, query, 5)
+    assert top[0][1] == pytest.approx(max(score for _, score in top))
+    assert store.get_document(top[0][0]).page_content == docs[top[0][0]].page_content
+
+
+def test_batch_search_matches_single(corpus):
+    ids, docs, embeddings = corpus
+    store = NumpyVectorStore.build(ids, docs, embeddings)
+    queries = embeddings[:3] * 2
+    for batched, query in zip(store.search_batch(queries, k=4), queries):
+        single = store.search(query, k=4)
+        assert [i for i, _ in batched] == [i for i, _ in single]
+        np.testing.assert_allclose([s for _, s in batched], [s for _, s in single], rtol=1e-5)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_rescoring_recovers_exact_order(corpus, dtype):
+    ids, docs, embeddings = corpus
+    store = NumpyVectorStore.build(ids, docs, embeddings, dtype=dtype, rescore=True, rescore_factor=4)
+    assert store.dtype == dtype and store.full is not None
+    query = embeddings[11]
+    top = store.search(query, k=3)
+    assert [i for i, _ in top] == brute_force(embeddings, query, 3)
+
+
+def test_filters_restrict_rows(corpus):
+    ids, docs, embeddings = corpus
+    store = NumpyVectorStore.build(ids, docs, embeddings)
+    basic_rows = [i for i, doc in enumerate(docs) if doc.metadata["level"] == "basic"]
+    query = embeddings[0]
+    top = store.search(query, k=5, filters={"level": "basic"})
+    assert [i for i, _ in top] == brute_force(embeddings, query, 5, rows=basic_rows)
+
+
+def test_dimension_mismatch_is_rejected(corpus):
+    ids, docs, embeddings = corpus
+    store = NumpyVectorStore.build(ids, docs, embeddings)
+    with pytest.raises(ValueError):
+        store.search(np.ones(DIM + 1), k=1)
+
+
+def test_save_and_load_checks_version(corpus, tmp_path):
+    ids, docs, embeddings = corpus
+    store = NumpyVectorStore.build(ids, docs, embeddings, dtype="int8", collection_version=2)
+    store.save(str(tmp_path))
+    assert NumpyVectorStore.load(str(tmp_path), expected_version=3) is None
+    loaded = NumpyVectorStore.load(str(tmp_path), expected_version=2)
+    assert loaded.collection_version == 2 and loaded.dtype == "int8"
+    assert loaded.search(embeddings[5], k=3) == store.search(embeddings[5], k=3)
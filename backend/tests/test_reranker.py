@@ -0,0 +1,60 @@
+import pytest
+from conftest import make_chunks
+from langchain_core.documents import Document
+
+from src.retriever.fusion import FusionEngine
+from src.retriever.hybrid_retriever import HybridRetriever
+from src.retriever.reranker import BaseReranker, LexicalProximityReranker
+
+
+def doc(text):
+    return Document(page_content=text)
+
+
+def texts(scored):
+    return [d.page_content for d, _ in scored]
+
+
+class FixedReranker(BaseReranker):
+    """첫 배치만 채점하고 시간 예산을 다 쓴 것처럼 멈추는 재순위기"""
+
+    name = "fixed"
+
+    def score_batch(self, query, docs):
+        return [0.9, 0.8, 0.1][:len(docs)]
+
+
+def test_unscored_rerank_candidates_are_cut_by_adaptive_k():
+    reranker = FixedReranker(batch_size=3, budget_ms=0)
+    reranked = reranker.rerank("질의", [(doc(f"후보{i}"), 1.0) for i in range(6)])
+    assert texts(reranked) == [f"후보{i}" for i in range(6)]  # 채점 못 한 후보도 순서는 유지
+    # 채점한 점수는 [0, 1]로 펴지고, 채점 못 한 후보는 0점이오
+    assert [score for _, score in reranked] == pytest.approx([1.0, 0.875, 0.0, 0.0, 0.0, 0.0])
+    # 상대 점수 규칙을 끄고도 절벽/0점 규칙만으로 잘리는지 보오
+    engine = FusionEngine(min_k=1, max_k=6, cliff_ratio=0.5, min_relative_score=0.0, char_budget=10_000)
+    assert texts(engine.select(reranked)) == ["후보0", "후보1"]
+    # min_k가 채점한 수보다 크면 채점 못 한 후보로 채우오
+    engine.min_k = 4
+    assert len(engine.select(reranked)) == 4
+
+
+def test_single_common_term_gets_no_proximity_bonus():
+    reranker = LexicalProximityReranker(tokenizer_name="whitespace")
+    scores = reranker.score_batch("잠 명상", [doc("잠 이 오면 명상"), doc("걷기 명상"), doc("잠 명상")])
+    assert scores[1] == pytest.approx(0.35)  # 한 단어만 맞으면 포함 비율 몫뿐이오
+    assert scores[2] == pytest.approx(1.0) and scores[0] < scores[2]
+
+
+@pytest.mark.parametrize("query", ["잠이 오지 않을 때 명상", "호흡 명상", "자비 명상 문구", "걷기 수행"])
+def test_reranker_does_not_widen_selected_k(manager, query):
+    manager.sync_documents(make_chunks(), "meditation_test")
+    plain = HybridRetriever(manager, "meditation_test", reranker="none")
+    reranked = HybridRetriever(manager, "meditation_test", reranker="lexical")
+    assert len(reranked.retrieve(query)) <= len(plain.retrieve(query))
+
+
+def test_signature_tracks_budget_and_model():
+    fast = LexicalProximityReranker(budget_ms=50)
+    slow = LexicalProximityReranker(budget_ms=500)
+    assert fast.signature != slow.signature
+    assert FixedReranker(batch_size=4).signature != FixedReranker(batch_size=8).signature
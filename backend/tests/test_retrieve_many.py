@@ -0,0 +1,27 @@
+from conftest import make_chunks
+
+from src.retriever.hybrid_retriever import HybridRetriever
+
+QUERIES = ["호흡 명상", "잠이 오지 않을 때", "호흡 명상", "자비"]
+
+
+def test_retrieve_many_matches_retrieve(manager):
+    manager.sync_documents(make_chunks(), "meditation_test")
+    retriever = HybridRetriever(manager, "meditation_test")
+    expected = [[doc.page_content for doc in retriever.retrieve(query)] for query in QUERIES]
+    retriever.cache.clear()
+
+    results = retriever.retrieve_many(QUERIES)
+    assert [r["query"] for r in results] == QUERIES
+    assert [[doc.page_content for doc in r["documents"]] for r in results] == expected
+    # 같은 질의는 한 번만 계산하고, 두 번째 호출은 모두 캐시에서 나오오
+    assert not any(r["cached"] for r in results)
+    assert all(r["cached"] for r in retriever.retrieve_many(QUERIES))
+
+
+def test_retrieve_many_applies_filters(manager):
+    manager.sync_documents(make_chunks(), "meditation_test")
+    retriever = HybridRetriever(manager, "meditation_test")
+    for result in retriever.retrieve_many(["명상 수행"], filters={"level": "advanced"}):
+        assert result["documents"]
+        assert {doc.metadata["level"] for doc in result["documents"]} == {"advanced"}
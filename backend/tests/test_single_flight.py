@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.qa.engine import QAEngine
+from src.qa.single_flight import Flight, SingleFlight
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "시간 안에 조건이 채워지지 않았소"
+        time.sleep(0.005)
+
+
+def test_join_and_land():
+    flights = SingleFlight()
+    flight, leader = flights.join("q")
+    again, second = flights.join("q")
+    assert leader and not second and again is flight
+    assert flights.join("other")[1]
+    flights.land(flight)
+    assert flights.join("q")[1]  # 내린 뒤 같은 키는 새 비행이오
+    assert flights.stats()["leaders"] == 3 and flights.stats()["coalesced"] == 1
+
+
+def test_late_joiner_replays_prefix_then_live_chunks():
+    flight = Flight("q")
+    flight.publish("가")
+    flight.publish("나")
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(flight.stream()))
+    reader.start()
+    wait_until(lambda: len(received) == 2)
+    flight.publish("다")
+    flight.finish()
+    reader.join(timeout=5)
+    assert received == ["가", "나", "다"]
+
+
+def test_errors_reach_every_consumer():
+    flight = Flight("q")
+    flight.finish(error=RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        flight.wait()
+    with pytest.raises(RuntimeError):
+        list(flight.stream())
+
+
+def make_engine():
+    """검색/LLM 없이 합치기만 보는 QAEngine (생성 함수는 각 테스트에서 바꿔 끼우오)"""
+    engine = QAEngine.__new__(QAEngine)
+    engine.retriever = SimpleNamespace(collection_name="meditation_test")
+    engine.flights = SingleFlight()
+    return engine
+
+
+def test_concurrent_identical_questions_generate_once():
+    engine = make_engine()
+    calls = []
+    release = threading.Event()
+
+    def slow_answer(question, filters, use_cache):
+        calls.append(question)
+        release.wait(timeout=5)
+        return {"answer": "숨을 세시오.", "sources": []}
+
+    engine._get_answer = slow_answer
+    results = []
+    # 공백/대소문자만 다른 질문은 같은 질문으로 보오
+    questions = ["호흡 명상이란?", "  호흡  명상이란? ", "호흡 명상이란?", "호흡 명상이란?"]
+    threads = [threading.Thread(target=lambda q=q: results.append(engine.get_answer(q))) for q in questions]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: engine.flights.stats()["coalesced"] == len(questions) - 1)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert [r["answer"] for r in results] == ["숨을 세시오."] * len(questions)
+    assert sum(1 for r in results if r.get("coalesced")) == len(questions) - 1
+    assert engine.flights.stats()["in_flight"] == 0
+
+
+def test_different_filters_are_not_coalesced():
+    engine = make_engine()
+    keys = {engine._flight_key("answer", "질문", filters, True)
+            for filters in (None, {"level": "basic"}, {"level": "advanced"})}
+    assert len(keys) == 3
+    assert engine._flight_key("answer", "질문", None, True) != engine._flight_key("answer", "질문", None, False)
+
+
+def test_async_identical_questions_generate_once():
+    engine = make_engine()
+    calls = []
+
+    async def slow_answer(question, filters, use_cache):
+        calls.append(question)
+        await asyncio.sleep(0.05)
+        return {"answer": "답", "sources": []}
+
+    engine._aget_answer = slow_answer
+
+    async def ask_all():
+        return await asyncio.gather(*(engine.aget_answer("같은 질문") for _ in range(5)))
+
+    results = asyncio.run(ask_all())
+    assert len(calls) == 1
+    assert [r["answer"] for r in results] == ["답"] * 5
+    assert sum(1 for r in results if r.get("coalesced")) == 4
+
+
+def test_cancelled_producer_propagates_cancellation():
+    engine = make_engine()
+
+    async def hang(question, filters, use_cache):
+        await asyncio.sleep(10)
+
+    engine._aget_answer = hang
+
+    async def cancel_leader():
+        waiter = asyncio.create_task(engine.aget_answer("질문"))
+        await asyncio.sleep(0.01)
+        (flight,) = engine.flights._flights.values()
+        flight.task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flight.task  # 취소가 생성 태스크에서 삼켜지지 않소
+        with pytest.raises(asyncio.CancelledError):
+            await waiter  # 기다리던 요청도 같은 취소를 받소
+
+    asyncio.run(cancel_leader())
+    assert engine.flights.stats()["in_flight"] == 0